@@ -1,5 +1,6 @@
 import json
 from .utils import create_response, load_game_items, save_game_items, admin_required
+from .serialization import dumps
 
 @admin_required
 def handler(request, response):
@@ -182,7 +183,7 @@ def handler(request, response):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -200,7 +201,7 @@ def handler(request, response):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -2,7 +2,8 @@ import json
 import os
 from datetime import datetime, timedelta
 import jwt
-from .utils import create_response
+from .utils import create_response, revoke_token
+from .serialization import dumps
 
 # 환경 변수에서 관리자 정보 가져오기 또는 기본값 사용
 ADMIN_USERNAME = os.environ.get("ADMIN_USERNAME", "admin")
@@ -18,7 +19,7 @@ def handler(request, response):
             "statusCode": 200,
             "headers": {
                 "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
+                "Access-Control-Allow-Headers": "Content-Type, Authorization",
                 "Access-Control-Allow-Methods": "POST, OPTIONS"
             }
         }
@@ -32,7 +33,7 @@ def handler(request, response):
         )
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -51,8 +52,20 @@ def handler(request, response):
         username = body.get('username')
         password = body.get('password')
         
+        # 로그아웃: 현재 토큰 폐기
+        if body.get('action') == 'logout':
+            headers = request.get('headers', {}) or {}
+            revoked, message = revoke_token(headers.get('authorization') or headers.get('Authorization'))
+            if revoked:
+                response_data, status_code = create_response(success=True, message=message)
+            else:
+                response_data, status_code = create_response(
+                    success=False,
+                    error=f"로그아웃 실패: {message}",
+                    status_code=401
+                )
         # 인증 확인
-        if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+        elif username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
             # JWT 토큰 생성 (유효기간 24시간)
             payload = {
                 'sub': username,
@@ -77,11 +90,11 @@ def handler(request, response):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
+                "Access-Control-Allow-Headers": "Content-Type, Authorization",
                 "Access-Control-Allow-Methods": "POST, OPTIONS"
             }
         }
@@ -95,7 +108,7 @@ def handler(request, response):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -1,10 +1,15 @@
 import json
 import os
 from .utils import create_response, admin_required
+from .prompt_registry import PromptRegistry
+from .serialization import dumps, write_file
 
 # 데이터 파일 경로
 DATA_PATH = os.path.join(os.path.dirname(__file__), '../data')
 
+# 프롬프트 레지스트리 (파일을 한 번만 읽고 변경된 항목만 다시 읽음)
+PROMPT_REGISTRY = PromptRegistry(os.path.join(DATA_PATH, 'prompts'))
+
 # 프롬프트 파일 경로 가져오기
 def get_prompt_file_path(item_id):
     return os.path.join(DATA_PATH, 'prompts', f'{item_id}.json')
@@ -12,11 +17,7 @@ def get_prompt_file_path(item_id):
 # 프롬프트 로드
 def load_item_prompt(item_id):
     try:
-        file_path = get_prompt_file_path(item_id)
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return None
+        return PROMPT_REGISTRY.get(item_id)
     except Exception as e:
         print(f"프롬프트 로드 중 오류: {str(e)}")
         return None
@@ -26,8 +27,8 @@ def save_item_prompt(item_id, prompt_data):
     try:
         file_path = get_prompt_file_path(item_id)
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(prompt_data, f, ensure_ascii=False, indent=2)
+        write_file(file_path, prompt_data)
+        PROMPT_REGISTRY.invalidate(item_id)
         return True
     except Exception as e:
         print(f"프롬프트 저장 중 오류: {str(e)}")
@@ -66,7 +67,7 @@ def handler(request, response):
         )
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -136,7 +137,7 @@ def handler(request, response):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -154,7 +155,7 @@ def handler(request, response):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response_data),
+            "body": dumps(response_data),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
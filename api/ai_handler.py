@@ -1,10 +1,20 @@
 import os
 import json
-from openai import OpenAI
 import logging
 
+try:
+    from api.llm_gateway import get_gateway
+    from api.response_cache import get_completion_cache
+    from api.log_pipeline import configure_logging
+    from api.victory import get_victory_engine
+except ImportError:
+    from llm_gateway import get_gateway
+    from response_cache import get_completion_cache
+    from log_pipeline import configure_logging
+    from victory import get_victory_engine
+
 # 로깅 설정
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 def create_openai_client():
@@ -15,7 +25,7 @@ def create_openai_client():
             logger.error("OPENAI_API_KEY가 설정되지 않았습니다.")
             raise ValueError("OpenAI API 키가 설정되지 않았습니다. 환경 변수를 확인하세요.")
         
-        return OpenAI(api_key=api_key)
+        return get_gateway().client
     except Exception as e:
         logger.error(f"OpenAI 클라이언트 생성 오류: {str(e)}")
         raise
@@ -25,36 +35,41 @@ class AIHandler:
     def __init__(self):
         """AI 핸들러 초기화"""
         self.client = create_openai_client()
+        self.gateway = get_gateway()
     
-    def generate_response(self, system_prompt, user_message, model="gpt-3.5-turbo", max_tokens=150, temperature=0.7):
-        """AI 응답 생성"""
+    def generate_response(self, system_prompt, user_message, model="gpt-3.5-turbo", max_tokens=150, temperature=0.7, cache=False):
+        """AI 응답 생성 (cache=True이면 낮은 temperature의 응답을 캐시에서 재사용)"""
         try:
             messages = [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_message}
             ]
             
-            response = self.client.chat.completions.create(
+            completion_cache = get_completion_cache()
+            cache_key = None
+            if completion_cache.is_cacheable(temperature, {"cache": cache}):
+                cache_key = completion_cache.make_key(model, system_prompt, messages[1:], temperature, max_tokens)
+                cached = completion_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
+            response = self.gateway.chat(
                 model=model,
                 messages=messages,
                 max_tokens=max_tokens,
                 temperature=temperature
             )
             
-            return response.choices[0].message.content
+            ai_response = response.choices[0].message.content
+            if cache_key:
+                completion_cache.set(cache_key, ai_response)
+            return ai_response
         except Exception as e:
             logger.error(f"AI 응답 생성 오류: {str(e)}")
             return "AI 응답을 생성하는 중에 오류가 발생했습니다. 다시 시도해주세요."
     
     def check_victory_condition(self, game_type, conversation, victory_condition):
-        """승리 조건 달성 여부 확인"""
-        # 전화번호 승리 조건 확인
-        if "전화번호" in victory_condition.lower():
-            # 마지막 AI 응답 확인
-            last_ai_response = conversation[-1]["content"] if len(conversation) > 0 and conversation[-1]["role"] == "assistant" else ""
-            
-            # 전화번호 패턴이 포함되어 있는지 확인
-            if "010-" in last_ai_response or "010" in last_ai_response:
-                return True
-        
-        return False 
\ No newline at end of file
+        """승리 조건 달성 여부 확인 (마지막 AI 응답을 승리 조건 규칙으로 검사)"""
+        last_ai_response = conversation[-1]["content"] if len(conversation) > 0 and conversation[-1]["role"] == "assistant" else ""
+        game_session = {"category": game_type, "win_condition": victory_condition}
+        return get_victory_engine().evaluate(last_ai_response, game_session).victory
\ No newline at end of file
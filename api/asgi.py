@@ -0,0 +1,222 @@
+"""
+ASGI 엔트리 포인트
+
+api/index.py의 Flask 앱과 같은 경로를 ASGI 서버(uvicorn 등)로 제공합니다.
+LLM 응답을 기다리는 /api/ask(SSE 스트리밍 포함)는 이벤트 루프에서 비동기로 처리하므로,
+OpenAI 응답을 기다리는 동안 워커 스레드를 점유하지 않고 이벤트 루프 하나에서
+진행 중인 게임 여러 개를 함께 처리합니다. 세션 저장소나 파일을 다루는 턴 준비, 프롬프트 구성,
+응답 캐시, 결과 반영은 이벤트 루프를 멈추지 않도록 전용 스레드 풀(ASYNC_BLOCKING_WORKERS)에서 실행합니다.
+그 밖의 경로(health, games, start, end 등)는 금방 끝나므로 Flask 앱을 스레드 풀에서 그대로 실행합니다.
+
+/api/ask도 Flask 요청 컨텍스트 안에서 처리하므로 before_request/after_request 훅
+(메트릭, Server-Timing, CORS 헤더)과 debug_info 설정이 WSGI 앱과 똑같이 적용됩니다.
+
+Vercel은 기존 WSGI 앱(api/index.py의 app)을 그대로 사용합니다.
+
+실행:
+    uvicorn api.asgi:app --workers 2
+"""
+import io
+import sys
+import asyncio
+import logging
+
+from flask import jsonify, request
+
+try:
+    from api.index import (
+        SSE_HEADERS, api_key_error_response, app as flask_app, arun_turn, astream_turn_events,
+        is_stream_requested, prepare_turn, run_blocking, validate_api_key, with_debug_info, OPENAI_AVAILABLE
+    )
+    from api.metrics import phase
+except ImportError:
+    from index import (
+        SSE_HEADERS, api_key_error_response, app as flask_app, arun_turn, astream_turn_events,
+        is_stream_requested, prepare_turn, run_blocking, validate_api_key, with_debug_info, OPENAI_AVAILABLE
+    )
+    from metrics import phase
+
+logger = logging.getLogger("api.asgi")
+
+
+# ASGI ↔ WSGI 변환
+async def read_body(receive):
+    """요청 본문을 끝까지 읽습니다."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def wsgi_environ(scope, body):
+    """ASGI HTTP 스코프와 요청 본문으로 WSGI environ을 만듭니다."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue
+        key = name if name == "CONTENT_TYPE" else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def run_wsgi(environ):
+    """Flask 앱을 실행하고 (상태 코드, 헤더 목록, 본문)을 반환합니다 (스레드 풀에서 실행)."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = headers
+
+    result = flask_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return started["status"], started["headers"], body
+
+
+async def send_start(send, status, headers):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+    })
+
+
+# 스레드 풀에서 처리하는 경로
+async def call_flask(scope, receive, send):
+    """요청을 Flask 앱(WSGI)에 그대로 전달합니다."""
+    body = await read_body(receive)
+    environ = wsgi_environ(scope, body)
+    status, headers, payload = await asyncio.get_running_loop().run_in_executor(None, run_wsgi, environ)
+    await send_start(send, status, headers)
+    await send({"type": "http.response.body", "body": payload})
+
+
+# 비동기로 처리하는 경로
+async def ask_response():
+    """/api/ask 요청을 처리하여 (Flask 응답, SSE 이벤트 비동기 제너레이터 또는 None)을 반환합니다."""
+    try:
+        with phase("json_parse"):
+            request_data = request.get_json(silent=True) or {}
+        game_id = request_data.get('game_id')
+        message = request_data.get('message') or request_data.get('question')
+
+        logger.info("질문 요청: 게임 ID=%s, 메시지 길이=%s", game_id, len(message) if message else 0)
+
+        # API 키 확인
+        api_valid, api_message = validate_api_key()
+        if not api_valid:
+            logger.error(f"API 키 검증 실패: {api_message}")
+            return flask_app.make_response(api_key_error_response(api_message)), None
+
+        # 스트리밍 모드: 헤더를 먼저 보내고 토큰을 Server-Sent Events로 전달
+        if is_stream_requested(request_data):
+            early_response, game_session, system_prompt, claim = await run_blocking(prepare_turn, game_id, message)
+            if early_response:
+                response_data, status_code = early_response
+                return flask_app.make_response((jsonify(response_data), status_code)), None
+
+            logger.info("스트리밍 응답 시작 (게임 ID: %s)", game_id)
+            expected_version = game_session.get('version', 0)
+            events = astream_turn_events(game_id, game_session, message, system_prompt, claim, expected_version)
+            return flask_app.response_class(mimetype='text/event-stream', headers=SSE_HEADERS), events
+
+        response_data, status_code = await arun_turn(game_id, message)
+        with phase("serialization"):
+            return flask_app.make_response((jsonify(response_data), status_code)), None
+    except Exception as e:
+        logger.error(f"질문 처리 중 오류 발생: {str(e)}", exc_info=True)
+        response_data = with_debug_info({
+            "success": False,
+            "error": str(e),
+            "message": "질문을 처리하는 중 오류가 발생했습니다."
+        }, lambda: {
+            "error_type": type(e).__name__,
+            "openai_available": OPENAI_AVAILABLE,
+            "api_key_valid": validate_api_key()[0]
+        })
+        return flask_app.make_response((jsonify(response_data), 500)), None
+
+
+async def call_ask(scope, receive, send):
+    """/api/ask를 Flask 요청 컨텍스트 안에서 비동기로 처리합니다."""
+    body = await read_body(receive)
+    context = flask_app.request_context(wsgi_environ(scope, body))
+    context.push()
+    events = None
+    try:
+        # before_request 훅 (요청 시간 측정 시작 등)이 응답을 반환하면 그 응답을 사용
+        response = flask_app.preprocess_request()
+        if response is None:
+            response, events = await ask_response()
+        else:
+            response = flask_app.make_response(response)
+        response = flask_app.process_response(response)
+
+        await send_start(send, response.status_code, response.headers.to_wsgi_list())
+        if events is None:
+            await send({"type": "http.response.body", "body": response.get_data()})
+            return
+        async for event in events:
+            await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        # 클라이언트 연결이 끊겨도 스트림을 닫아 턴 선점과 LLM 요청 슬롯을 해제
+        if events is not None:
+            await events.aclose()
+        context.pop()
+
+
+# 비동기로 처리하는 경로 (메서드, 경로) → 핸들러
+ASYNC_ROUTES = {
+    ("POST", "/api/ask"): call_ask
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 애플리케이션"""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        raise RuntimeError(f"지원하지 않는 ASGI 스코프입니다: {scope['type']}")
+    handler = ASYNC_ROUTES.get((scope["method"], scope["path"]), call_flask)
+    await handler(scope, receive, send)
@@ -1,22 +1,27 @@
 import json
-import re
 import os
 import logging
 from http.server import BaseHTTPRequestHandler
 from .utils import create_response, create_openai_client, load_game_items
+from .session_store import create_session_store
+from .llm_gateway import get_gateway
+from .context_window import build_context
+from .log_pipeline import BODY, HEADERS, PROMPT, RESPONSE, configure_logging
+from .victory import get_victory_engine
+from .serialization import dumps
 
 # 로깅 설정
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger("api.ask")
 
-# 게임 세션 데이터 저장을 위한 임시 저장소 (실제 구현에서는 데이터베이스 사용 권장)
-GAME_SESSIONS = {}
+# 게임 세션 저장소 (SESSION_STORE_BACKEND 환경 변수로 백엔드 선택)
+GAME_SESSIONS = create_session_store()
 
 def handler(request):
     # 디버깅을 위한 요청 정보 로깅
-    logger.info(f"=== /api/ask 요청 받음 ===")
-    logger.info(f"요청 메서드: {request.get('method')}")
-    logger.info(f"요청 헤더: {request.get('headers', {})}")
+    logger.debug("=== /api/ask 요청 받음 ===")
+    logger.debug("요청 메서드: %s", request.get('method'))
+    logger.debug("요청 헤더: %s", request.get('headers', {}), extra={"category": HEADERS})
     
     # CORS 프리플라이트 요청 처리
     if request.get('method') == "OPTIONS":
@@ -41,7 +46,7 @@ def handler(request):
         )
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -54,7 +59,7 @@ def handler(request):
         # 요청 데이터 파싱
         try:
             body = json.loads(request.get("body", "{}"))
-            logger.info(f"요청 본문: {body}")
+            logger.debug("요청 본문: %s", body, extra={"category": BODY})
         except Exception as e:
             logger.error(f"JSON 파싱 오류: {str(e)}")
             # JSON 파싱 실패 시 빈 객체로 처리
@@ -73,7 +78,7 @@ def handler(request):
             )
             return {
                 "statusCode": status_code,
-                "body": json.dumps(response),
+                "body": dumps(response),
                 "headers": {
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*",
@@ -86,8 +91,8 @@ def handler(request):
         game_id = body.get('game_id')
         message = body.get('message', '')
         
-        logger.info(f"게임 ID: {game_id}")
-        logger.info(f"메시지: {message}")
+        logger.debug("게임 ID: %s", game_id)
+        logger.debug("메시지: %s", message, extra={"category": BODY})
         
         if not game_id:
             logger.error("게임 ID 누락")
@@ -111,7 +116,7 @@ def handler(request):
             )
             return {
                 "statusCode": status_code,
-                "body": json.dumps(response),
+                "body": dumps(response),
                 "headers": {
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*",
@@ -155,10 +160,10 @@ def handler(request):
                 data=response_data
             )
             
-            logger.info(f"응답 반환: {response}")
+            logger.debug("응답 반환: %s", response, extra={"category": RESPONSE})
             return {
                 "statusCode": status_code,
-                "body": json.dumps(response),
+                "body": dumps(response),
                 "headers": {
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*",
@@ -194,10 +199,10 @@ def handler(request):
                 data=response_data
             )
             
-            logger.info(f"응답 반환: {response}")
+            logger.debug("응답 반환: %s", response, extra={"category": RESPONSE})
             return {
                 "statusCode": status_code,
-                "body": json.dumps(response),
+                "body": dumps(response),
                 "headers": {
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*",
@@ -208,7 +213,7 @@ def handler(request):
         
         # 턴 제한 확인 - 이미 max_turns를 초과한 경우에만 실패로 처리
         if current_turn > max_turns:
-            logger.info(f"턴 제한 초과: {current_turn}/{max_turns}")
+            logger.info("턴 제한 초과: %s/%s", current_turn, max_turns)
             response_data = {
                 "game_id": game_id,
                 "response": "죄송합니다. 턴 제한에 도달했습니다. 게임이 종료되었습니다.",
@@ -226,10 +231,10 @@ def handler(request):
             game_session['completed'] = True
             GAME_SESSIONS[game_id] = game_session
             
-            logger.info(f"응답 반환: {response}")
+            logger.debug("응답 반환: %s", response, extra={"category": RESPONSE})
             return {
                 "statusCode": status_code,
-                "body": json.dumps(response),
+                "body": dumps(response),
                 "headers": {
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*",
@@ -252,23 +257,23 @@ def handler(request):
 
             게임 제목: {game_session.get('title', 'AI 게임')}
             승리 조건: {win_condition}
-            현재 턴: {current_turn}/{max_turns}
 
             당신은 사용자의 질문에 친절하게 답변해 주세요.
             전화번호 요청을 받으면 다음과 같은 형식으로 답변해 주세요: "제 전화번호는 010-1234-5678입니다."
             """
             
-            logger.info(f"시스템 프롬프트: {system_prompt}")
+            logger.debug("시스템 프롬프트: %s", system_prompt, extra={"category": PROMPT})
             
-            # 대화 기록에서 적절한 형식의 메시지 생성
-            messages = [{"role": "system", "content": system_prompt}]
-            for msg in conversation[-5:]:  # 최근 5개 메시지만 포함
-                messages.append({"role": msg.get("role"), "content": msg.get("content")})
+            # 대화 기록에서 토큰 예산 안에 들어가는 최근 메시지로 요청 메시지 생성
+            # (턴마다 바뀌는 현재 턴 정보는 시스템 프롬프트가 아닌 사용자 메시지 바로 앞에 둠)
+            messages = build_context(system_prompt, conversation[:-1], message,
+                                     model="gpt-3.5-turbo", max_tokens=300,
+                                     state_message=f"현재 턴: {current_turn}/{max_turns}")
             
-            logger.info(f"OpenAI API 요청 메시지: {messages}")
+            logger.debug("OpenAI API 요청 메시지: %s", messages, extra={"category": PROMPT})
             
-            # OpenAI API로 응답 생성
-            response = client.chat.completions.create(
+            # OpenAI API로 응답 생성 (공유 LLM 게이트웨이 사용)
+            response = get_gateway().chat(
                 model="gpt-3.5-turbo",
                 messages=messages,
                 max_tokens=300
@@ -276,37 +281,26 @@ def handler(request):
             
             # API 응답에서 텍스트 추출
             ai_response = response.choices[0].message.content
-            logger.info(f"OpenAI API 응답: {ai_response}")
+            logger.debug("OpenAI API 응답: %s", ai_response, extra={"category": RESPONSE})
             
             # 대화 기록에 AI 응답 추가
             conversation.append({"role": "assistant", "content": ai_response})
             
-            # 승리 조건 확인 (전화번호 포함 여부)
-            victory = False
-            completed = False
-            
-            # 전화번호 패턴 검색 (010-XXXX-XXXX 또는 010 XXXX XXXX 형식)
-            phone_patterns = [
-                r'010-\d{3,4}-\d{4}',  # 010-XXXX-XXXX
-                r'010\s?\d{3,4}\s?\d{4}',  # 010 XXXX XXXX 또는 010XXXXXXXX
-                r'전화번호[는은]?\s?01\d[-\s]?\d{3,4}[-\s]?\d{4}'  # 전화번호는 01X-XXXX-XXXX
-            ]
-            
-            # 전화번호 패턴 확인
-            if "전화번호" in win_condition.lower():
-                for pattern in phone_patterns:
-                    if re.search(pattern, ai_response):
-                        logger.info(f"전화번호 패턴 감지: 승리 조건 달성")
-                        victory = True
-                        completed = True
-                        break
+            # 승리/패배 조건 확인 (data/victory_rules.json 규칙)
+            verdict = get_victory_engine().evaluate(ai_response, game_session)
+            victory = verdict.victory
+            completed = verdict.victory or verdict.defeat
+            if victory:
+                logger.info("승리 조건 달성: 규칙=%s", verdict.rule)
+            elif verdict.defeat:
+                logger.info("패배 조건 충족: 규칙=%s", verdict.rule)
             
             # 턴 증가
             current_turn += 1
             
             # 턴 제한 도달 시 게임 종료 (마지막 턴에서도 승리 조건 확인)
             if current_turn > max_turns and not victory:
-                logger.info(f"최대 턴 도달: {current_turn}/{max_turns}")
+                logger.info("최대 턴 도달: %s/%s", current_turn, max_turns)
                 completed = True
             
             # 세션 업데이트
@@ -347,10 +341,10 @@ def handler(request):
             data=response_data
         )
         
-        logger.info(f"최종 응답: {response}")
+        logger.debug("최종 응답: %s", response, extra={"category": RESPONSE})
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -369,7 +363,7 @@ def handler(request):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -0,0 +1,458 @@
+"""
+LLM 회로 차단기
+
+모델별로 최근 window_seconds 동안의 요청 결과를 초 단위 버킷에 모아, 오류율이나
+느린 요청(slow_seconds 이상) 비율이 기준을 넘으면 회로를 엽니다(open). 열린 동안에는
+LLM을 호출하지 않고 바로 CircuitOpen 예외를 발생시키므로, 호출자는 요청마다 시간 제한을
+기다리지 않고 곧바로 기본 응답으로 대체할 수 있습니다. open_seconds가 지나면 반열림(half-open)
+상태가 되어 시험 요청 몇 개만 보내고, 모두 성공하면 회로를 닫고 하나라도 실패하면 다시 엽니다.
+
+call()/acall()은 요청별 마감 시간(deadline) 안에 응답이 오지 않으면 DeadlineExceeded를
+발생시키며, 응답이 최근 지연 시간의 p95보다 늦어지면 같은 요청을 한 번 더 보내(헤지 요청)
+먼저 도착한 응답을 사용합니다. 헤지 요청 수는 최근 요청 수의 hedge_ratio 이하로 제한하며,
+게이트웨이에 남은 요청 슬롯이 없으면 보내지 않습니다. 헤지 요청을 보내지 않는 동기 호출은
+스레드 풀을 거치지 않고 호출한 스레드에서 바로 실행합니다.
+
+회로 상태에는 제공자 쪽 장애(연결 오류, 시간 초과, 429/5xx 응답)만 오류로 반영하며,
+게이트웨이 대기열 시간 초과나 코드 오류처럼 이 프로세스 안에서 생긴 오류는 반영하지 않습니다.
+마감 시간을 넘긴 호출은 느린 요청으로 기록합니다.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from api.llm_gateway import LLMQueueTimeout, get_gateway
+except ImportError:
+    from llm_gateway import LLMQueueTimeout, get_gateway
+
+logger = logging.getLogger("api.circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# p95를 계산하기 위한 최소 지연 시간 표본 수 (이보다 적으면 헤지 요청을 보내지 않음)
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitOpen(Exception):
+    """회로가 열려 LLM을 호출하지 않은 경우 발생하는 예외"""
+
+
+class DeadlineExceeded(Exception):
+    """요청별 마감 시간 안에 LLM 응답을 받지 못한 경우 발생하는 예외"""
+
+
+def is_upstream_error(error):
+    """LLM 제공자 쪽 장애로 볼 수 있는 예외인지 판단합니다."""
+    if isinstance(error, (LLMQueueTimeout, DeadlineExceeded)):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    # APITimeoutError도 APIConnectionError의 하위 클래스
+    return isinstance(error, openai.APIConnectionError)
+
+
+class RollingWindow:
+    """최근 seconds초 동안의 요청/오류/느린 요청/헤지 요청 수를 초 단위 버킷으로 집계합니다."""
+
+    __slots__ = ("seconds", "_buckets")
+
+    def __init__(self, seconds):
+        self.seconds = max(1, int(seconds))
+        # 버킷: [초, 요청 수, 오류 수, 느린 요청 수, 헤지 요청 수]
+        self._buckets = [[-1, 0, 0, 0, 0] for _ in range(self.seconds)]
+
+    def _bucket(self, now):
+        second = int(now)
+        bucket = self._buckets[second % self.seconds]
+        if bucket[0] != second:
+            bucket[:] = [second, 0, 0, 0, 0]
+        return bucket
+
+    def add(self, now, error=False, slow=False):
+        bucket = self._bucket(now)
+        bucket[1] += 1
+        bucket[2] += error
+        bucket[3] += slow
+
+    def add_hedge(self, now):
+        self._bucket(now)[4] += 1
+
+    def totals(self, now):
+        """(요청 수, 오류 수, 느린 요청 수, 헤지 요청 수)"""
+        oldest = int(now) - self.seconds
+        totals = [0, 0, 0, 0]
+        for bucket in self._buckets:
+            if bucket[0] > oldest:
+                for index in range(4):
+                    totals[index] += bucket[index + 1]
+        return tuple(totals)
+
+    def clear(self):
+        for bucket in self._buckets:
+            bucket[:] = [-1, 0, 0, 0, 0]
+
+
+class CircuitBreaker:
+    """오류율/지연 시간 기반 회로 차단기와 헤지 요청"""
+
+    def __init__(self, name, window_seconds=30, min_requests=10, error_rate=0.5, slow_seconds=10.0,
+                 slow_rate=0.8, open_seconds=15.0, half_open_probes=2, hedge_ratio=0.1,
+                 hedge_min_delay=0.5, latency_samples=256, executor=None, hedge_capacity=None,
+                 is_failure=is_upstream_error):
+        self.name = name
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        # 0이면 헤지 요청을 보내지 않음
+        self.hedge_ratio = hedge_ratio
+        self.hedge_min_delay = hedge_min_delay
+        self.executor = executor
+        # 헤지 요청을 보낼 여유(게이트웨이 슬롯)가 있는지 확인하는 함수 (없으면 항상 보냄)
+        self.hedge_capacity = hedge_capacity
+        # 회로 상태에 오류로 반영할 예외인지 판단하는 함수
+        self.is_failure = is_failure
+
+        self._lock = threading.Lock()
+        self._window = RollingWindow(window_seconds)
+        self._latencies = deque(maxlen=latency_samples)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._stats = {"calls": 0, "failures": 0, "short_circuited": 0, "opened": 0,
+                       "hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+
+    # 상태 관리
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+            self._probe_successes = 0
+            logger.info(f"회로 반열림: {self.name}")
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _trip(self, now, reason):
+        self._state = OPEN
+        self._opened_at = now
+        self._stats["opened"] += 1
+        logger.warning(f"회로 열림: {self.name} ({reason})")
+
+    def allow(self):
+        """LLM을 호출해도 되는지 확인합니다. True를 받은 호출자는 결과를 record()나 cancel()로 알려야 합니다."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._stats["short_circuited"] += 1
+            return False
+
+    def record(self, latency, error=False, timed_out=False):
+        """호출 결과(지연 시간(초), 오류 여부)를 기록하고 회로 상태를 갱신합니다.
+
+        마감 시간을 넘긴 호출(timed_out)은 느린 요청으로 기록하며, 실제 응답 시간을 알 수 없으므로
+        헤지 요청 기준(p95) 표본에는 넣지 않습니다.
+        """
+        now = time.monotonic()
+        slow = timed_out or latency >= self.slow_seconds
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["failures"] += error
+            self._window.add(now, error, slow)
+            if not error and not timed_out:
+                self._latencies.append((now, latency))
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if error or slow:
+                    self._trip(now, "시험 요청 실패")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._state = CLOSED
+                        self._window.clear()
+                        logger.info(f"회로 닫힘: {self.name}")
+            elif state == CLOSED:
+                requests, errors, slow_requests, _ = self._window.totals(now)
+                if requests >= self.min_requests:
+                    if errors / requests >= self.error_rate:
+                        self._trip(now, f"오류율 {errors}/{requests}")
+                    elif slow_requests / requests >= self.slow_rate:
+                        self._trip(now, f"느린 요청 {slow_requests}/{requests}")
+
+    def cancel(self):
+        """allow() 뒤 결과 없이 끝난 호출(클라이언트 연결 끊김 등)의 시험 요청 자리를 반환합니다."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def record_failure(self, latency, error):
+        """예외로 끝난 호출을 기록합니다.
+
+        마감 시간 초과는 느린 요청으로, 제공자 쪽 장애는 오류로 기록하고,
+        그 밖의 오류는 회로 상태에 반영하지 않고 시험 요청 자리만 반환합니다.
+        """
+        if isinstance(error, DeadlineExceeded):
+            self.record(latency, timed_out=True)
+        elif self.is_failure(error):
+            self.record(latency, error=True)
+        else:
+            self.cancel()
+
+    # 헤지 요청
+    def latency_p95(self, now=None):
+        """최근 성공한 요청 지연 시간의 p95 (표본이 부족하면 None)"""
+        now = time.monotonic() if now is None else now
+        oldest = now - self._window.seconds
+        with self._lock:
+            samples = sorted(latency for at, latency in self._latencies if at > oldest)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def hedge_delay(self):
+        """헤지 요청을 보내기 전에 기다릴 시간 (보내지 않으면 None)"""
+        if self.hedge_ratio <= 0:
+            return None
+        now = time.monotonic()
+        p95 = self.latency_p95(now)
+        if p95 is None:
+            return None
+        with self._lock:
+            requests, _, _, hedges = self._window.totals(now)
+        if hedges >= max(1, requests) * self.hedge_ratio:
+            return None
+        return max(self.hedge_min_delay, p95)
+
+    def _can_hedge(self):
+        return self.hedge_capacity is None or self.hedge_capacity()
+
+    def _on_hedge(self):
+        with self._lock:
+            self._window.add_hedge(time.monotonic())
+            self._stats["hedged"] += 1
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    # 호출
+    def call(self, fn, deadline):
+        """fn(deadline=deadline)을 회로 차단기와 헤지 요청을 적용해 실행하고 결과를 반환합니다.
+
+        deadline은 time.monotonic() 기준 마감 시각이며, 마감 시각까지 응답이 없으면
+        DeadlineExceeded가 발생합니다 (실행 중인 요청은 각자의 시간 제한으로 끝남).
+        """
+        if not self.allow():
+            raise CircuitOpen(f"LLM 회로가 열려 있습니다: {self.name}")
+        started = time.monotonic()
+        try:
+            delay = self.hedge_delay()
+            if delay is None:
+                result = self._call_direct(fn, deadline)
+            else:
+                result = self._call_hedged(fn, deadline, delay)
+        except Exception as e:
+            self.record_failure(time.monotonic() - started, e)
+            raise
+        except BaseException:
+            self.cancel()
+            raise
+        self.record(time.monotonic() - started)
+        return result
+
+    def _deadline_exceeded(self):
+        self._count("deadline_exceeded")
+        return DeadlineExceeded(f"LLM 응답 마감 시간을 초과했습니다: {self.name}")
+
+    def _call_direct(self, fn, deadline):
+        # 헤지 요청을 보내지 않으면 호출한 스레드에서 바로 실행
+        # (fn은 마감 시간까지만 응답을 기다리므로 마감 시각 이후의 시간 초과는 DeadlineExceeded로 바꿈)
+        try:
+            return fn(deadline=deadline)
+        except LLMQueueTimeout:
+            raise
+        except Exception as e:
+            if time.monotonic() >= deadline and is_upstream_error(e):
+                raise self._deadline_exceeded() from e
+            raise
+
+    def _call_hedged(self, fn, deadline, delay):
+        # 헤지 요청을 보낼 수 있는 호출만 스레드 풀에서 실행하여 먼저 도착한 응답을 사용
+        executor = self.executor or _get_executor()
+        primary = executor.submit(fn, deadline=deadline)
+        pending = {primary}
+        hedge = None
+        error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = remaining if hedge is not None or delay is None else min(delay, remaining)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+            if not done and hedge is None and delay is not None:
+                if not self._can_hedge():
+                    # 게이트웨이 슬롯이 부족하면 헤지 요청 없이 마감 시간까지 기다림
+                    delay = None
+                    continue
+                # p95보다 늦어지면 같은 요청을 한 번 더 보내고 먼저 도착한 응답을 사용
+                self._on_hedge()
+                hedge = executor.submit(fn, deadline=deadline)
+                pending.add(hedge)
+        if error is not None and not pending:
+            raise error
+        raise self._deadline_exceeded()
+
+    async def acall(self, coro_fn, deadline):
+        """call의 비동기 버전 (먼저 도착한 응답 외의 요청은 취소)"""
+        if not self.allow():
+            raise CircuitOpen(f"LLM 회로가 열려 있습니다: {self.name}")
+        started = time.monotonic()
+        try:
+            result = await self._acall_hedged(coro_fn, deadline)
+        except Exception as e:
+            self.record_failure(time.monotonic() - started, e)
+            raise
+        except BaseException:
+            # 요청 취소(클라이언트 연결 끊김 등)
+            self.cancel()
+            raise
+        self.record(time.monotonic() - started)
+        return result
+
+    async def _acall_hedged(self, coro_fn, deadline):
+        # asyncio는 비동기 경로에서만 필요하므로 콜드 스타트 시 import하지 않음
+        import asyncio
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(coro_fn(deadline=deadline))
+        pending = {primary}
+        hedge = None
+        error = None
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = remaining if hedge is not None or delay is None else min(delay, remaining)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+                if not done and hedge is None and delay is not None:
+                    if not self._can_hedge():
+                        delay = None
+                        continue
+                    self._on_hedge()
+                    hedge = asyncio.ensure_future(coro_fn(deadline=deadline))
+                    pending.add(hedge)
+        finally:
+            for task in pending:
+                task.cancel()
+        if error is not None and not pending:
+            raise error
+        raise self._deadline_exceeded()
+
+    def stats(self):
+        now = time.monotonic()
+        p95 = self.latency_p95(now)
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = self._current_state(now)
+            requests, errors, slow_requests, hedges = self._window.totals(now)
+        stats.update(
+            window_requests=requests,
+            window_errors=errors,
+            window_slow=slow_requests,
+            window_hedges=hedges,
+            latency_p95_ms=round(p95 * 1000, 1) if p95 is not None else None
+        )
+        return stats
+
+
+_EXECUTOR = None
+_BREAKERS = {}
+_LOCK = threading.Lock()
+
+
+def _get_executor():
+    # 헤지 요청을 보낼 수 있는 동기 호출과 헤지 요청을 실행하는 공유 스레드 풀
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("LLM_CALL_WORKERS", 64)),
+                    thread_name_prefix="llm-call"
+                )
+    return _EXECUTOR
+
+
+def get_circuit_breaker(model):
+    """모델별로 프로세스 전체에서 공유하는 회로 차단기를 반환합니다.
+
+    LLM_BREAKER_WINDOW: 오류율/지연 시간을 집계하는 기간(초)
+    LLM_BREAKER_MIN_REQUESTS: 회로를 열기 위한 최소 요청 수
+    LLM_BREAKER_ERROR_RATE: 회로를 여는 오류율
+    LLM_BREAKER_SLOW_SECONDS, LLM_BREAKER_SLOW_RATE: 느린 요청 기준(초)과 회로를 여는 느린 요청 비율
+    LLM_BREAKER_OPEN_SECONDS: 회로를 연 뒤 시험 요청을 보내기까지 기다리는 시간(초)
+    LLM_BREAKER_PROBES: 반열림 상태에서 보내는 시험 요청 수
+    LLM_HEDGE_RATIO: 헤지 요청 비율 상한 (0이면 헤지 요청을 보내지 않음)
+    LLM_HEDGE_MIN_DELAY: 헤지 요청을 보내기 전 최소 대기 시간(초)
+    """
+    breaker = _BREAKERS.get(model)
+    if breaker is None:
+        with _LOCK:
+            breaker = _BREAKERS.get(model)
+            if breaker is None:
+                breaker = _BREAKERS[model] = CircuitBreaker(
+                    model,
+                    window_seconds=int(os.getenv("LLM_BREAKER_WINDOW", 30)),
+                    min_requests=int(os.getenv("LLM_BREAKER_MIN_REQUESTS", 10)),
+                    error_rate=float(os.getenv("LLM_BREAKER_ERROR_RATE", 0.5)),
+                    slow_seconds=float(os.getenv("LLM_BREAKER_SLOW_SECONDS", 10)),
+                    slow_rate=float(os.getenv("LLM_BREAKER_SLOW_RATE", 0.8)),
+                    open_seconds=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", 15)),
+                    half_open_probes=int(os.getenv("LLM_BREAKER_PROBES", 2)),
+                    hedge_ratio=float(os.getenv("LLM_HEDGE_RATIO", 0.1)),
+                    hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", 0.5)),
+                    hedge_capacity=lambda: get_gateway().has_capacity(model)
+                )
+    return breaker
+
+
+def circuit_stats():
+    """모델별 회로 차단기 상태와 카운터"""
+    with _LOCK:
+        breakers = list(_BREAKERS.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
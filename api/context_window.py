@@ -0,0 +1,159 @@
+"""
+대화 컨텍스트 구성
+
+메시지 개수 대신 토큰 수를 기준으로 시스템 프롬프트와 대화 내역을
+모델별 토큰 예산 안에 맞춥니다. tiktoken이 설치되어 있으면 실제 토크나이저를
+사용하고, 없으면 문자 종류별로 보정한 추정치를 사용합니다.
+메시지별 토큰 수는 캐시하므로 매 턴 전체 대화를 다시 토큰화하지 않습니다.
+"""
+import os
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger("api.context_window")
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+# 모델별 최대 컨텍스트 길이 (토큰)
+MODEL_CONTEXT_LIMITS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000
+}
+DEFAULT_CONTEXT_LIMIT = 4096
+
+# 채팅 형식에서 메시지마다 추가되는 토큰 수
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+# 요약 메시지에 사용할 최대 예산 비율과 메시지별 발췌 길이
+SUMMARY_BUDGET_RATIO = 0.15
+SUMMARY_EXCERPT_CHARS = 60
+
+
+@lru_cache(maxsize=16)
+def _encoding_for(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text):
+    """tiktoken 없이 토큰 수를 추정합니다.
+
+    cl100k 기준으로 영문/숫자/기호는 약 4자당 1토큰, 한글 음절과 그 밖의
+    비ASCII 문자는 1자당 약 1토큰으로 계산합니다.
+    """
+    ascii_chars = 0
+    other_chars = 0
+    for char in text:
+        if ord(char) < 128:
+            ascii_chars += 1
+        else:
+            other_chars += 1
+    return (ascii_chars + 3) // 4 + other_chars
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """텍스트의 토큰 수를 반환합니다 (결과는 캐시됨)."""
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        return len(_encoding_for(model).encode(text))
+    return estimate_tokens(text)
+
+
+def message_tokens(message, model="gpt-3.5-turbo"):
+    """메시지 하나가 차지하는 토큰 수를 반환합니다."""
+    return count_tokens(message.get("content") or "", model) + MESSAGE_OVERHEAD_TOKENS
+
+
+def get_context_budget(model, max_tokens):
+    """모델의 입력 토큰 예산을 반환합니다.
+
+    LLM_CONTEXT_BUDGET 설정값과 (모델 최대 컨텍스트 - 응답 토큰) 중 작은 값을 사용합니다.
+    """
+    limit = MODEL_CONTEXT_LIMITS.get(model, DEFAULT_CONTEXT_LIMIT) - (max_tokens or 0)
+    budget = int(os.getenv("LLM_CONTEXT_BUDGET", 1500))
+    return max(0, min(budget, limit))
+
+
+def summarize_messages(messages, budget, model="gpt-3.5-turbo"):
+    """예산에서 제외된 이전 대화를 짧은 발췌 요약 메시지로 만듭니다."""
+    lines = []
+    used = count_tokens("이전 대화 요약:", model) + MESSAGE_OVERHEAD_TOKENS
+    # 최근 대화일수록 중요하므로 뒤에서부터 채움
+    for message in reversed(messages):
+        speaker = "사용자" if message.get("role") == "user" else "캐릭터"
+        content = " ".join((message.get("content") or "").split())
+        if len(content) > SUMMARY_EXCERPT_CHARS:
+            content = content[:SUMMARY_EXCERPT_CHARS] + "…"
+        line = f"- {speaker}: {content}"
+        line_tokens = count_tokens(line, model) + 1
+        if used + line_tokens > budget:
+            break
+        lines.append(line)
+        used += line_tokens
+    if not lines:
+        return None
+    lines.reverse()
+    return {"role": "system", "content": "이전 대화 요약:\n" + "\n".join(lines)}
+
+
+def build_context(system_prompt, history, user_message, model="gpt-3.5-turbo",
+                  max_tokens=150, summarize=None, state_message=None):
+    """토큰 예산 안에서 시스템 프롬프트, 최근 대화, 사용자 메시지로 요청 메시지를 구성합니다.
+
+    예산을 넘는 오래된 대화는 제외되며, summarize가 참이면 제외된 대화를
+    요약 메시지로 대신 포함합니다. (None이면 LLM_CONTEXT_SUMMARY 설정을 따름)
+    state_message(현재 턴 등 매번 바뀌는 정보)는 사용자 메시지 바로 앞에 시스템 메시지로 넣어
+    그 앞부분이 이전 요청과 같게 유지되도록 합니다.
+    """
+    if summarize is None:
+        summarize = os.getenv("LLM_CONTEXT_SUMMARY", "false").lower() in ("1", "true", "yes")
+
+    system_message = {"role": "system", "content": system_prompt}
+    user_entry = {"role": "user", "content": user_message}
+    state_entry = {"role": "system", "content": state_message} if state_message else None
+    budget = get_context_budget(model, max_tokens)
+    used = (message_tokens(system_message, model) + message_tokens(user_entry, model)
+            + REPLY_PRIMING_TOKENS)
+    if state_entry is not None:
+        used += message_tokens(state_entry, model)
+
+    summary_budget = int(budget * SUMMARY_BUDGET_RATIO) if summarize else 0
+    history_budget = budget - summary_budget
+
+    # 최근 메시지부터 예산이 허용하는 만큼 포함
+    start = len(history)
+    for index in range(len(history) - 1, -1, -1):
+        tokens = message_tokens(history[index], model)
+        if used + tokens > history_budget:
+            break
+        used += tokens
+        start = index
+
+    messages = [system_message]
+    if start > 0:
+        if summarize:
+            summary = summarize_messages(history[:start], budget - used, model)
+            if summary:
+                messages.append(summary)
+        logger.debug(f"컨텍스트 예산 초과로 이전 메시지 {start}개 제외")
+    messages.extend(
+        {"role": message.get("role"), "content": message.get("content")}
+        for message in history[start:]
+    )
+    if state_entry is not None:
+        messages.append(state_entry)
+    messages.append(user_entry)
+    return messages
@@ -1,6 +1,7 @@
 import json
 from http.server import BaseHTTPRequestHandler
 from .utils import create_response
+from .serialization import dumps
 
 def handler(request):
     # CORS 프리플라이트 요청 처리
@@ -23,7 +24,7 @@ def handler(request):
         )
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -82,7 +83,7 @@ def handler(request):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -100,7 +101,7 @@ def handler(request):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -0,0 +1,178 @@
+"""
+게임 카탈로그
+
+게임 아이템을 ID, 카테고리, 난이도로 색인하고, /api/games 응답 본문을
+ETag와 함께 미리 인코딩해 둡니다. 게임 시작 응답에 들어가는 아이템별 정적 필드와
+환영 메시지도 처음 사용할 때 한 번만 인코딩해 둡니다. 아이템이 바뀌면 새 스냅샷을 만들어
+참조를 한 번에 교체하므로, 요청 처리 중에는 항상 일관된 스냅샷을 봅니다.
+"""
+import os
+import time
+import random
+import hashlib
+import logging
+import threading
+import weakref
+
+try:
+    from api.serialization import Fragment, dumps_bytes, encode_members, loads
+    from api.game_session import welcome_message
+except ImportError:
+    from serialization import Fragment, dumps_bytes, encode_members, loads
+    from game_session import welcome_message
+
+logger = logging.getLogger("api.game_catalog")
+
+# 클라이언트에 공개하는 게임 목록 필드
+CLIENT_FIELDS = ("id", "title", "category", "difficulty", "max_turns")
+
+# 게임 시작 응답에 포함하는 아이템 정적 필드와 기본값
+START_FIELDS = (
+    ("title", None),
+    ("category", None),
+    ("character_name", None),
+    ("character_setting", ""),
+    ("max_turns", None),
+    ("win_condition", None)
+)
+
+# 같은 파일을 사용하는 카탈로그에 변경을 알리기 위한 목록
+_CATALOGS = weakref.WeakSet()
+
+
+class CatalogSnapshot:
+    """한 시점의 게임 아이템 색인과 미리 인코딩된 응답 본문"""
+
+    __slots__ = ("items", "by_id", "by_category", "by_difficulty", "games", "payload", "etag", "version",
+                 "_start_members")
+
+    def __init__(self, items, version):
+        self.items = list(items)
+        self.version = version
+        self.by_id = {}
+        self.by_category = {}
+        self.by_difficulty = {}
+        self._start_members = {}
+        for item in self.items:
+            self.by_id[str(item.get("id"))] = item
+            self.by_category.setdefault(item.get("category"), []).append(item)
+            self.by_difficulty.setdefault(item.get("difficulty"), []).append(item)
+
+        # 게임 목록은 한 번만 인코딩 (디버그 응답도 같은 조각을 사용)
+        self.games = Fragment(dumps_bytes([{field: item.get(field) for field in CLIENT_FIELDS} for item in self.items]))
+        self.payload = dumps_bytes({"success": True, "data": self.games})
+        self.etag = hashlib.sha1(self.payload).hexdigest()[:20]
+
+    def start_members(self, item):
+        """게임 시작 응답의 아이템 정적 필드와 환영 메시지를 인코딩한 JSON 객체 멤버를 반환합니다."""
+        key = id(item)
+        members = self._start_members.get(key)
+        if members is None:
+            fields = {field: item.get(field, default) for field, default in START_FIELDS}
+            fields["welcome_message"] = welcome_message(item)
+            members = encode_members(fields)
+            # 스냅샷에 속한 아이템만 캐시 (다른 아이템은 id가 재사용될 수 있음)
+            if self.by_id.get(str(item.get("id"))) is item:
+                self._start_members[key] = members
+        return members
+
+
+class GameCatalog:
+    """ID/카테고리/난이도 색인과 미리 인코딩된 목록 응답을 갖는 게임 카탈로그"""
+
+    def __init__(self, source_path=None, check_interval=2.0):
+        self.source_path = str(source_path) if source_path else None
+        self.check_interval = check_interval
+        self._snapshot = CatalogSnapshot([], 0)
+        self._mtime = None
+        self._last_checked = float('-inf')
+        self._lock = threading.Lock()
+        self._loaded = False
+        _CATALOGS.add(self)
+
+    # 스냅샷 교체
+    def replace(self, items):
+        """아이템 목록으로 새 스냅샷을 만들어 교체합니다."""
+        with self._lock:
+            self._snapshot = CatalogSnapshot(items, self._snapshot.version + 1)
+            self._loaded = True
+            if self.source_path:
+                try:
+                    self._mtime = os.stat(self.source_path).st_mtime_ns
+                except FileNotFoundError:
+                    self._mtime = None
+            self._last_checked = time.monotonic()
+        logger.info(f"게임 카탈로그 갱신: {len(items)}개 (버전 {self._snapshot.version})")
+
+    def load(self):
+        """원본 파일에서 아이템을 읽어 카탈로그를 갱신합니다. 파일이 없으면 False를 반환합니다."""
+        if not self.source_path or not os.path.exists(self.source_path):
+            return False
+        with open(self.source_path, 'rb') as f:
+            items = loads(f.read())
+        self.replace(items)
+        return True
+
+    def reload_if_changed(self):
+        """다른 프로세스가 원본 파일을 수정한 경우 다시 읽습니다 (check_interval마다 확인)."""
+        if not self.source_path:
+            return
+        now = time.monotonic()
+        if now - self._last_checked < self.check_interval:
+            return
+        self._last_checked = now
+        try:
+            mtime = os.stat(self.source_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"게임 카탈로그 다시 읽기 실패: {e}")
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @property
+    def snapshot(self):
+        """현재 스냅샷 (요청 하나를 처리하는 동안에는 같은 스냅샷을 사용하세요)"""
+        return self._snapshot
+
+    @property
+    def items(self):
+        return self._snapshot.items
+
+    def __len__(self):
+        return len(self._snapshot.items)
+
+    # 조회
+    def get(self, item_id):
+        """ID로 아이템을 찾습니다. 숫자 ID와 문자열 ID를 모두 허용합니다."""
+        return self._snapshot.by_id.get(str(item_id))
+
+    def by_category(self, category):
+        return self._snapshot.by_category.get(category, [])
+
+    def by_difficulty(self, difficulty):
+        return self._snapshot.by_difficulty.get(difficulty, [])
+
+    def random_item(self, category=None, difficulty=None):
+        """무작위 아이템을 반환합니다. 카테고리나 난이도로 범위를 좁힐 수 있습니다."""
+        snapshot = self._snapshot
+        if category is not None:
+            candidates = snapshot.by_category.get(category, [])
+        elif difficulty is not None:
+            candidates = snapshot.by_difficulty.get(difficulty, [])
+        else:
+            candidates = snapshot.items
+        return random.choice(candidates) if candidates else None
+
+
+def publish_items(source_path, items):
+    """같은 원본 파일을 사용하는 모든 카탈로그를 새 아이템 목록으로 교체합니다."""
+    target = os.path.realpath(str(source_path))
+    for catalog in list(_CATALOGS):
+        if catalog.source_path and os.path.realpath(catalog.source_path) == target:
+            catalog.replace(items)
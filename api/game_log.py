@@ -0,0 +1,279 @@
+"""
+추가 전용(append-only) 게임 로그
+
+게임 로그를 JSON Lines 세그먼트 파일(segment-<번호>-<pid>.jsonl)에 한 줄씩 추가합니다.
+기록은 백그라운드 스레드가 묶어서 쓰고, 설정한 간격마다 fsync합니다.
+세그먼트가 최대 크기를 넘으면 새 세그먼트로 교체하며, compact로
+게임 ID별 마지막 기록만 남긴 세그먼트 하나로 합칠 수 있습니다.
+
+압축 실행 (서버를 중지한 상태에서 실행하세요):
+    python -m api.game_log compact [로그 디렉토리]
+"""
+import os
+import re
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+
+try:
+    from api.serialization import dumps
+except ImportError:
+    from serialization import dumps
+
+logger = logging.getLogger("api.game_log")
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d+)-(\d+)\.jsonl$")
+
+
+def list_segments(directory):
+    """세그먼트 파일 경로를 기록 순서대로 반환합니다."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segments = []
+    for name in names:
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            segments.append((int(match.group(1)), int(match.group(2)), name))
+    segments.sort()
+    return [os.path.join(directory, name) for _, _, name in segments]
+
+
+def iter_records(directory):
+    """모든 세그먼트의 기록을 순서대로 스트리밍합니다.
+
+    비정상 종료로 마지막 줄이 잘린 경우 해당 줄은 건너뜁니다.
+    """
+    for path in list_segments(directory):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"손상된 게임 로그 기록 건너뜀: {path}:{line_number}")
+
+
+def _segment_key(path):
+    """세그먼트 경로에서 (번호, pid)를 반환합니다."""
+    match = SEGMENT_PATTERN.match(os.path.basename(path))
+    return int(match.group(1)), int(match.group(2))
+
+
+def _next_sequence(directory):
+    segments = list_segments(directory)
+    if not segments:
+        return 1
+    return _segment_key(segments[-1])[0] + 1
+
+
+def compact(directory, before_sequence=None, pid=None):
+    """게임 ID별 마지막 기록만 남기고 세그먼트를 하나로 합칩니다.
+
+    before_sequence가 주어지면 그보다 번호가 작은 세그먼트만, pid가 주어지면
+    해당 프로세스가 쓴 세그먼트만 합칩니다. pid 없이 실행하면 다른 프로세스가
+    쓰고 있는 세그먼트까지 지우므로 서버를 중지한 상태에서만 실행해야 합니다.
+    """
+    segments = list_segments(directory)
+    if before_sequence is not None:
+        segments = [path for path in segments if _segment_key(path)[0] < before_sequence]
+    if pid is not None:
+        segments = [path for path in segments if _segment_key(path)[1] == pid]
+    if not segments:
+        return 0
+
+    latest = {}
+    for path in segments:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                latest.pop(record.get('game_id'), None)
+                latest[record.get('game_id')] = line
+
+    # 합쳐진 세그먼트는 합친 세그먼트 중 가장 앞 번호를 사용하여 순서를 유지.
+    # 프로세스별로 압축하면 같은 번호를 쓰는 다른 프로세스의 세그먼트와 겹치지 않도록 pid를 유지
+    first_sequence = _segment_key(segments[0])[0]
+    target = os.path.join(directory, f"segment-{first_sequence:06d}-{pid or 0}.jsonl")
+    tmp_path = target + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for line in latest.values():
+            f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    # 압축 파일을 먼저 반영한 뒤 이전 세그먼트를 삭제.
+    # 그 사이에 중단되어도 기록은 중복될 뿐 사라지지 않으며, 다시 압축하면 정리됩니다.
+    os.replace(tmp_path, target)
+    for path in segments:
+        if path != target:
+            os.remove(path)
+    logger.info(f"게임 로그 압축 완료: 세그먼트 {len(segments)}개 -> 기록 {len(latest)}개")
+    return len(latest)
+
+
+class GameLogWriter:
+    """게임 로그 기록을 묶어서 추가하고 주기적으로 fsync하는 백그라운드 기록기"""
+
+    def __init__(self, directory, fsync_interval=1.0, batch_size=256,
+                 segment_max_bytes=8 * 1024 * 1024):
+        self.directory = str(directory)
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.segment_max_bytes = segment_max_bytes
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._sequence = None
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self._closed = False
+
+    def append(self, record):
+        """기록을 대기열에 추가합니다. 실제 쓰기는 백그라운드 스레드가 수행합니다."""
+        if self._closed:
+            raise RuntimeError("게임 로그 기록기가 이미 종료되었습니다.")
+        self._ensure_started()
+        self._queue.put(dumps(record))
+
+    def flush(self):
+        """대기 중인 기록을 모두 쓰고 fsync할 때까지 기다립니다."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """남은 기록을 쓰고 기록기를 종료합니다."""
+        if self._thread is None or self._closed:
+            self._closed = True
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def compact(self):
+        """현재 세그먼트를 교체한 뒤 이 프로세스가 쓴 이전 세그먼트들을 압축합니다.
+
+        같은 디렉토리에 기록하는 다른 프로세스의 세그먼트는 건드리지 않습니다.
+        """
+        self.flush()
+        with self._lock:
+            self._rotate()
+            sequence = self._sequence
+        return compact(self.directory, before_sequence=sequence, pid=os.getpid())
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._thread = threading.Thread(
+                    target=self._run, name="game-log-writer", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    # 세그먼트 관리
+    def _open_segment(self):
+        if self._sequence is None:
+            self._sequence = _next_sequence(self.directory)
+        path = os.path.join(self.directory, f"segment-{self._sequence:06d}-{os.getpid()}.jsonl")
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _rotate(self):
+        if self._file is not None:
+            self._fsync()
+            self._file.close()
+            self._file = None
+        self._sequence = max(_next_sequence(self.directory), (self._sequence or 0) + 1)
+
+    def _fsync(self):
+        if self._file is not None and self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def _write_batch(self, lines):
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write("\n".join(lines) + "\n")
+            self._dirty = True
+            if self._file.tell() >= self.segment_max_bytes:
+                self._rotate()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            # fsync하지 않은 기록이 있으면 다음 fsync 시각까지만 대기
+            timeout = None
+            if self._dirty:
+                timeout = max(0.0, self.fsync_interval - (time.monotonic() - self._last_fsync))
+
+            lines = []
+            waiters = []
+            try:
+                item = self._queue.get(timeout=timeout)
+                while True:
+                    if item is None:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        lines.append(item)
+                    if len(lines) >= self.batch_size:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+
+            try:
+                if lines:
+                    self._write_batch(lines)
+                if waiters or stop or time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    with self._lock:
+                        self._fsync()
+            except Exception as e:
+                logger.error(f"게임 로그 기록 중 오류 발생: {e}")
+            finally:
+                for waiter in waiters:
+                    waiter.set()
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "compact":
+        print("사용법: python -m api.game_log compact [로그 디렉토리]")
+        return 1
+    directory = argv[2] if len(argv) > 2 else os.path.join("data", "game_logs")
+    count = compact(directory)
+    print(f"압축 완료: {count}개 게임 기록")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv))
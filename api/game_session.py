@@ -0,0 +1,229 @@
+"""
+게임 세션
+
+게임 세션은 카탈로그 아이템의 제목, 캐릭터 설정, 승리/패배 조건 같은 정적 필드를
+복사하지 않고 아이템 딕셔너리를 그대로 참조하며, 턴·완료 여부 같은 상태만
+__slots__ 속성으로 보관합니다. 대화 내역은 최근 메시지만 유지하는 링 버퍼(MessageRing)에
+역할과 내용을 번갈아 담은 리스트 하나로 저장합니다 (메시지마다 딕셔너리나 튜플을 만들지 않음).
+
+to_dict()는 기존 세션 딕셔너리와 같은 JSON 형식을 반환하고, get()/[]로
+기존 딕셔너리처럼 필드를 읽을 수 있습니다.
+"""
+import os
+import sys
+import time
+import calendar
+
+# 카탈로그 아이템에서 읽는 정적 필드와 기본값
+ITEM_FIELDS = {
+    "id": None,
+    "title": None,
+    "category": None,
+    "character_name": None,
+    "character_setting": "",
+    "max_turns": None,
+    "win_condition": None,
+    "lose_condition": "",
+    "difficulty": None
+}
+
+# 세션마다 바뀌는 상태 필드
+STATE_FIELDS = ("current_turn", "completed", "victory", "version")
+
+# 대화 메시지 역할 (같은 문자열 객체를 공유)
+ROLES = {role: sys.intern(role) for role in ("system", "user", "assistant")}
+
+DEFAULT_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", 50))
+
+
+def welcome_message(item):
+    """게임 아이템의 환영 메시지를 생성합니다."""
+    return (
+        f"안녕하세요! '{item.get('title')}' 상황에 오신 것을 환영합니다. 이 상황에서 여러분은 "
+        f"{item.get('max_turns')}턴 안에 '{item.get('win_condition')}'을(를) 달성해야 합니다. "
+        f"대화를 통해 목표를 이루어보세요!"
+    )
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class MessageRing:
+    """최근 maxlen개의 (역할, 내용) 메시지만 유지하는 링 버퍼
+
+    [역할, 내용, 역할, 내용, ...] 형태의 리스트 하나에 저장하며, 가득 차면
+    가장 오래된 메시지 자리에 덮어씁니다.
+    """
+
+    __slots__ = ("_items", "_start", "maxlen")
+
+    def __init__(self, maxlen=DEFAULT_MAX_MESSAGES):
+        self._items = []
+        self._start = 0
+        self.maxlen = maxlen
+
+    def append(self, role, content):
+        items = self._items
+        if not self.maxlen or len(items) < self.maxlen * 2:
+            items.append(role)
+            items.append(content)
+            return
+        start = self._start
+        items[start] = role
+        items[start + 1] = content
+        self._start = (start + 2) % len(items)
+
+    def clear(self):
+        self._items = []
+        self._start = 0
+
+    def copy(self):
+        ring = MessageRing(self.maxlen)
+        ring._items = list(self._items)
+        ring._start = self._start
+        return ring
+
+    def __len__(self):
+        return len(self._items) // 2
+
+    def __iter__(self):
+        items = self._items
+        ordered = items[self._start:] + items[:self._start] if self._start else items
+        for index in range(0, len(ordered), 2):
+            yield ordered[index], ordered[index + 1]
+
+
+class GameSession:
+    """카탈로그 아이템을 참조하는 게임 세션"""
+
+    __slots__ = ("game_id", "item", "ai_config", "current_turn", "completed", "victory",
+                 "version", "created_at", "conversation")
+
+    def __init__(self, game_id, item, ai_config=None, max_messages=DEFAULT_MAX_MESSAGES):
+        self.game_id = game_id
+        self.item = item
+        self.ai_config = ai_config
+        self.current_turn = 1
+        self.completed = False
+        self.victory = False
+        self.version = 0
+        self.created_at = time.time()
+        self.conversation = MessageRing(max_messages)
+
+    # 대화 내역
+    def add_message(self, role, content):
+        self.conversation.append(ROLES.get(role) or _intern(role), content)
+
+    @property
+    def messages(self):
+        """대화 내역을 [{"role", "content"}] 목록으로 반환합니다."""
+        return [{"role": role, "content": content} for role, content in self.conversation]
+
+    def copy(self):
+        """아이템 참조는 공유하고 상태와 대화 내역은 따로 갖는 복사본을 반환합니다."""
+        session = GameSession.__new__(GameSession)
+        for name in self.__slots__:
+            setattr(session, name, getattr(self, name))
+        session.conversation = self.conversation.copy()
+        return session
+
+    @property
+    def welcome_message(self):
+        return welcome_message(self.item)
+
+    @property
+    def creation_time(self):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(self.created_at))
+
+    # 딕셔너리 호환 인터페이스
+    def get(self, key, default=None):
+        if key in STATE_FIELDS or key == "game_id":
+            return getattr(self, key)
+        if key in ITEM_FIELDS:
+            value = self.item.get(key, ITEM_FIELDS[key])
+            return default if value is None else value
+        if key == "messages":
+            return self.messages
+        if key == "ai_config":
+            return self.ai_config if self.ai_config is not None else default
+        if key == "welcome_message":
+            return self.welcome_message
+        if key == "creation_time":
+            return self.creation_time
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in STATE_FIELDS or key == "ai_config":
+            setattr(self, key, value)
+        elif key == "messages":
+            self.conversation.clear()
+            for message in value:
+                self.add_message(message.get("role"), message.get("content"))
+        else:
+            raise KeyError(f"변경할 수 없는 세션 필드입니다: {key}")
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def keys(self):
+        # dict(session)이나 format_map(session)에서 사용
+        return self.to_dict().keys()
+
+    # 직렬화
+    def to_dict(self):
+        """기존 세션 딕셔너리와 같은 형식으로 변환합니다."""
+        data = {"game_id": self.game_id}
+        for field, default in ITEM_FIELDS.items():
+            data[field] = self.item.get(field, default)
+        data.update(
+            current_turn=self.current_turn,
+            completed=self.completed,
+            victory=self.victory,
+            creation_time=self.creation_time,
+            welcome_message=self.welcome_message,
+            version=self.version
+        )
+        if self.ai_config is not None:
+            data["ai_config"] = self.ai_config
+        if self.conversation:
+            data["messages"] = self.messages
+        return data
+
+    @classmethod
+    def from_dict(cls, data, catalog_item=None, max_messages=DEFAULT_MAX_MESSAGES):
+        """세션 딕셔너리에서 세션을 만듭니다.
+
+        저장된 정적 필드가 카탈로그 아이템과 같으면 카탈로그 아이템을 참조하고,
+        다르면 (카탈로그가 바뀐 경우) 저장된 값으로 아이템을 만듭니다.
+        """
+        stored_item = {field: _intern(data.get(field, default)) for field, default in ITEM_FIELDS.items()}
+        if catalog_item is not None and all(
+            catalog_item.get(field, default) == stored_item[field] for field, default in ITEM_FIELDS.items()
+        ):
+            item = catalog_item
+        else:
+            item = stored_item
+        session = cls(data.get("game_id"), item, data.get("ai_config"), max_messages)
+        session.current_turn = data.get("current_turn", 1)
+        session.completed = data.get("completed", False)
+        session.victory = data.get("victory", False)
+        session.version = data.get("version", 0)
+        creation_time = data.get("creation_time")
+        if creation_time:
+            try:
+                session.created_at = calendar.timegm(time.strptime(creation_time, "%Y-%m-%d %H:%M:%S"))
+            except ValueError:
+                pass
+        for message in data.get("messages", ()):
+            session.add_message(message.get("role"), message.get("content"))
+        return session
+
+    def __repr__(self):
+        return f"GameSession({self.game_id!r}, item={self.item.get('id')!r}, turn={self.current_turn})"
@@ -5,30 +5,92 @@ import os
 import json
 import time
 import random
+import asyncio
 import logging
+import contextvars
+import threading
+import importlib.util
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+# 콜드 스타트 시간 측정 (모듈 import부터 초기화 완료까지)
+IMPORT_STARTED = time.perf_counter()
+
 from pathlib import Path
-from flask import Flask, jsonify, request
+from flask import Flask, Response, copy_current_request_context, has_request_context, jsonify, request, stream_with_context
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("api.index")
+try:
+    from api.session_store import TurnConflict, create_session_store
+    from api.llm_gateway import get_gateway, resolve_api_key
+    from api.circuit_breaker import CircuitOpen, circuit_stats, get_circuit_breaker
+    from api.response_cache import get_completion_cache
+    from api.single_flight import get_single_flight
+    from api.prompt_registry import PromptRegistry
+    from api.game_log import GameLogWriter, list_segments
+    from api.game_catalog import GameCatalog
+    from api.game_session import GameSession
+    from api.context_window import build_context, count_tokens, message_tokens
+    from api.metrics import (
+        METRICS, init_app as init_metrics, phase, record_phase, record_tokens,
+        record_cache_lookup, render_metrics
+    )
+    from api.log_pipeline import BODY, RESPONSE, configure_logging, logging_stats
+    from api.startup_snapshot import DEFAULT_SNAPSHOT_PATH, load_snapshot
+    from api.victory import get_victory_engine
+    from api.serialization import dumps, object_fragment, write_file, init_app as init_serialization
+except ImportError:
+    from session_store import TurnConflict, create_session_store
+    from llm_gateway import get_gateway, resolve_api_key
+    from circuit_breaker import CircuitOpen, circuit_stats, get_circuit_breaker
+    from response_cache import get_completion_cache
+    from single_flight import get_single_flight
+    from prompt_registry import PromptRegistry
+    from game_log import GameLogWriter, list_segments
+    from game_catalog import GameCatalog
+    from game_session import GameSession
+    from context_window import build_context, count_tokens, message_tokens
+    from metrics import (
+        METRICS, init_app as init_metrics, phase, record_phase, record_tokens,
+        record_cache_lookup, render_metrics
+    )
+    from log_pipeline import BODY, RESPONSE, configure_logging, logging_stats
+    from startup_snapshot import DEFAULT_SNAPSHOT_PATH, load_snapshot
+    from victory import get_victory_engine
+    from serialization import dumps, object_fragment, write_file, init_app as init_serialization
 
-# 환경 변수 설정
+# 환경 변수 설정 (로깅 설정도 .env 값을 따르도록 먼저 로드)
+dotenv_error = None
 try:
     from dotenv import load_dotenv
     load_dotenv()
+except Exception as e:
+    dotenv_error = e
+
+# 로깅 설정 (백그라운드 스레드에서 JSON 형식으로 출력)
+configure_logging()
+logger = logging.getLogger("api.index")
+
+if dotenv_error is None:
     logger.info("환경 변수 로드 완료")
-except ImportError:
+elif isinstance(dotenv_error, ImportError):
     logger.warning(".env 파일 로드에 필요한 python-dotenv 패키지가 설치되지 않았습니다.")
-except Exception as e:
-    logger.warning(f".env 파일 로드 중 오류 발생: {e}")
+else:
+    logger.warning(f".env 파일 로드 중 오류 발생: {dotenv_error}")
 
-# OpenAI API 설정
+# 시작 모드: lazy(기본값)는 OpenAI SDK와 게임 로그를 처음 사용할 때 로드하고
+# 시작 스냅샷이 있으면 프롬프트와 카탈로그를 스냅샷에서 읽음, eager는 시작 시 모두 로드
+STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy").lower()
+STARTUP_SNAPSHOT_PATH = os.getenv("STARTUP_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+STARTUP_INFO = {"mode": STARTUP_MODE, "snapshot": False}
+
+# OpenAI API 설정 (SDK는 첫 LLM 요청 시 게이트웨이에서 import)
 OPENAI_AVAILABLE = False
 try:
-    import openai
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-    if openai.api_key:
+    if STARTUP_MODE == "eager":
+        import openai
+    elif importlib.util.find_spec("openai") is None:
+        raise ImportError("openai")
+    if resolve_api_key():
         logger.info("OpenAI API 키 설정 완료")
         OPENAI_AVAILABLE = True
     else:
@@ -38,6 +100,9 @@ except ImportError:
 except Exception as e:
     logger.error(f"OpenAI API 설정 중 오류 발생: {e}")
 
+# 한 턴의 LLM 응답 마감 시간(초). 헤지 요청과 SDK 재시도를 포함해 이 시간 안에 응답이 없으면 기본 응답 사용
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", 12))
+
 # API 키 검증 함수
 def validate_api_key():
     """OpenAI API 키가 유효한지 확인합니다."""
@@ -45,21 +110,99 @@ def validate_api_key():
         return False, "OpenAI API 키가 설정되지 않았습니다."
     return True, "API 키가 유효합니다."
 
+# 디버그 정보 설정
+# DEBUG_INFO: admin(기본값)은 X-Debug-Info 헤더와 유효한 관리자 토큰(Authorization)을 보낸 요청에만,
+# on은 모든 응답에 debug_info를 포함하고, off는 포함하지 않음
+DEBUG_INFO_MODE = os.getenv("DEBUG_INFO", "admin").lower()
+DEBUG_INFO_HEADER = "X-Debug-Info"
+_DEBUG_ENVIRON_KEY = "game_api.debug_info"
+
+def _verify_admin(auth_header):
+    # 관리자 토큰 검증 모듈(PyJWT)은 디버그 요청이 들어올 때만 로드
+    try:
+        from api.utils import verify_token
+    except ImportError:
+        from utils import verify_token
+    return verify_token(auth_header)[0]
+
+def debug_enabled():
+    """현재 요청의 응답에 debug_info를 포함할지 확인합니다 (요청마다 한 번만 판단)."""
+    if DEBUG_INFO_MODE != "admin":
+        return DEBUG_INFO_MODE == "on"
+    if not has_request_context():
+        return False
+    # 일괄 처리 스레드에 복사된 요청 컨텍스트도 같은 environ을 공유하므로 판단 결과를 environ에 저장
+    environ = request.environ
+    enabled = environ.get(_DEBUG_ENVIRON_KEY)
+    if enabled is None:
+        enabled = False
+        if request.headers.get(DEBUG_INFO_HEADER, "").lower() in ("1", "true", "on"):
+            auth_header = request.headers.get("Authorization")
+            enabled = bool(auth_header) and _verify_admin(auth_header)
+        environ[_DEBUG_ENVIRON_KEY] = enabled
+    return enabled
+
+def with_debug_info(response_data, build):
+    """디버그 모드일 때만 build()로 debug_info를 만들어 응답 데이터에 추가합니다."""
+    if debug_enabled():
+        response_data['debug_info'] = build()
+    return response_data
+
 # Flask 앱 초기화
 app = Flask(__name__)
+init_metrics(app)
+init_serialization(app)
 
 # 데이터 파일 경로
 DATA_DIR = Path("data")
 ITEM_PROMPTS_DIR = Path("item_prompts")
 ITEMS_DATA_FILE = DATA_DIR / "game_items.json"
 PROMPTS_DATA_FILE = DATA_DIR / "game_prompts.json"
-GAME_LOGS_FILE = DATA_DIR / "game_logs.json"
+GAME_LOGS_FILE = DATA_DIR / "game_logs.json"  # 이전 형식 (시작 시 세그먼트로 이전)
+GAME_LOGS_DIR = DATA_DIR / "game_logs"
 
 # 데이터 저장소
-GAMES = []
+CATALOG = GameCatalog(ITEMS_DATA_FILE)
 PROMPTS = {}
-GAME_LOGS = {}
-GAME_SESSIONS = {}
+LEGACY_GAME_LOGS_CHECKED = False
+# sqlite 백엔드에서 읽은 세션은 GameSession으로 복원 (restore_session은 아래에 정의)
+GAME_SESSIONS = create_session_store(session_factory=lambda data: restore_session(data))
+PROMPT_REGISTRY = PromptRegistry(ITEM_PROMPTS_DIR)
+GAME_LOG_WRITER = GameLogWriter(
+    GAME_LOGS_DIR,
+    fsync_interval=float(os.getenv("GAME_LOG_FSYNC_INTERVAL", 1.0)),
+    segment_max_bytes=int(os.getenv("GAME_LOG_SEGMENT_BYTES", 8 * 1024 * 1024))
+)
+
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+# /api/metrics에 함께 내보낼 세션 저장소와 LLM 게이트웨이 상태
+def collect_runtime_gauges():
+    session_stats = GAME_SESSIONS.stats()
+    gateway_stats = get_gateway().stats()
+    flight_stats = get_single_flight().stats()
+    return [
+        ("game_sessions", "저장된 게임 세션 수",
+         [({"backend": session_stats.get("backend")}, session_stats.get("size", 0))]),
+        ("game_session_tier", "메모리 저장소의 계층별 세션 수 (hot, packed, spilled)",
+         [({"tier": tier}, count) for tier, count in session_stats.get("tiers", {}).items()
+          if not tier.endswith("_bytes")]),
+        ("game_session_tier_bytes", "압축/내보낸 세션이 차지하는 바이트 수",
+         [({"tier": tier[:-len("_bytes")]}, size) for tier, size in session_stats.get("tiers", {}).items()
+          if tier.endswith("_bytes")]),
+        ("llm_requests_in_flight", "모델별 진행 중인 LLM 요청 수",
+         [({"model": model}, stats["in_flight"]) for model, stats in gateway_stats.items()]),
+        ("llm_requests_queued", "모델별 슬롯을 기다리는 LLM 요청 수",
+         [({"model": model}, stats["queued"]) for model, stats in gateway_stats.items()]),
+        ("llm_circuit_open", "모델별 LLM 회로 상태 (0: 닫힘, 1: 반열림, 2: 열림)",
+         [({"model": model}, CIRCUIT_STATE_VALUES[stats["state"]]) for model, stats in circuit_stats().items()]),
+        ("llm_single_flight_requests", "요청 병합 결과별 LLM 요청 수 (leaders: 직접 호출, shared: 결과 공유, bypassed: 병합 대상 아님)",
+         [({"result": result}, flight_stats[result]) for result in ("leaders", "shared", "bypassed")]),
+        ("llm_coalescing_ratio", "병합 대상 LLM 요청 중 진행 중인 요청의 결과를 공유한 비율",
+         [({}, flight_stats["coalescing_ratio"])])
+    ]
+
+METRICS.register_gauges(collect_runtime_gauges)
 
 # 데이터 디렉토리 확인 함수
 def ensure_data_directories():
@@ -77,27 +220,25 @@ def ensure_data_directories():
         logger.error(f"디렉토리 생성 중 오류 발생: {e}")
 
 # 아이템 저장
-def save_items():
-    """게임 아이템을 JSON 파일로 저장합니다."""
+def save_items(items):
+    """게임 아이템을 JSON 파일로 저장하고 카탈로그를 갱신합니다."""
     try:
-        with open(ITEMS_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(GAMES, f, ensure_ascii=False, indent=2)
-        logger.info(f"게임 아이템 저장 완료: {len(GAMES)}개")
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        write_file(ITEMS_DATA_FILE, items)
+        logger.info(f"게임 아이템 저장 완료: {len(items)}개")
     except Exception as e:
         logger.error(f"게임 아이템 저장 중 오류 발생: {e}")
+    CATALOG.replace(items)
 
 # 아이템 로드
 def load_items():
     """JSON 파일에서 게임 아이템을 로드합니다."""
-    global GAMES
     try:
-        if ITEMS_DATA_FILE.exists():
-            with open(ITEMS_DATA_FILE, 'r', encoding='utf-8') as f:
-                GAMES = json.load(f)
-            logger.info(f"게임 아이템 로드 완료: {len(GAMES)}개")
+        if CATALOG.load():
+            logger.info(f"게임 아이템 로드 완료: {len(CATALOG)}개")
         else:
             # 기본 게임 항목
-            GAMES = [
+            save_items([
                 {
                     "id": 1,
                     "title": "플러팅 고수! 전화번호 따기",
@@ -120,19 +261,32 @@ def load_items():
                     "lose_condition": "턴 제한을 초과하거나 상대방이 관심을 잃는다",
                     "difficulty": "쉬움"
                 }
-            ]
-            save_items()
+            ])
             logger.info("기본 게임 아이템 생성")
     except Exception as e:
         logger.error(f"게임 아이템 로드 중 오류 발생: {e}")
-        GAMES = []
+        raise
+
+# 카탈로그 준비
+def ensure_catalog():
+    """카탈로그를 처음 사용할 때 로드하고, 이후에는 원본 파일 변경 여부만 확인합니다."""
+    if not CATALOG.loaded:
+        load_items()
+    else:
+        CATALOG.reload_if_changed()
+    return CATALOG
+
+# 저장된 세션 복원
+def restore_session(data):
+    """sqlite 세션 저장소에서 읽은 세션 딕셔너리를 카탈로그 아이템을 참조하는 GameSession으로 복원합니다."""
+    return GameSession.from_dict(data, ensure_catalog().get(data.get('id')))
 
 # 프롬프트 저장
 def save_prompts():
     """게임 프롬프트를 JSON 파일로 저장합니다."""
     try:
-        with open(PROMPTS_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(PROMPTS, f, ensure_ascii=False, indent=2)
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        write_file(PROMPTS_DATA_FILE, PROMPTS)
         logger.info("게임 프롬프트 저장 완료")
     except Exception as e:
         logger.error(f"게임 프롬프트 저장 중 오류 발생: {e}")
@@ -165,57 +319,265 @@ def load_prompts():
         PROMPTS = {}
 
 # 게임 로그 저장
-def save_game_logs():
-    """게임 로그를 JSON 파일로 저장합니다."""
+def save_game_log(game_id, record):
+    """게임 로그 기록을 추가 전용 로그에 추가합니다 (쓰기는 백그라운드에서 수행)."""
     try:
-        with open(GAME_LOGS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(GAME_LOGS, f, ensure_ascii=False, indent=2)
-        logger.info("게임 로그 저장 완료")
+        record = dict(record, game_id=game_id)
+        migrate_legacy_game_logs()
+        GAME_LOG_WRITER.append(record)
     except Exception as e:
         logger.error(f"게임 로그 저장 중 오류 발생: {e}")
 
-# 게임 로그 로드
-def load_game_logs():
-    """JSON 파일에서 게임 로그를 로드합니다."""
-    global GAME_LOGS
-    try:
-        if GAME_LOGS_FILE.exists():
-            with open(GAME_LOGS_FILE, 'r', encoding='utf-8') as f:
-                GAME_LOGS = json.load(f)
-            logger.info("게임 로그 로드 완료")
-        else:
-            GAME_LOGS = {}
-            save_game_logs()
-            logger.info("빈 게임 로그 생성")
-    except Exception as e:
-        logger.error(f"게임 로그 로드 중 오류 발생: {e}")
-        GAME_LOGS = {}
+# 이전 형식 게임 로그 이전
+def migrate_legacy_game_logs():
+    """이전 형식(game_logs.json)의 로그가 있고 세그먼트가 없으면 세그먼트로 이전합니다 (한 번만 확인)."""
+    global LEGACY_GAME_LOGS_CHECKED
+    if LEGACY_GAME_LOGS_CHECKED:
+        return
+    LEGACY_GAME_LOGS_CHECKED = True
+    if list_segments(GAME_LOGS_DIR) or not GAME_LOGS_FILE.exists():
+        return
+    with open(GAME_LOGS_FILE, 'r', encoding='utf-8') as f:
+        legacy_logs = json.load(f)
+    for game_id, record in legacy_logs.items():
+        GAME_LOG_WRITER.append(dict(record, game_id=game_id))
+    GAME_LOG_WRITER.flush()
+    logger.info(f"이전 게임 로그 이전 완료: {len(legacy_logs)}개")
 
 # 아이템 프롬프트 로드
 def load_item_prompt(item_id):
-    """아이템 ID에 해당하는 프롬프트를 로드합니다."""
+    """아이템 ID에 해당하는 프롬프트를 반환합니다 (레지스트리 캐시 사용)."""
     try:
-        prompt_file = ITEM_PROMPTS_DIR / f"{item_id}.json"
-        if prompt_file.exists():
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            logger.warning(f"아이템 프롬프트 파일 없음: {prompt_file}")
-            return None
+        item_prompt = PROMPT_REGISTRY.get(item_id)
+        if item_prompt is None:
+            logger.debug(f"아이템 프롬프트 파일 없음: {item_id}")
+        return item_prompt
     except Exception as e:
         logger.error(f"아이템 프롬프트 로드 중 오류 발생: {e}")
         return None
 
+# 시작 스냅샷 적용
+def load_startup_snapshot():
+    """시작 스냅샷에서 프롬프트, 카탈로그, 아이템 프롬프트를 읽습니다. 사용할 수 없으면 False를 반환합니다."""
+    global PROMPTS
+    try:
+        snapshot = load_snapshot(STARTUP_SNAPSHOT_PATH, PROMPTS_DATA_FILE, ITEMS_DATA_FILE, ITEM_PROMPTS_DIR)
+    except Exception as e:
+        logger.error(f"시작 스냅샷 로드 중 오류 발생: {e}")
+        return False
+    if snapshot is None:
+        return False
+    PROMPTS = snapshot["prompts"]
+    CATALOG.replace(snapshot["items"])
+    PROMPT_REGISTRY.preload(snapshot["item_prompts"])
+    return True
+
 # 앱 초기화 시 데이터 로드
 def initialize_app():
-    """앱 초기화 시 필요한 데이터를 로드합니다."""
-    ensure_data_directories()
-    # load_items() 함수 제거 - 불필요한 게임 아이템 로드 방지
-    load_prompts()
-    load_game_logs()
-    logger.info("앱 초기화 완료")
+    """앱 초기화 시 필요한 데이터를 로드합니다.
+    
+    lazy 모드에서는 시작 스냅샷이 있으면 스냅샷만 읽고, 없으면 공통 프롬프트만 읽습니다.
+    카탈로그와 아이템 프롬프트는 처음 사용할 때 로드합니다. 게임 로그는 추가 전용 세그먼트에만 기록하며
+    (조회가 필요하면 game_log.iter_records로 세그먼트를 직접 읽음), 이전 형식 로그의 이전만 eager 모드에서 미리 수행합니다.
+    """
+    started = time.perf_counter()
+    if STARTUP_MODE == "eager":
+        ensure_data_directories()
+        load_prompts()
+        PROMPT_REGISTRY.load_all()
+        migrate_legacy_game_logs()
+    elif load_startup_snapshot():
+        STARTUP_INFO["snapshot"] = True
+    else:
+        load_prompts()
+    STARTUP_INFO["initialize_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    STARTUP_INFO["import_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 2)
+    logger.info(
+        "앱 초기화 완료: 모드=%s, 스냅샷=%s, 초기화 %sms",
+        STARTUP_MODE, STARTUP_INFO["snapshot"], STARTUP_INFO["initialize_ms"]
+    )
+
+# 시스템 프롬프트 구성
+def get_prompt_layout(game_session, item_prompt=None):
+    """아이템의 시스템 프롬프트 구성(고정 접두사와 턴 상태 템플릿)을 반환합니다.
+    
+    템플릿을 적용할 수 없으면 None을 반환합니다.
+    """
+    template = None
+    raw = False
+    if item_prompt and item_prompt.get('system_prompt'):
+        template, raw = item_prompt['system_prompt'], True
+    else:
+        template = PROMPTS.get('system_prompt_template')
+    if not template:
+        return None
+    try:
+        # 아이템별 고정 필드는 미리 채워 두고, 턴 정보는 상태 메시지로 분리
+        # (아이템 프롬프트의 system_prompt는 기존처럼 턴 정보 없이 그대로 사용)
+        return PROMPT_REGISTRY.compile_layout(game_session.get('id'), template, {
+            'category': game_session.get('category', ''),
+            'title': game_session.get('title', ''),
+            'character_setting': game_session.get('character_setting', ''),
+            'max_turns': game_session.get('max_turns', 5),
+            'win_condition': game_session.get('win_condition', ''),
+            'lose_condition': game_session.get('lose_condition', ''),
+            'difficulty': game_session.get('difficulty', '')
+        }, None if raw else PROMPTS.get('turn_state_template'), raw)
+    except (KeyError, IndexError, ValueError, AttributeError) as e:
+        logger.warning(f"시스템 프롬프트 템플릿 적용 실패: {e}")
+        return None
+
+# 시스템 프롬프트 생성
+def build_system_prompt(game_session, item_prompt=None):
+    """아이템 프롬프트 또는 공통 템플릿으로 시스템 프롬프트를 생성합니다.
+    
+    시스템 프롬프트에는 턴마다 바뀌는 정보가 없어 같은 아이템이면 항상 같은 문자열입니다.
+    """
+    layout = get_prompt_layout(game_session, item_prompt)
+    if layout is not None:
+        return layout.prefix
+    return PROMPTS.get('system_prompt', "당신은 사용자와 대화하는 친절한 AI입니다.")
+
+# 턴 상태 메시지 생성
+def build_turn_state(game_session, item_prompt=None):
+    """현재 턴, 남은 턴(이번 턴 포함) 같은 턴 상태 메시지를 생성합니다. (없으면 None)"""
+    layout = get_prompt_layout(game_session, item_prompt)
+    if layout is None:
+        return None
+    current_turn = game_session.get('current_turn', 1)
+    try:
+        return layout.render_state(
+            current_turn=current_turn,
+            remaining_turns=max(0, game_session.get('max_turns', 5) - current_turn + 1)
+        )
+    except (KeyError, IndexError, ValueError, AttributeError) as e:
+        logger.warning(f"턴 상태 템플릿 적용 실패: {e}")
+        return None
+
+# AI 구성 가져오기
+def get_ai_config(game_session):
+    """게임 세션에 적용할 AI 구성을 반환합니다."""
+    return game_session.get('ai_config') or PROMPTS.get('ai_config', {})
+
+# OpenAI 요청 메시지 구성
+def build_ai_messages(system_prompt, user_message, game_session):
+    """시스템 프롬프트, 이전 대화 내역, 사용자 메시지로 요청 메시지를 구성합니다.
+    
+    이전 대화는 모델별 토큰 예산 안에 들어가는 최근 메시지만 포함합니다.
+    턴 상태는 사용자 메시지 바로 앞에 붙여, 시스템 프롬프트와 이전 대화로 이루어진
+    요청 앞부분이 턴이 바뀌어도 그대로 유지되도록 합니다 (프롬프트 접두사 캐시).
+    """
+    ai_config = get_ai_config(game_session)
+    return build_context(
+        system_prompt,
+        game_session.get('messages', []),
+        user_message,
+        model=ai_config.get('model', 'gpt-3.5-turbo'),
+        max_tokens=ai_config.get('max_tokens', 150),
+        state_message=build_turn_state(game_session, load_item_prompt(game_session.get('id')))
+    )
+
+# 이벤트 루프 밖에서 실행
+ASYNC_BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", 16))
+_BLOCKING_EXECUTOR = None
+_BLOCKING_EXECUTOR_LOCK = threading.Lock()
+
+def get_blocking_executor():
+    """비동기 경로의 블로킹 작업에 사용하는 전용 스레드 풀을 반환합니다.
+
+    ASGI 엔트리 포인트가 Flask 경로(/api/ask/batch 등)를 실행하는 기본 스레드 풀과 분리하여,
+    오래 걸리는 일괄 요청이 스레드를 모두 차지해도 /api/ask의 턴 처리가 기다리지 않도록 합니다.
+    """
+    global _BLOCKING_EXECUTOR
+    if _BLOCKING_EXECUTOR is None:
+        with _BLOCKING_EXECUTOR_LOCK:
+            if _BLOCKING_EXECUTOR is None:
+                _BLOCKING_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=ASYNC_BLOCKING_WORKERS,
+                    thread_name_prefix="async-blocking"
+                )
+    return _BLOCKING_EXECUTOR
+
+async def run_blocking(fn, *args):
+    """동기 함수를 전용 스레드 풀에서 실행하고 결과를 기다립니다.
+
+    세션 저장소, 프롬프트 파일, 응답 캐시, 승리 조건 판정처럼 블로킹되는 작업이 이벤트 루프를 멈추지 않도록 합니다.
+    현재 contextvars를 그대로 전달하므로 Flask 요청 컨텍스트(g, request)와 구간 측정이 같은 요청에 기록됩니다.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_blocking_executor(), partial(context.run, fn, *args)
+    )
+
+# OpenAI 요청 준비
+def prepare_completion(system_prompt, user_message, game_session):
+    """요청 파라미터를 구성하고 응답 캐시를 확인합니다.
+    
+    (요청 파라미터, 캐시 키, 캐시된 응답)을 반환합니다. 캐시를 사용하지 않거나
+    캐시에 없으면 캐시된 응답은 None입니다.
+    """
+    ai_config = get_ai_config(game_session)
+    model = ai_config.get('model', 'gpt-3.5-turbo')
+    max_tokens = ai_config.get('max_tokens', 150)
+    temperature = ai_config.get('temperature', 0.7)
+    
+    # 메시지 구성
+    with phase("prompt_build"):
+        messages = build_ai_messages(system_prompt, user_message, game_session)
+    params = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    
+    # 응답 캐시 확인 (아이템별로 사용 설정된 경우에만)
+    cache = get_completion_cache()
+    if not cache.is_cacheable(temperature, ai_config):
+        return params, None, None
+    cache_key = cache.make_key(model, system_prompt, messages[1:], temperature, max_tokens)
+    ai_response = cache.get(cache_key)
+    record_cache_lookup(ai_response is not None)
+    return params, cache_key, ai_response
+
+def cached_prompt_tokens(usage):
+    """usage.prompt_tokens_details에서 제공자 프롬프트 캐시로 처리된 입력 토큰 수를 꺼냅니다."""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    if details is None and getattr(usage, 'model_extra', None):
+        # SDK 버전에 따라 모델 필드가 아닌 추가 필드(dict)로 전달됨
+        details = usage.model_extra.get('prompt_tokens_details')
+    if isinstance(details, dict):
+        return details.get('cached_tokens') or 0
+    return getattr(details, 'cached_tokens', 0) or 0
+
+def finish_completion(response, params, cache_key):
+    """OpenAI 응답에서 텍스트를 꺼내고 토큰 사용량과 응답 캐시를 기록합니다."""
+    if response.usage:
+        record_tokens(params["model"], response.usage.prompt_tokens, response.usage.completion_tokens,
+                      cached_prompt_tokens(response.usage))
+    ai_response = response.choices[0].message.content.strip()
+    if cache_key:
+        get_completion_cache().set(cache_key, ai_response)
+    return ai_response
+
+def completion_result(ai_response, game_session):
+    """응답에서 승리 조건을 확인하여 턴 결과를 만듭니다."""
+    with phase("victory_check"):
+        verdict = check_victory_condition(ai_response, game_session)
+    return {
+        "response": ai_response,
+        "victory": verdict.victory,
+        "defeat": verdict.defeat
+    }
 
 # OpenAI API를 사용하여 AI 응답 생성
+def flight_key(params, game_session):
+    """진행 중인 같은 요청과 결과를 공유할 수 있으면 요청 병합 키를, 아니면 None을 반환합니다."""
+    flight = get_single_flight()
+    if not flight.is_shareable(params["temperature"], get_ai_config(game_session)):
+        return None
+    return flight.make_key(params["model"], params["messages"], params["temperature"], params["max_tokens"])
+
 def generate_ai_response(system_prompt, user_message, game_session):
     """OpenAI API를 사용하여 AI 응답을 생성합니다."""
     if not OPENAI_AVAILABLE:
@@ -224,45 +586,243 @@ def generate_ai_response(system_prompt, user_message, game_session):
         return generate_fallback_response(user_message, game_session)
     
     try:
-        # AI 구성 가져오기
-        ai_config = game_session.get('ai_config', PROMPTS.get('ai_config', {}))
-        model = ai_config.get('model', 'gpt-3.5-turbo')
-        max_tokens = ai_config.get('max_tokens', 150)
-        temperature = ai_config.get('temperature', 0.7)
-        
-        # 메시지 구성
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ]
-        
-        # 이전 대화 내역 추가 (있는 경우)
-        if 'messages' in game_session:
-            # 메시지 수가 너무 많으면 앞쪽 메시지 제거 (토큰 제한 고려)
-            prev_messages = game_session['messages'][-5:] if len(game_session['messages']) > 5 else game_session['messages']
-            messages = [{"role": "system", "content": system_prompt}] + prev_messages + [{"role": "user", "content": user_message}]
-        
-        # API 호출
-        response = openai.ChatCompletion.create(
+        params, cache_key, ai_response = prepare_completion(system_prompt, user_message, game_session)
+        if ai_response is None:
+            # API 호출 (회로 차단기와 헤지 요청을 적용한 공유 LLM 게이트웨이 사용)
+            # 진행 중인 같은 요청이 있으면 새로 호출하지 않고 그 결과를 함께 사용
+            breaker = get_circuit_breaker(params["model"])
+            complete = lambda: finish_completion(
+                breaker.call(partial(get_gateway().chat, **params), time.monotonic() + LLM_DEADLINE),
+                params, cache_key
+            )
+            with phase("llm_wait"):
+                ai_response, _ = get_single_flight().do(flight_key(params, game_session), complete, LLM_DEADLINE)
+        return completion_result(ai_response, game_session)
+    except CircuitOpen as e:
+        logger.warning(f"{e}: 기본 응답 사용")
+        return generate_fallback_response(user_message, game_session)
+    except Exception as e:
+        logger.error(f"OpenAI API 호출 오류: {e}")
+        return generate_fallback_response(user_message, game_session)
+
+async def agenerate_ai_response(system_prompt, user_message, game_session):
+    """generate_ai_response의 비동기 버전 (응답을 기다리는 동안 이벤트 루프를 점유하지 않음)"""
+    if not OPENAI_AVAILABLE:
+        logger.warning("OpenAI API 사용 불가: 기본 응답 사용")
+        return await run_blocking(generate_fallback_response, user_message, game_session)
+    
+    try:
+        # 프롬프트 파일과 응답 캐시(디스크)를 읽는 준비 단계는 이벤트 루프 밖에서 실행
+        params, cache_key, ai_response = await run_blocking(
+            prepare_completion, system_prompt, user_message, game_session
+        )
+        if ai_response is None:
+            breaker = get_circuit_breaker(params["model"])
+
+            async def complete():
+                response = await breaker.acall(partial(get_gateway().achat, **params), time.monotonic() + LLM_DEADLINE)
+                return await run_blocking(finish_completion, response, params, cache_key)
+
+            with phase("llm_wait"):
+                ai_response, _ = await get_single_flight().ado(flight_key(params, game_session), complete, LLM_DEADLINE)
+        return await run_blocking(completion_result, ai_response, game_session)
+    except CircuitOpen as e:
+        logger.warning(f"{e}: 기본 응답 사용")
+        return await run_blocking(generate_fallback_response, user_message, game_session)
+    except Exception as e:
+        logger.error(f"OpenAI API 호출 오류: {e}")
+        return await run_blocking(generate_fallback_response, user_message, game_session)
+
+# 스트리밍 청크 처리
+def chunk_delta(chunk):
+    """스트리밍 청크에서 새 텍스트 조각을 꺼냅니다. (없으면 None)"""
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content or None
+
+def record_stream_metrics(model, messages, text, llm_wait, victory_check):
+    """스트리밍 응답의 구간 시간과 (추정) 토큰 수를 기록합니다."""
+    record_phase("llm_wait", llm_wait)
+    record_phase("victory_check", victory_check)
+    # 스트리밍 응답에는 usage가 없으므로 토큰 수를 추정하여 기록
+    record_tokens(
+        model,
+        sum(message_tokens(message, model) for message in messages),
+        count_tokens(text, model)
+    )
+
+def stream_result(checker):
+    """스트리밍이 끝난 응답의 턴 결과"""
+    return {
+        "response": checker.text.strip(),
+        "victory": checker.victory,
+        "defeat": checker.defeat
+    }
+
+# OpenAI API 스트리밍 응답 생성
+def stream_ai_response(system_prompt, user_message, game_session):
+    """AI 응답을 토큰 단위로 생성합니다.
+    
+    ("token", 텍스트 조각) 이벤트를 차례로 내보내고, 마지막에
+    generate_ai_response와 같은 형식의 결과를 ("done", 결과)로 내보냅니다.
+    응답 도중 승리 조건이 감지되면 즉시 스트림을 닫고 종료합니다.
+    """
+    if not OPENAI_AVAILABLE:
+        logger.warning("OpenAI API 사용 불가: 기본 응답 사용")
+        result = generate_fallback_response(user_message, game_session)
+        yield "token", result["response"]
+        yield "done", result
+        return
+    
+    ai_config = get_ai_config(game_session)
+    model = ai_config.get('model', 'gpt-3.5-turbo')
+    breaker = get_circuit_breaker(model)
+    if not breaker.allow():
+        logger.warning(f"LLM 회로가 열려 있습니다: {model}: 기본 응답 사용")
+        result = generate_fallback_response(user_message, game_session)
+        yield "token", result["response"]
+        yield "done", result
+        return
+    
+    checker = get_victory_engine().matcher(game_session, PROMPTS)
+    stream = None
+    messages = None
+    # 회로 차단기에는 첫 토큰까지의 지연 시간을 기록
+    started_at = time.monotonic()
+    first_token_latency = None
+    # 클라이언트로 전송하는 시간은 빼고 LLM 청크를 기다린 시간과 승리 조건 확인 시간만 합산
+    llm_wait = 0.0
+    victory_check = 0.0
+    try:
+        with phase("prompt_build"):
+            messages = build_ai_messages(system_prompt, user_message, game_session)
+        stream = get_gateway().chat_stream(
             model=model,
             messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
+            deadline=started_at + LLM_DEADLINE,
+            temperature=ai_config.get('temperature', 0.7),
+            max_tokens=ai_config.get('max_tokens', 150)
         )
         
-        # 응답 추출
-        ai_response = response.choices[0].message.content.strip()
-        
-        # 응답에서 승리 조건 확인
-        victory = check_victory_condition(ai_response, game_session)
+        chunks = iter(stream)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            llm_wait += time.perf_counter() - started
+            if chunk is None:
+                break
+            delta = chunk_delta(chunk)
+            if not delta:
+                continue
+            if first_token_latency is None:
+                first_token_latency = time.monotonic() - started_at
+            yield "token", delta
+            started = time.perf_counter()
+            victory = checker.feed(delta)
+            victory_check += time.perf_counter() - started
+            if victory:
+                logger.info("스트리밍 중 승리 조건 감지: 스트림 조기 종료")
+                break
+        breaker.record(first_token_latency if first_token_latency is not None else time.monotonic() - started_at)
+        started_at = None
+    except Exception as e:
+        logger.error(f"OpenAI API 스트리밍 오류: {e}")
+        breaker.record_failure(time.monotonic() - started_at, e)
+        started_at = None
+        if not checker.text:
+            # 토큰을 하나도 받지 못한 경우에만 기본 응답으로 대체
+            result = generate_fallback_response(user_message, game_session)
+            yield "token", result["response"]
+            yield "done", result
+            return
+    finally:
+        if started_at is not None:
+            # 결과 없이 끝난 호출 (클라이언트 연결 끊김)
+            breaker.cancel()
+        if stream is not None:
+            stream.close()
+            record_stream_metrics(model, messages, checker.text, llm_wait, victory_check)
+    
+    yield "done", stream_result(checker)
+
+async def astream_ai_response(system_prompt, user_message, game_session):
+    """stream_ai_response의 비동기 버전"""
+    if not OPENAI_AVAILABLE:
+        logger.warning("OpenAI API 사용 불가: 기본 응답 사용")
+        result = await run_blocking(generate_fallback_response, user_message, game_session)
+        yield "token", result["response"]
+        yield "done", result
+        return
+    
+    ai_config = get_ai_config(game_session)
+    model = ai_config.get('model', 'gpt-3.5-turbo')
+    breaker = get_circuit_breaker(model)
+    if not breaker.allow():
+        logger.warning(f"LLM 회로가 열려 있습니다: {model}: 기본 응답 사용")
+        result = await run_blocking(generate_fallback_response, user_message, game_session)
+        yield "token", result["response"]
+        yield "done", result
+        return
+    
+    # 규칙 파일과 프롬프트 파일을 확인하는 준비 단계는 이벤트 루프 밖에서 실행
+    checker = await run_blocking(get_victory_engine().matcher, game_session, PROMPTS)
+    stream = None
+    messages = None
+    # 회로 차단기에는 첫 토큰까지의 지연 시간을 기록
+    started_at = time.monotonic()
+    first_token_latency = None
+    llm_wait = 0.0
+    victory_check = 0.0
+    try:
+        with phase("prompt_build"):
+            messages = await run_blocking(build_ai_messages, system_prompt, user_message, game_session)
+        stream = get_gateway().achat_stream(
+            model=model,
+            messages=messages,
+            deadline=started_at + LLM_DEADLINE,
+            temperature=ai_config.get('temperature', 0.7),
+            max_tokens=ai_config.get('max_tokens', 150)
+        )
         
-        return {
-            "response": ai_response,
-            "victory": victory
-        }
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                llm_wait += time.perf_counter() - started
+            delta = chunk_delta(chunk)
+            if not delta:
+                continue
+            if first_token_latency is None:
+                first_token_latency = time.monotonic() - started_at
+            yield "token", delta
+            started = time.perf_counter()
+            victory = checker.feed(delta)
+            victory_check += time.perf_counter() - started
+            if victory:
+                logger.info("스트리밍 중 승리 조건 감지: 스트림 조기 종료")
+                break
+        breaker.record(first_token_latency if first_token_latency is not None else time.monotonic() - started_at)
+        started_at = None
     except Exception as e:
-        logger.error(f"OpenAI API 호출 오류: {e}")
-        return generate_fallback_response(user_message, game_session)
+        logger.error(f"OpenAI API 스트리밍 오류: {e}")
+        breaker.record_failure(time.monotonic() - started_at, e)
+        started_at = None
+        if not checker.text:
+            result = await run_blocking(generate_fallback_response, user_message, game_session)
+            yield "token", result["response"]
+            yield "done", result
+            return
+    finally:
+        if started_at is not None:
+            breaker.cancel()
+        if stream is not None:
+            await stream.aclose()
+            record_stream_metrics(model, messages, checker.text, llm_wait, victory_check)
+    
+    yield "done", stream_result(checker)
 
 # 기본 응답 생성 (OpenAI API 사용 불가 시)
 def generate_fallback_response(user_message, game_session):
@@ -272,7 +832,7 @@ def generate_fallback_response(user_message, game_session):
     
     # 카테고리별 응답 생성
     if category == '플러팅':
-        if "전화" in user_message.lower() or "번호" in user_message.lower() or "연락처" in user_message.lower() or "만날래" in user_message.lower():
+        if get_victory_engine().triggers(user_message, game_session, PROMPTS):
             return {
                 "response": f"네! 제 전화번호는 010-1234-5678입니다. 언제든지 연락주세요! 만나면 좋을 것 같아요.",
                 "victory": True
@@ -303,20 +863,11 @@ def generate_fallback_response(user_message, game_session):
 
 # 승리 조건 확인
 def check_victory_condition(ai_response, game_session):
-    """AI 응답에서 승리 조건을 확인합니다."""
-    # 플러팅 카테고리의 경우 전화번호 포함 여부 확인
-    category = game_session.get('category', '')
-    
-    if category == '플러팅':
-        # 전화번호 형식 확인 (010-XXXX-XXXX 또는 변형)
-        if any(pattern in ai_response for pattern in ["010-", "010", "XXX-XXXX", "전화번호"]):
-            return True
-    
-    # 명시적인 승리 메시지 확인
-    if PROMPTS.get('correct_answer_message', '') in ai_response:
-        return True
-    
-    return False
+    """AI 응답에서 승리/패배 조건을 확인하고 Verdict(victory, defeat, rule)를 반환합니다.
+
+    규칙은 data/victory_rules.json에 선언하며 아이템별로 한 번만 컴파일됩니다.
+    """
+    return get_victory_engine().evaluate(ai_response, game_session, PROMPTS)
 
 # 앱 시작 시 데이터 초기화 실행
 initialize_app()
@@ -342,78 +893,84 @@ def health_check():
     if api_valid:
         logger.info("API 키 검증 성공")
     else:
-        logger.warning(f"API 키 검증 실패: {message}")
+        logger.warning("API 키 검증 실패: %s", message)
     
     # API 키가 없거나 유효하지 않은 경우
+    # (내부 상태는 인증 없이 공개하지 않도록 debug_info가 켜진 경우에만 포함)
     if not api_valid:
-        response_data = {
+        response_data = with_debug_info({
             "status": "error",
             "message": message,
             "timestamp": int(time.time()),
-            "debug_info": {
-                "openai_available": OPENAI_AVAILABLE,
-                "api_key_present": os.getenv("OPENAI_API_KEY") is not None,
-                "server_environment": os.getenv("FLASK_ENV", "production")
-            }
-        }
+            "openai_available": OPENAI_AVAILABLE,
+            "api_key_valid": api_valid
+        }, lambda: {
+            "api_key_present": os.getenv("OPENAI_API_KEY") is not None,
+            "server_environment": os.getenv("FLASK_ENV", "production")
+        })
         logger.error(f"헬스 체크 응답: {response_data}")
         return jsonify(response_data), 500
     
-    # 정상 응답
-    response_data = {
+    # 정상 응답 (세션 저장소 등의 통계는 sqlite 조회가 필요하므로 debug_info가 켜진 경우에만 수집)
+    response_data = with_debug_info({
         "status": "online",
         "message": "API 서버가 정상 작동 중입니다.",
         "timestamp": int(time.time()),
-        "debug_info": {
-            "openai_available": OPENAI_AVAILABLE,
-            "api_key_valid": api_valid
-        }
-    }
-    logger.info(f"헬스 체크 응답: 상태={response_data['status']}")
+        "openai_available": OPENAI_AVAILABLE,
+        "api_key_valid": api_valid
+    }, lambda: {
+        "session_store": GAME_SESSIONS.stats(),
+        "llm_gateway": get_gateway().stats(),
+        "circuit_breakers": circuit_stats(),
+        "prompt_prefixes": PROMPT_REGISTRY.prefix_stats(),
+        "completion_cache": get_completion_cache().stats(),
+        "single_flight": get_single_flight().stats(),
+        "logging": logging_stats(),
+        "victory_rules": get_victory_engine().stats(),
+        "startup": STARTUP_INFO
+    })
+    logger.info("헬스 체크 응답: 상태=%s", response_data['status'])
     return jsonify(response_data)
 
+# 메트릭 API
+@app.route('/api/metrics')
+def metrics():
+    """요청 처리 시간, 구간별 소요 시간, 토큰/캐시 메트릭을 Prometheus 텍스트 형식으로 반환"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # 게임 목록 API
 @app.route('/api/games')
 def list_games():
     """게임 목록 반환"""
-    logger.info(f"게임 목록 요청 처리 - 현재 로드된 게임 수: {len(GAMES)}")
-    
-    # GAMES가 비어있는 경우에만 로드
-    if len(GAMES) == 0:
-        try:
-            load_items()
-            logger.info(f"게임 데이터 로드 완료: {len(GAMES)}개")
-        except Exception as e:
-            logger.error(f"게임 데이터 로드 중 오류 발생: {e}")
-            return jsonify({
-                "success": False,
-                "error": "게임 데이터를 찾을 수 없습니다. 관리자에게 문의하세요.",
-                "debug_info": {
-                    "error": str(e),
-                    "timestamp": int(time.time())
-                }
-            }), 500
+    # 카탈로그를 처음 사용할 때 로드 (이후에는 파일 변경 여부만 확인)
+    try:
+        ensure_catalog()
+    except Exception as e:
+        logger.error(f"게임 데이터 로드 중 오류 발생: {e}")
+        return jsonify(with_debug_info({
+            "success": False,
+            "error": "게임 데이터를 찾을 수 없습니다. 관리자에게 문의하세요."
+        }, lambda: {
+            "error": str(e),
+            "timestamp": int(time.time())
+        })), 500
     
-    # 게임 목록을 반환할 때 필요한 최소한의 필드만 포함 (클라이언트용 최적화)
-    client_games = []
-    for game in GAMES:
-        client_games.append({
-            "id": game.get("id"),
-            "title": game.get("title"),
-            "category": game.get("category"),
-            "difficulty": game.get("difficulty"),
-            "max_turns": game.get("max_turns")
+    snapshot = CATALOG.snapshot
+    if debug_enabled():
+        return jsonify({
+            "success": True,
+            "data": snapshot.games,
+            "debug_info": {
+                "games_loaded": len(snapshot.items),
+                "catalog_version": snapshot.version,
+                "etag": snapshot.etag
+            }
         })
     
-    logger.info(f"게임 목록 응답: {len(client_games)}개 게임 반환")
-    return jsonify({
-        "success": True,
-        "data": client_games,
-        "debug_info": {
-            "games_loaded": len(GAMES),
-            "timestamp": int(time.time())
-        }
-    })
+    # 미리 인코딩된 게임 목록 응답 (ETag 일치 시 304 반환)
+    response = app.response_class(snapshot.payload, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    return response.make_conditional(request)
 
 # 게임 시작 API
 @app.route('/api/start', methods=['POST'])
@@ -421,31 +978,32 @@ def start_game():
     """게임 시작"""
     try:
         # 요청 데이터 로깅
-        request_data = request.get_json(silent=True) or {}
-        logger.info(f"게임 시작 요청: {request_data}")
+        with phase("json_parse"):
+            request_data = request.get_json(silent=True) or {}
+        logger.debug("게임 시작 요청: %s", request_data, extra={"category": BODY})
         
         # API 키 확인
         api_valid, message = validate_api_key()
         if not api_valid:
             logger.error(f"API 키 검증 실패: {message}")
-            response_data = {
+            response_data = with_debug_info({
                 "success": False,
-                "error": message,
-                "debug_info": {
-                    "openai_available": OPENAI_AVAILABLE,
-                    "api_key_present": os.getenv("OPENAI_API_KEY") is not None
-                }
-            }
+                "error": message
+            }, lambda: {
+                "openai_available": OPENAI_AVAILABLE,
+                "api_key_present": os.getenv("OPENAI_API_KEY") is not None
+            })
             return jsonify(response_data), 500
         
         data = request_data
         
         # 선택된 게임 ID (선택 사항)
         selected_game_id = data.get('item_id') or data.get('game_id')
-        logger.info(f"선택된 게임 ID: {selected_game_id}")
+        logger.debug("선택된 게임 ID: %s", selected_game_id)
         
-        # 글로벌 GAMES 변수 사용
-        if len(GAMES) == 0:
+        # 게임 카탈로그 사용 (요청 처리 중에는 같은 스냅샷 사용)
+        ensure_catalog()
+        if len(CATALOG) == 0:
             error_msg = "게임 데이터를 찾을 수 없습니다. 관리자에게 문의하세요."
             logger.error(error_msg)
             return jsonify({
@@ -456,95 +1014,426 @@ def start_game():
         # 게임 선택
         if not selected_game_id:
             # 게임 ID가 제공되지 않은 경우 랜덤 선택
-            target_game = random.choice(GAMES)
-            logger.info(f"랜덤 게임 선택됨: ID={target_game['id']}, 제목={target_game['title']}")
+            target_game = CATALOG.random_item()
+            logger.info("랜덤 게임 선택됨: ID=%s, 제목=%s", target_game['id'], target_game['title'])
         else:
             # 선택된 ID로 게임 찾기
             try:
                 if isinstance(selected_game_id, str) and selected_game_id.isdigit():
                     selected_game_id = int(selected_game_id)
-                logger.info(f"게임 ID 변환 후: {selected_game_id}, 타입: {type(selected_game_id)}")
+                logger.debug("게임 ID 변환 후: %s, 타입: %s", selected_game_id, type(selected_game_id))
                 
-                target_game = next((game for game in GAMES if game['id'] == selected_game_id), None)
+                target_game = CATALOG.get(selected_game_id)
                 
                 if not target_game:
-                    logger.warning(f"선택한 게임 ID {selected_game_id}를 찾을 수 없음, 랜덤 선택으로 대체")
-                    target_game = random.choice(GAMES)
+                    logger.warning("선택한 게임 ID %s를 찾을 수 없음, 랜덤 선택으로 대체", selected_game_id)
+                    target_game = CATALOG.random_item()
             except Exception as e:
                 logger.error(f"게임 ID 변환 중 오류: {str(e)}")
-                target_game = random.choice(GAMES)
+                target_game = CATALOG.random_item()
         
         # 게임 ID 생성
         game_id = f"game_{random.randint(10000, 99999)}"
-        logger.info(f"생성된 게임 ID: {game_id}")
-        
-        # 환영 메시지 생성
-        welcome_message = f"안녕하세요! '{target_game['title']}' 상황에 오신 것을 환영합니다. 이 상황에서 여러분은 {target_game['max_turns']}턴 안에 '{target_game['win_condition']}'을(를) 달성해야 합니다. 대화를 통해 목표를 이루어보세요!"
-        
-        # 게임 정보 생성
-        game_info = {
-            "game_id": game_id,
-            "id": target_game.get('id'),
-            "title": target_game.get('title'),
-            "category": target_game.get('category'),
-            "character_name": target_game.get('character_name'),
-            "character_setting": target_game.get('character_setting', ''),
-            "max_turns": target_game.get('max_turns'),
-            "current_turn": 1,
-            "win_condition": target_game.get('win_condition'),
-            "lose_condition": target_game.get('lose_condition', ''),
-            "difficulty": target_game.get('difficulty'),
-            "completed": False,
-            "victory": False,
-            "creation_time": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
-            "welcome_message": welcome_message
-        }
+        logger.debug("생성된 게임 ID: %s", game_id)
         
+        # 게임 세션 생성 (카탈로그 아이템과 아이템별 AI 구성은 복사하지 않고 참조)
+        item_prompt = load_item_prompt(target_game.get('id'))
+        game_session = GameSession(
+            game_id,
+            target_game,
+            ai_config=item_prompt.get('ai_config') if item_prompt else None
+        )
         # 게임 세션 저장
-        GAME_SESSIONS[game_id] = game_info
-        logger.info(f"게임 세션 저장됨: {game_id}")
+        GAME_SESSIONS.set(game_id, game_session)
+        logger.debug("게임 세션 저장됨: %s", game_id)
         
         # 클라이언트에 반환할 정보
-        response_data = {
+        response_data = with_debug_info({
             "success": True,
-            "data": {
-                "game_id": game_id,
-                "title": target_game.get('title'),
-                "category": target_game.get('category'),
-                "character_name": target_game.get('character_name'),
-                "character_setting": target_game.get('character_setting', ''),
-                "max_turns": target_game.get('max_turns'),
-                "current_turn": 1,
-                "win_condition": target_game.get('win_condition'),
-                "welcome_message": welcome_message
-            },
-            "debug_info": {
-                "selected_game_id": selected_game_id,
-                "target_game_id": target_game.get('id'),
-                "session_stored": game_id in GAME_SESSIONS,
-                "api_key_valid": api_valid,
-                "games_loaded": len(GAMES)
-            }
-        }
+            # 아이템 필드와 환영 메시지는 카탈로그에 미리 인코딩된 조각을 그대로 사용
+            "data": object_fragment(
+                CATALOG.snapshot.start_members(target_game),
+                game_id=game_id,
+                current_turn=1
+            )
+        }, lambda: {
+            "selected_game_id": selected_game_id,
+            "target_game_id": target_game.get('id'),
+            "session_stored": True,
+            "api_key_valid": api_valid,
+            "games_loaded": len(CATALOG)
+        })
         
-        logger.info(f"게임 시작 응답: 성공, 게임 ID={game_id}")
+        logger.info("게임 시작 응답: 성공, 게임 ID=%s", game_id)
         # JSON 응답 로깅
-        response_json = jsonify(response_data)
-        logger.debug(f"JSON 응답 로깅: {response_json.data}")
+        with phase("serialization"):
+            response_json = jsonify(response_data)
+        logger.debug("JSON 응답 로깅: %s", response_json.data, extra={"category": RESPONSE})
         return response_json
         
     except Exception as e:
         logger.error(f"게임 시작 중 오류 발생: {str(e)}", exc_info=True)
-        response_data = {
+        response_data = with_debug_info({
+            "success": False,
+            "error": str(e)
+        }, lambda: {
+            "error_type": type(e).__name__,
+            "openai_available": OPENAI_AVAILABLE,
+            "api_key_valid": validate_api_key()[0]
+        })
+        return jsonify(response_data), 500
+
+# 스트리밍 요청 여부 확인
+def is_stream_requested(request_data):
+    """요청 본문의 stream 플래그 또는 Accept 헤더로 스트리밍 요청 여부를 확인합니다."""
+    if request_data.get('stream'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+# Server-Sent Events 응답 헤더 (프록시 버퍼링 비활성화)
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+# Server-Sent Events 형식 변환
+def sse_event(event, data):
+    """이벤트 이름과 데이터를 SSE 메시지 형식으로 변환합니다."""
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+# 턴 결과 반영
+def complete_turn(game_id, game_session, message, ai_result, expected_version=None):
+    """AI 응답 결과를 게임 세션에 반영하고 응답 데이터를 생성합니다.
+    
+    expected_version이 주어지면 세션을 읽은 뒤 다른 요청이 먼저 저장한 경우
+    저장하지 않고 TurnConflict 예외를 발생시킵니다.
+    메모리 저장소는 get()에서 저장된 세션 객체를 그대로 반환하므로, 새 상태는 복사본에
+    반영하고 저장에 성공한 경우에만 저장소의 세션이 바뀝니다.
+    """
+    game_session = game_session.copy()
+    ai_response = ai_result["response"]
+    victory = ai_result["victory"]
+    defeat = ai_result.get("defeat", False)
+    current_turn = game_session.get('current_turn', 1)
+    max_turns = game_session.get('max_turns', 5)
+    
+    # 대화 내역 저장
+    game_session.add_message("user", message)
+    game_session.add_message("assistant", ai_response)
+    
+    # 게임 상태 업데이트
+    game_session['current_turn'] = current_turn + 1
+    
+    if victory:
+        logger.info("승리 조건 달성 (게임 ID: %s)", game_id)
+        game_session['victory'] = True
+        game_session['completed'] = True
+    elif defeat:
+        logger.info("패배 조건 충족 (게임 ID: %s)", game_id)
+        game_session['completed'] = True
+    elif current_turn + 1 > max_turns:
+        logger.info("턴 제한 초과로 게임 종료 (게임 ID: %s)", game_id)
+        game_session['completed'] = True
+    if expected_version is None:
+        GAME_SESSIONS.set(game_id, game_session)
+    elif not GAME_SESSIONS.compare_and_set(game_id, game_session, expected_version):
+        logger.warning("게임 세션 버전 충돌: 게임 ID=%s, 버전=%s", game_id, expected_version)
+        raise TurnConflict(game_id)
+    
+    # 응답 데이터
+    return with_debug_info({
+        'success': True,
+        'game_id': game_id,
+        'response': ai_response,
+        'current_turn': game_session['current_turn'],
+        'max_turns': max_turns,
+        'completed': game_session.get('completed', False),
+        'victory': game_session.get('victory', False)
+    }, lambda: {
+        'message_keywords': get_victory_engine().triggers(message, game_session, PROMPTS),
+        'game_session': {
+            'current_turn': game_session['current_turn'],
+            'max_turns': max_turns,
+            'category': game_session.get('category', '기타'),
+            'character': game_session.get('character_name', 'AI')
+        },
+        'victory_check': {
+            'victory': victory,
+            'defeat': defeat,
+            'completed': game_session.get('completed', False)
+        }
+    })
+
+# 스트리밍 턴 처리
+def stream_turn_events(game_id, game_session, message, system_prompt, claim, expected_version=None):
+    """AI 응답 토큰을 token 이벤트로 전달하고, 턴 결과를 done 이벤트로 전달합니다.
+    
+    prepare_turn으로 선점한 턴(claim)은 스트림이 끝나면 해제합니다.
+    """
+    try:
+        for event, payload in stream_ai_response(system_prompt, message, game_session):
+            if event == "token":
+                yield sse_event("token", {"delta": payload})
+            else:
+                response_data = complete_turn(game_id, game_session, message, payload, expected_version)
+                logger.info("스트리밍 응답 완료: 게임 ID=%s, 현재 턴=%s", game_id, response_data['current_turn'])
+                yield sse_event("done", response_data)
+    except TurnConflict:
+        yield sse_event("error", turn_conflict_response(game_id)[0])
+    except Exception as e:
+        logger.error(f"스트리밍 응답 중 오류 발생: {str(e)}", exc_info=True)
+        yield sse_event("error", {
             "success": False,
             "error": str(e),
-            "debug_info": {
-                "error_type": type(e).__name__,
-                "openai_available": OPENAI_AVAILABLE,
-                "api_key_valid": validate_api_key()[0]
+            "message": "질문을 처리하는 중 오류가 발생했습니다."
+        })
+    finally:
+        GAME_SESSIONS.end_turn(game_id, claim)
+
+async def astream_turn_events(game_id, game_session, message, system_prompt, claim, expected_version=None):
+    """stream_turn_events의 비동기 버전"""
+    try:
+        async for event, payload in astream_ai_response(system_prompt, message, game_session):
+            if event == "token":
+                yield sse_event("token", {"delta": payload})
+            else:
+                response_data = await run_blocking(
+                    complete_turn, game_id, game_session, message, payload, expected_version
+                )
+                logger.info("스트리밍 응답 완료: 게임 ID=%s, 현재 턴=%s", game_id, response_data['current_turn'])
+                yield sse_event("done", response_data)
+    except TurnConflict:
+        yield sse_event("error", turn_conflict_response(game_id)[0])
+    except Exception as e:
+        logger.error(f"스트리밍 응답 중 오류 발생: {str(e)}", exc_info=True)
+        yield sse_event("error", {
+            "success": False,
+            "error": str(e),
+            "message": "질문을 처리하는 중 오류가 발생했습니다."
+        })
+    finally:
+        GAME_SESSIONS.end_turn(game_id, claim)
+
+# 턴 충돌 응답
+def turn_in_progress_response(game_id):
+    """같은 게임의 다른 턴이 처리 중일 때의 응답 (응답 데이터, 상태 코드)"""
+    return {
+        'success': False,
+        'error': '같은 게임의 이전 질문을 처리하는 중입니다. 응답을 받은 뒤 다시 시도해주세요.',
+        'code': 'TURN_IN_PROGRESS',
+        'game_id': game_id
+    }, 409
+
+def turn_conflict_response(game_id):
+    """세션을 읽은 뒤 다른 요청이 먼저 턴을 저장했을 때의 응답 (응답 데이터, 상태 코드)"""
+    return {
+        'success': False,
+        'error': '다른 요청이 먼저 게임 상태를 변경했습니다. 게임 상태를 확인한 뒤 다시 시도해주세요.',
+        'code': 'TURN_CONFLICT',
+        'game_id': game_id
+    }, 409
+
+# 턴 준비
+def prepare_turn(game_id, message):
+    """턴을 처리하기 전에 요청을 검증하고 게임 세션과 시스템 프롬프트를 준비합니다.
+    
+    바로 응답해야 하는 경우(잘못된 요청, 없는 세션, 종료된 게임, 진행 중인 턴, 치트키)에는
+    ((응답 데이터, 상태 코드), None, None, None)을, 그 외에는
+    (None, 게임 세션, 시스템 프롬프트, 선점 토큰)을 반환합니다.
+    
+    두 번째 경우 게임의 턴을 선점한 상태로 반환하므로, 호출자는 턴 처리가 끝나면
+    GAME_SESSIONS.end_turn(game_id, 선점 토큰)으로 선점을 해제해야 합니다.
+    """
+    # 요청 유효성 검사
+    if not game_id or not message:
+        error_msg = '게임 ID와 메시지가 모두 필요합니다.'
+        logger.error(error_msg)
+        return (with_debug_info({
+            'success': False,
+            'error': error_msg
+        }, lambda: {
+            'game_id_present': game_id is not None,
+            'message_present': message is not None,
+            'api_key_valid': validate_api_key()[0]
+        }), 400), None, None, None
+    
+    # 게임 세션 데이터 확인
+    with phase("session_lookup"):
+        game_session = GAME_SESSIONS.get(game_id)
+    
+    # 게임 세션이 없는 경우
+    if not game_session:
+        error_msg = f'유효하지 않은 게임 세션입니다: {game_id}'
+        logger.error(error_msg)
+        # 세션 ID 목록 대신 저장소 백엔드와 세션 수만 보고 (ID 노출 방지)
+        return (with_debug_info({
+            'success': False,
+            'error': '유효하지 않은 게임 세션입니다. 새 게임을 시작해주세요.',
+            'code': 'INVALID_GAME_ID'
+        }, lambda: {
+            'requested_game_id': game_id,
+            'session_store': GAME_SESSIONS.backend_name,
+            'active_sessions': len(GAME_SESSIONS)
+        }), 404), None, None, None
+    
+    # 게임이 이미 완료되었는지 확인
+    if game_session.get('completed', False):
+        logger.info("이미 완료된 게임 세션: %s", game_id)
+        return (with_debug_info({
+            'success': True,
+            'game_id': game_id,
+            'response': '이 게임은 이미 종료되었습니다. 새 게임을 시작해주세요.',
+            'current_turn': game_session.get('current_turn', 0),
+            'max_turns': game_session.get('max_turns', 0),
+            'completed': True,
+            'victory': game_session.get('victory', False)
+        }, lambda: {
+            'game_session': {
+                'current_turn': game_session.get('current_turn'),
+                'max_turns': game_session.get('max_turns'),
+                'completed': game_session.get('completed'),
+                'victory': game_session.get('victory')
             }
-        }
-        return jsonify(response_data), 500
+        }), 200), None, None, None
+    
+    # 같은 게임의 턴이 동시에 처리되지 않도록 선점
+    claim = GAME_SESSIONS.begin_turn(game_id)
+    if claim is None:
+        logger.warning("같은 게임의 턴이 처리 중: %s", game_id)
+        return turn_in_progress_response(game_id), None, None, None
+    
+    try:
+        return _prepare_claimed_turn(game_id, message, game_session, claim)
+    except Exception:
+        GAME_SESSIONS.end_turn(game_id, claim)
+        raise
+
+def finish_by_cheat(game_id, game_session, claim, victory):
+    """치트키로 게임을 종료한 세션을 저장하고 턴 선점을 해제합니다.
+    
+    complete_turn과 마찬가지로 복사본에 반영하고, 세션을 읽은 뒤 다른 요청이 먼저 저장한 경우
+    덮어쓰지 않고 False를 반환합니다.
+    """
+    finished = game_session.copy()
+    if victory:
+        finished['victory'] = True
+    finished['completed'] = True
+    try:
+        return GAME_SESSIONS.compare_and_set(game_id, finished, game_session.get('version', 0))
+    finally:
+        GAME_SESSIONS.end_turn(game_id, claim)
+
+def _prepare_claimed_turn(game_id, message, game_session, claim):
+    # 턴을 선점한 뒤의 치트키 처리와 시스템 프롬프트 생성 (치트키 처리 후에는 선점 해제)
+    current_turn = game_session.get('current_turn', 1)
+    max_turns = game_session.get('max_turns', 5)
+    character_name = game_session.get('character_name', 'AI')
+    category = game_session.get('category', '기타')
+    
+    logger.debug("현재 게임 상태: 턴=%s/%s, 캐릭터=%s, 카테고리=%s", current_turn, max_turns, character_name, category)
+    
+    # 치트키 확인
+    if message == '승승리':
+        logger.info("치트키 사용: 승리 (게임 ID: %s)", game_id)
+        if not finish_by_cheat(game_id, game_session, claim, victory=True):
+            return turn_conflict_response(game_id), None, None, None
+        
+        return (with_debug_info({
+            'success': True,
+            'game_id': game_id,
+            'response': '축하합니다! 치트키를 사용하여 승리했습니다.',
+            'current_turn': current_turn,
+            'max_turns': max_turns,
+            'completed': True,
+            'victory': True
+        }, lambda: {
+            'cheat_used': '승승리',
+            'game_session': {
+                'current_turn': current_turn,
+                'max_turns': max_turns
+            }
+        }), 200), None, None, None
+    elif message == '패패배':
+        logger.info("치트키 사용: 패배 (게임 ID: %s)", game_id)
+        if not finish_by_cheat(game_id, game_session, claim, victory=False):
+            return turn_conflict_response(game_id), None, None, None
+        
+        return (with_debug_info({
+            'success': True,
+            'game_id': game_id,
+            'response': '치트키를 사용하여 패배했습니다.',
+            'current_turn': current_turn,
+            'max_turns': max_turns,
+            'completed': True,
+            'victory': False
+        }, lambda: {
+            'cheat_used': '패패배',
+            'game_session': {
+                'current_turn': current_turn,
+                'max_turns': max_turns
+            }
+        }), 200), None, None, None
+    
+    # 시스템 프롬프트 생성
+    with phase("prompt_build"):
+        item_prompt = load_item_prompt(game_session.get('id'))
+        system_prompt = build_system_prompt(game_session, item_prompt)
+    
+    return None, game_session, system_prompt, claim
+
+# 턴 처리
+def run_turn(game_id, message):
+    """스트리밍 없이 한 턴을 처리하고 (응답 데이터, 상태 코드)를 반환합니다."""
+    early_response, game_session, system_prompt, claim = prepare_turn(game_id, message)
+    if early_response:
+        return early_response
+    
+    try:
+        # AI 응답 생성 (응답을 기다리는 동안 다른 요청이 세션을 바꾸면 저장하지 않음)
+        expected_version = game_session.get('version', 0)
+        ai_result = generate_ai_response(system_prompt, message, game_session)
+        response_data = complete_turn(game_id, game_session, message, ai_result, expected_version)
+    except TurnConflict:
+        return turn_conflict_response(game_id)
+    finally:
+        GAME_SESSIONS.end_turn(game_id, claim)
+    
+    logger.info("질문 응답: 성공, 게임 ID=%s, 현재 턴=%s", game_id, response_data['current_turn'])
+    return response_data, 200
+
+async def arun_turn(game_id, message):
+    """run_turn의 비동기 버전 (ASGI 엔트리 포인트에서 사용)
+
+    LLM 응답을 기다리는 동안만 이벤트 루프에 머물고, 턴 준비와 결과 반영은 스레드 풀에서 실행합니다.
+    """
+    early_response, game_session, system_prompt, claim = await run_blocking(prepare_turn, game_id, message)
+    if early_response:
+        return early_response
+    
+    try:
+        expected_version = game_session.get('version', 0)
+        ai_result = await agenerate_ai_response(system_prompt, message, game_session)
+        response_data = await run_blocking(
+            complete_turn, game_id, game_session, message, ai_result, expected_version
+        )
+    except TurnConflict:
+        return turn_conflict_response(game_id)
+    finally:
+        GAME_SESSIONS.end_turn(game_id, claim)
+    
+    logger.info("질문 응답: 성공, 게임 ID=%s, 현재 턴=%s", game_id, response_data['current_turn'])
+    return response_data, 200
+
+# API 키 검증 실패 응답
+def api_key_error_response(api_message):
+    return jsonify(with_debug_info({
+        "success": False,
+        "error": api_message
+    }, lambda: {
+        "openai_available": OPENAI_AVAILABLE,
+        "api_key_present": os.getenv("OPENAI_API_KEY") is not None
+    })), 500
 
 # 질문 API
 @app.route('/api/ask', methods=['POST'])
@@ -552,211 +1441,150 @@ def ask_question():
     """질문 처리"""
     try:
         # 요청 데이터 로깅
-        request_data = request.get_json(silent=True) or {}
+        with phase("json_parse"):
+            request_data = request.get_json(silent=True) or {}
         game_id = request_data.get('game_id')
         message = request_data.get('message') or request_data.get('question')
         
         # 디버그 정보 기록
-        logger.info(f"질문 요청: 게임 ID={game_id}, 메시지 길이={len(message) if message else 0}")
+        logger.info("질문 요청: 게임 ID=%s, 메시지 길이=%s", game_id, len(message) if message else 0)
         
         # API 키 확인
         api_valid, api_message = validate_api_key()
         if not api_valid:
             logger.error(f"API 키 검증 실패: {api_message}")
-            response_data = {
-                "success": False,
-                "error": api_message,
-                "debug_info": {
-                    "openai_available": OPENAI_AVAILABLE,
-                    "api_key_present": os.getenv("OPENAI_API_KEY") is not None
-                }
-            }
-            return jsonify(response_data), 500
+            return api_key_error_response(api_message)
         
-        # 요청 유효성 검사
-        if not game_id or not message:
-            error_msg = '게임 ID와 메시지가 모두 필요합니다.'
-            logger.error(error_msg)
-            return jsonify({
-                'success': False,
-                'error': error_msg,
-                'debug_info': {
-                    'game_id_present': game_id is not None,
-                    'message_present': message is not None,
-                    'api_key_valid': api_valid
-                }
-            }), 400
-        
-        # 게임 세션 데이터 확인
-        game_session = GAME_SESSIONS.get(game_id)
-        
-        # 게임 세션이 없는 경우
-        if not game_session:
-            error_msg = f'유효하지 않은 게임 세션입니다: {game_id}'
-            logger.error(error_msg)
-            return jsonify({
-                'success': False,
-                'error': '유효하지 않은 게임 세션입니다. 새 게임을 시작해주세요.',
-                'code': 'INVALID_GAME_ID',
-                'debug_info': {
-                    'available_sessions': list(GAME_SESSIONS.keys()),
-                    'requested_game_id': game_id
-                }
-            }), 404
-        
-        # 게임이 이미 완료되었는지 확인
-        if game_session.get('completed', False):
-            logger.info(f"이미 완료된 게임 세션: {game_id}")
-            return jsonify({
-                'success': True,
-                'game_id': game_id,
-                'response': '이 게임은 이미 종료되었습니다. 새 게임을 시작해주세요.',
-                'current_turn': game_session.get('current_turn', 0),
-                'max_turns': game_session.get('max_turns', 0),
-                'completed': True,
-                'victory': game_session.get('victory', False),
-                'debug_info': {
-                    'game_session': {
-                        'current_turn': game_session.get('current_turn'),
-                        'max_turns': game_session.get('max_turns'),
-                        'completed': game_session.get('completed'),
-                        'victory': game_session.get('victory')
-                    }
-                }
-            })
-        
-        current_turn = game_session.get('current_turn', 1)
-        max_turns = game_session.get('max_turns', 5)
-        character_name = game_session.get('character_name', 'AI')
-        category = game_session.get('category', '기타')
-        
-        logger.info(f"현재 게임 상태: 턴={current_turn}/{max_turns}, 캐릭터={character_name}, 카테고리={category}")
-        
-        # 치트키 확인
-        if message == '승승리':
-            logger.info(f"치트키 사용: 승리 (게임 ID: {game_id})")
-            game_session['victory'] = True
-            game_session['completed'] = True
-            
-            return jsonify({
-                'success': True,
-                'game_id': game_id,
-                'response': '축하합니다! 치트키를 사용하여 승리했습니다.',
-                'current_turn': current_turn,
-                'max_turns': max_turns,
-                'completed': True,
-                'victory': True,
-                'debug_info': {
-                    'cheat_used': '승승리',
-                    'game_session': {
-                        'current_turn': current_turn,
-                        'max_turns': max_turns
-                    }
-                }
-            })
-        elif message == '패패배':
-            logger.info(f"치트키 사용: 패배 (게임 ID: {game_id})")
-            game_session['completed'] = True
+        # 스트리밍 모드: 토큰을 Server-Sent Events로 전달
+        if is_stream_requested(request_data):
+            early_response, game_session, system_prompt, claim = prepare_turn(game_id, message)
+            if early_response:
+                response_data, status_code = early_response
+                return jsonify(response_data), status_code
             
-            return jsonify({
-                'success': True,
-                'game_id': game_id,
-                'response': '치트키를 사용하여 패배했습니다.',
-                'current_turn': current_turn,
-                'max_turns': max_turns,
-                'completed': True,
-                'victory': False,
-                'debug_info': {
-                    'cheat_used': '패패배',
-                    'game_session': {
-                        'current_turn': current_turn,
-                        'max_turns': max_turns
-                    }
-                }
-            })
-        
-        # AI 응답 생성 (간단한 규칙 기반 응답)
-        ai_response = ""
-        victory = False
+            logger.info("스트리밍 응답 시작 (게임 ID: %s)", game_id)
+            expected_version = game_session.get('version', 0)
+            return Response(
+                stream_with_context(stream_turn_events(game_id, game_session, message, system_prompt, claim, expected_version)),
+                mimetype='text/event-stream',
+                headers=SSE_HEADERS
+            )
         
-        # 카테고리별 응답 생성
-        if category == '플러팅':
-            if "전화" in message.lower() or "번호" in message.lower() or "연락처" in message.lower() or "만날래" in message.lower():
-                logger.info(f"승리 조건 키워드 감지: 전화번호 요청 (게임 ID: {game_id})")
-                ai_response = f"네! 제 전화번호는 010-1234-5678입니다. 언제든지 연락주세요! 만나면 좋을 것 같아요."
-                victory = True
-            else:
-                responses = [
-                    f"안녕하세요! 저는 {character_name}입니다. 어떻게 도와드릴까요?",
-                    "그렇군요. 더 자세히 이야기해 주실래요?",
-                    "재미있는 이야기네요. 어떤 일을 하시나요?",
-                    "방금 말씀하신 내용이 정말 흥미롭네요. 계속 말씀해주세요.",
-                    "오늘 날씨가 정말 좋네요, 그렇지 않나요?"
-                ]
-                ai_response = random.choice(responses)
-                logger.info(f"일반 응답 생성 (게임 ID: {game_id})")
-        else:
-            responses = [
-                f"안녕하세요! 저는 {character_name}입니다. 어떻게 도와드릴까요?",
-                "그렇군요. 더 자세히 이야기해 주실래요?",
-                "흥미로운 질문이네요. 다른 것도 궁금하신 점이 있으신가요?",
-                "네, 이해했습니다. 더 궁금한 점이 있으신가요?"
-            ]
-            ai_response = random.choice(responses)
-            logger.info(f"기타 카테고리 응답 생성 (게임 ID: {game_id})")
-        
-        # 게임 상태 업데이트
-        game_session['current_turn'] = current_turn + 1
-        
-        if victory:
-            logger.info(f"승리 조건 달성 (게임 ID: {game_id})")
-            game_session['victory'] = True
-            game_session['completed'] = True
-        elif current_turn + 1 > max_turns:
-            logger.info(f"턴 제한 초과로 게임 종료 (게임 ID: {game_id})")
-            game_session['completed'] = True
-        
-        # 응답 데이터
-        response_data = {
-            'success': True,
-            'game_id': game_id,
-            'response': ai_response,
-            'current_turn': game_session['current_turn'],
-            'max_turns': max_turns,
-            'completed': game_session.get('completed', False),
-            'victory': game_session.get('victory', False),
-            'debug_info': {
-                'message_keywords': [kw for kw in ['전화', '번호', '연락처', '만날래'] if kw in message.lower()],
-                'game_session': {
-                    'current_turn': game_session['current_turn'],
-                    'max_turns': max_turns,
-                    'category': category,
-                    'character': character_name
-                },
-                'victory_check': {
-                    'victory': victory, 
-                    'completed': game_session.get('completed', False)
-                }
-            }
-        }
-        
-        logger.info(f"질문 응답: 성공, 게임 ID={game_id}, 현재 턴={game_session['current_turn']}")
-        return jsonify(response_data)
+        response_data, status_code = run_turn(game_id, message)
+        with phase("serialization"):
+            return jsonify(response_data), status_code
     except Exception as e:
         logger.error(f"질문 처리 중 오류 발생: {str(e)}", exc_info=True)
-        response_data = {
+        response_data = with_debug_info({
             "success": False,
             "error": str(e),
-            "message": "질문을 처리하는 중 오류가 발생했습니다.",
-            "debug_info": {
-                "error_type": type(e).__name__,
-                "openai_available": OPENAI_AVAILABLE,
-                "api_key_valid": validate_api_key()[0],
-                "game_id": request.get_json(silent=True).get('game_id') if request.get_json(silent=True) else None
-            }
-        }
+            "message": "질문을 처리하는 중 오류가 발생했습니다."
+        }, lambda: {
+            "error_type": type(e).__name__,
+            "openai_available": OPENAI_AVAILABLE,
+            "api_key_valid": validate_api_key()[0],
+            "game_id": request.get_json(silent=True).get('game_id') if request.get_json(silent=True) else None
+        })
         return jsonify(response_data), 500
 
+# 일괄 질문 처리 설정
+ASK_BATCH_MAX_ITEMS = int(os.getenv("ASK_BATCH_MAX_ITEMS", 50))
+ASK_BATCH_CONCURRENCY = int(os.getenv("ASK_BATCH_CONCURRENCY", 8))
+_BATCH_EXECUTOR = None
+_BATCH_EXECUTOR_LOCK = threading.Lock()
+
+def get_batch_executor():
+    """일괄 질문 처리에 사용하는 공유 스레드 풀을 반환합니다."""
+    global _BATCH_EXECUTOR
+    if _BATCH_EXECUTOR is None:
+        with _BATCH_EXECUTOR_LOCK:
+            if _BATCH_EXECUTOR is None:
+                _BATCH_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=ASK_BATCH_CONCURRENCY,
+                    thread_name_prefix="ask-batch"
+                )
+    return _BATCH_EXECUTOR
+
+# 한 게임의 턴을 순서대로 처리
+def run_game_turns(turns):
+    """같은 게임의 턴 목록 [(인덱스, 게임 ID, 메시지)]을 순서대로 처리하고 [(인덱스, 결과)]를 반환합니다."""
+    results = []
+    for index, game_id, message in turns:
+        try:
+            response_data, status_code = run_turn(game_id, message)
+        except Exception as e:
+            logger.error(f"일괄 질문 처리 중 오류 발생: 게임 ID={game_id}, {str(e)}", exc_info=True)
+            response_data, status_code = {
+                "success": False,
+                "error": str(e),
+                "message": "질문을 처리하는 중 오류가 발생했습니다."
+            }, 500
+        results.append((index, dict(response_data, status=status_code)))
+    return results
+
+# 일괄 질문 API
+@app.route('/api/ask/batch', methods=['POST'])
+def ask_batch():
+    """여러 게임의 턴을 한 번의 요청으로 처리
+    
+    {"turns": [{"game_id": ..., "message": ...}, ...]} 형식의 요청을 받아 게임별로 동시에 처리합니다.
+    같은 게임의 턴은 요청 순서대로 하나씩 처리하며, 항목별 결과를 요청 순서대로 반환합니다.
+    일부 항목이 실패해도 나머지 결과는 그대로 반환합니다 (항목별 status 필드 확인).
+    """
+    with phase("json_parse"):
+        request_data = request.get_json(silent=True)
+    turns = request_data.get('turns') if isinstance(request_data, dict) else request_data
+    if not isinstance(turns, list) or not turns:
+        return jsonify({
+            "success": False,
+            "error": "turns 배열이 필요합니다."
+        }), 400
+    if len(turns) > ASK_BATCH_MAX_ITEMS:
+        return jsonify({
+            "success": False,
+            "error": f"한 번에 최대 {ASK_BATCH_MAX_ITEMS}개의 턴만 처리할 수 있습니다."
+        }), 413
+    
+    # API 키 확인 (일괄 요청 전체에 한 번만)
+    api_valid, api_message = validate_api_key()
+    if not api_valid:
+        logger.error(f"API 키 검증 실패: {api_message}")
+        return api_key_error_response(api_message)
+    
+    # 게임별로 턴을 묶어 같은 게임의 턴이 동시에 실행되지 않도록 함
+    results = [None] * len(turns)
+    games = {}
+    for index, turn in enumerate(turns):
+        if not isinstance(turn, dict):
+            results[index] = {"success": False, "error": "각 턴은 game_id와 message를 가진 객체여야 합니다.", "status": 400}
+            continue
+        game_id = turn.get('game_id')
+        message = turn.get('message') or turn.get('question')
+        if not isinstance(game_id, str) or not game_id or not isinstance(message, str) or not message:
+            results[index] = {"success": False, "error": "game_id와 message는 비어 있지 않은 문자열이어야 합니다.", "status": 400}
+            continue
+        games.setdefault(game_id, []).append((index, game_id, message))
+    
+    logger.info("일괄 질문 요청: 턴 %s개, 게임 %s개", len(turns), len(games))
+    executor = get_batch_executor()
+    futures = [
+        executor.submit(copy_current_request_context(run_game_turns), game_turns)
+        for game_turns in games.values()
+    ]
+    for future in futures:
+        for index, result in future.result():
+            results[index] = result
+    
+    succeeded = sum(1 for result in results if result.get('status') == 200)
+    with phase("serialization"):
+        return jsonify({
+            "success": succeeded == len(results),
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
+        })
+
 # 게임 종료 API
 @app.route('/api/end', methods=['POST'])
 def end_game():
@@ -795,9 +1623,15 @@ def end_game():
             'turns_played': game_session.get('current_turn', 1) - 1 if game_session else 0
         }
         
-        # 게임 세션 데이터 삭제 (테스트 모드가 아닌 경우에만)
-        if game_id in GAME_SESSIONS and not is_test:
-            del GAME_SESSIONS[game_id]
+        # 게임 로그 기록 및 세션 데이터 삭제 (테스트 모드가 아닌 경우에만)
+        if game_session and not is_test:
+            save_game_log(game_id, dict(
+                result_summary,
+                item_id=game_session.get('id'),
+                creation_time=game_session.get('creation_time'),
+                end_time=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+            ))
+            GAME_SESSIONS.delete(game_id)
         
         return jsonify({
             'message': '게임이 종료되었습니다.',
@@ -815,7 +1649,7 @@ def end_game():
 def add_cors_headers(response):
     """모든 응답에 CORS 헤더를 추가합니다."""
     response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,X-Debug-Info')
     response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,DELETE,OPTIONS')
     response.headers.add('Access-Control-Allow-Credentials', 'false')
     return response
@@ -0,0 +1,336 @@
+"""
+LLM 게이트웨이
+
+프로세스 전체에서 하나의 OpenAI 클라이언트(동기/비동기)를 공유하여
+HTTP keep-alive와 TLS 세션을 재사용하고, 모델별 동시 요청 수를 제한합니다.
+동시 요청 한도를 넘는 요청은 대기열에서 기다리며, 마감 시간까지 차례가
+오지 않으면 LLMQueueTimeout 예외가 발생합니다.
+
+마감 시간(deadline)을 지정한 동기 요청은 SDK 재시도 대신 마감 시간 안에서만 재시도하므로
+재시도를 포함한 전체 시간이 마감 시간을 넘지 않습니다.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+logger = logging.getLogger("api.llm_gateway")
+
+# 여러 가능한 API 키 환경 변수 이름
+API_KEY_ENV_NAMES = ['OPENAI_API_KEY', 'OPENAI_KEY', 'OPEN_AI_KEY', 'OPENAI']
+
+# 마감 시간 안에서 재시도할 때의 첫 대기 시간(초, 재시도마다 두 배)
+RETRY_BACKOFF = 0.25
+
+
+class LLMQueueTimeout(Exception):
+    """마감 시간 안에 LLM 요청 슬롯을 얻지 못한 경우 발생하는 예외"""
+
+
+def resolve_api_key():
+    """환경 변수에서 OpenAI API 키를 찾습니다."""
+    for key_name in API_KEY_ENV_NAMES:
+        api_key = os.environ.get(key_name)
+        if api_key:
+            return api_key
+    return None
+
+
+class LLMGateway:
+    """공유 연결 풀과 모델별 동시성 제한을 제공하는 LLM 게이트웨이"""
+
+    def __init__(self, api_key=None, max_connections=100, max_keepalive=20,
+                 max_concurrency=16, queue_timeout=10.0, request_timeout=30.0, max_retries=2):
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._client = None
+        self._deadline_client = None
+        self._async_client = None
+        self._semaphores = {}
+        self._async_semaphores = {}
+        self._stats = {}
+
+    # 클라이언트 생성
+    @property
+    def client(self):
+        """공유 동기 OpenAI 클라이언트"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    from openai import OpenAI
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        timeout=self.request_timeout,
+                        max_retries=self.max_retries,
+                        http_client=httpx.Client(
+                            limits=self._limits(httpx),
+                            timeout=self.request_timeout
+                        )
+                    )
+                    logger.info("공유 OpenAI 클라이언트 생성")
+        return self._client
+
+    @property
+    def deadline_client(self):
+        """마감 시간 안에서 직접 재시도하는 요청에 사용하는 SDK 재시도 없는 동기 클라이언트 (연결 풀 공유)"""
+        if self._deadline_client is None:
+            client = self.client
+            with self._lock:
+                if self._deadline_client is None:
+                    self._deadline_client = client.with_options(max_retries=0)
+        return self._deadline_client
+
+    @property
+    def async_client(self):
+        """공유 비동기 OpenAI 클라이언트"""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    import httpx
+                    from openai import AsyncOpenAI
+                    self._async_client = AsyncOpenAI(
+                        api_key=self.api_key,
+                        timeout=self.request_timeout,
+                        max_retries=self.max_retries,
+                        http_client=httpx.AsyncClient(
+                            limits=self._limits(httpx),
+                            timeout=self.request_timeout
+                        )
+                    )
+                    logger.info("공유 AsyncOpenAI 클라이언트 생성")
+        return self._async_client
+
+    def _limits(self, httpx):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive
+        )
+
+    # 모델별 동시성 제한
+    def _model_stats(self, model):
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats.setdefault(model, {
+                "in_flight": 0,
+                "queued": 0,
+                "completed": 0,
+                "errors": 0,
+                "queue_timeouts": 0,
+                "queue_wait_ms_total": 0.0
+            })
+        return stats
+
+    def _semaphore(self, model):
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.setdefault(
+                    model, threading.BoundedSemaphore(self.max_concurrency)
+                )
+        return semaphore
+
+    def _async_semaphore(self, model):
+        # asyncio 세마포어는 이벤트 루프에 묶이므로 루프별로 관리
+        # (asyncio는 비동기 경로에서만 필요하므로 콜드 스타트 시 import하지 않음)
+        import asyncio
+        key = (id(asyncio.get_running_loop()), model)
+        semaphore = self._async_semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._async_semaphores.setdefault(
+                key, asyncio.Semaphore(self.max_concurrency)
+            )
+        return semaphore
+
+    def _deadline(self, deadline):
+        return deadline if deadline is not None else time.monotonic() + self.queue_timeout
+
+    def _remaining(self, deadline):
+        return max(0.0, deadline - time.monotonic())
+
+    def _update(self, model, **changes):
+        with self._lock:
+            stats = self._model_stats(model)
+            for name, amount in changes.items():
+                stats[name] += amount
+
+    def _on_queue_timeout(self, model, deadline):
+        self._update(model, queued=-1, queue_timeouts=1)
+        logger.warning(f"LLM 요청 대기 시간 초과: model={model}")
+        raise LLMQueueTimeout(f"LLM 요청 대기열 마감 시간을 초과했습니다: {model}")
+
+    @contextmanager
+    def slot(self, model, deadline=None):
+        """모델별 요청 슬롯을 얻습니다. deadline은 time.monotonic() 기준 시각입니다."""
+        deadline = self._deadline(deadline)
+        semaphore = self._semaphore(model)
+        started = time.monotonic()
+        self._update(model, queued=1)
+        if not semaphore.acquire(timeout=self._remaining(deadline)):
+            self._on_queue_timeout(model, deadline)
+        self._update(model, queued=-1, in_flight=1,
+                     queue_wait_ms_total=(time.monotonic() - started) * 1000)
+        try:
+            yield self._remaining(deadline)
+        except Exception:
+            self._update(model, errors=1)
+            raise
+        finally:
+            self._update(model, in_flight=-1, completed=1)
+            semaphore.release()
+
+    @asynccontextmanager
+    async def async_slot(self, model, deadline=None):
+        """slot의 비동기 버전"""
+        import asyncio
+        deadline = self._deadline(deadline)
+        semaphore = self._async_semaphore(model)
+        started = time.monotonic()
+        self._update(model, queued=1)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self._remaining(deadline))
+        except asyncio.TimeoutError:
+            self._on_queue_timeout(model, deadline)
+        self._update(model, queued=-1, in_flight=1,
+                     queue_wait_ms_total=(time.monotonic() - started) * 1000)
+        try:
+            yield self._remaining(deadline)
+        except Exception:
+            self._update(model, errors=1)
+            raise
+        finally:
+            self._update(model, in_flight=-1, completed=1)
+            semaphore.release()
+
+    def _timeout(self, deadline, remaining):
+        # 호출자가 마감 시간을 지정한 경우 남은 시간 안에서만 응답을 기다림
+        if deadline is None:
+            return self.request_timeout
+        return max(0.1, min(self.request_timeout, remaining))
+
+    # 요청 메서드
+    def chat(self, model, messages, deadline=None, **kwargs):
+        """채팅 완성 요청을 보냅니다."""
+        with self.slot(model, deadline) as remaining:
+            if deadline is not None:
+                return self._chat_before_deadline(model, messages, deadline, kwargs)
+            return self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=kwargs.pop('timeout', self._timeout(deadline, remaining)),
+                **kwargs
+            )
+
+    def _chat_before_deadline(self, model, messages, deadline, kwargs):
+        # 연결 오류, 429, 5xx 응답은 마감 시간이 남아 있는 동안 최대 max_retries번 재시도
+        import openai
+        timeout = kwargs.pop('timeout', None)
+        attempt = 0
+        while True:
+            try:
+                return self.deadline_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    timeout=timeout or self._timeout(deadline, self._remaining(deadline)),
+                    **kwargs
+                )
+            except (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError):
+                backoff = RETRY_BACKOFF * 2 ** attempt
+                attempt += 1
+                if attempt > self.max_retries or self._remaining(deadline) <= backoff:
+                    raise
+                time.sleep(backoff)
+
+    def chat_stream(self, model, messages, deadline=None, **kwargs):
+        """채팅 완성 응답 청크를 스트리밍합니다.
+
+        스트림을 끝까지 읽거나 제너레이터를 close()할 때까지 슬롯을 점유합니다.
+        """
+        with self.slot(model, deadline) as remaining:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                timeout=kwargs.pop('timeout', self._timeout(deadline, remaining)),
+                **kwargs
+            )
+            try:
+                for chunk in stream:
+                    yield chunk
+            finally:
+                stream.close()
+
+    async def achat(self, model, messages, deadline=None, **kwargs):
+        """채팅 완성 요청을 비동기로 보냅니다."""
+        async with self.async_slot(model, deadline) as remaining:
+            return await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=kwargs.pop('timeout', self._timeout(deadline, remaining)),
+                **kwargs
+            )
+
+    async def achat_stream(self, model, messages, deadline=None, **kwargs):
+        """chat_stream의 비동기 버전 (스트림을 끝까지 읽거나 aclose()할 때까지 슬롯을 점유)"""
+        async with self.async_slot(model, deadline) as remaining:
+            stream = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                timeout=kwargs.pop('timeout', self._timeout(deadline, remaining)),
+                **kwargs
+            )
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.close()
+
+    def has_capacity(self, model):
+        """모델의 동시 요청 슬롯에 여유가 있는지 확인합니다 (대기 중인 요청이 있으면 여유 없음)."""
+        with self._lock:
+            stats = self._stats.get(model)
+            return stats is None or stats["in_flight"] + stats["queued"] < self.max_concurrency
+
+    def stats(self):
+        """모델별 대기/진행/완료 카운터를 반환합니다."""
+        with self._lock:
+            return {model: dict(stats) for model, stats in self._stats.items()}
+
+
+_GATEWAY = None
+_GATEWAY_LOCK = threading.Lock()
+
+
+def get_gateway():
+    """프로세스 전체에서 공유하는 LLM 게이트웨이를 반환합니다.
+
+    LLM_MAX_CONNECTIONS: 공유 연결 풀의 최대 연결 수
+    LLM_MAX_KEEPALIVE: 유지할 keep-alive 연결 수
+    LLM_MAX_CONCURRENCY: 모델별 최대 동시 요청 수
+    LLM_QUEUE_TIMEOUT: 요청 슬롯 대기 마감 시간(초)
+    LLM_REQUEST_TIMEOUT: 개별 요청 시간 제한(초)
+    LLM_MAX_RETRIES: 재시도 횟수 (마감 시간을 지정한 요청은 마감 시간 안에서만 재시도)
+    """
+    global _GATEWAY
+    if _GATEWAY is None:
+        with _GATEWAY_LOCK:
+            if _GATEWAY is None:
+                _GATEWAY = LLMGateway(
+                    api_key=resolve_api_key(),
+                    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 100)),
+                    max_keepalive=int(os.getenv("LLM_MAX_KEEPALIVE", 20)),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 16)),
+                    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", 10)),
+                    request_timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", 30)),
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", 2))
+                )
+    return _GATEWAY
@@ -0,0 +1,217 @@
+"""
+비동기 구조화 로깅
+
+로그 기록을 QueueHandler로 대기열에 넣고, 백그라운드 QueueListener가
+JSON(또는 텍스트) 형식으로 출력합니다. 요청을 처리하는 스레드는 기록을
+대기열에 넣기만 하므로 stderr 쓰기와 포맷팅 비용을 부담하지 않습니다.
+
+프롬프트나 요청 본문처럼 양이 많은 기록은 extra={"category": ...}로 분류해
+카테고리별로 표본 추출(LOG_SAMPLE)하거나 초당 기록 수를 제한(LOG_RATE_LIMIT)할 수 있습니다.
+
+    logger.debug("시스템 프롬프트: %s", prompt, extra={"category": PROMPT})
+
+메시지는 %-형식 인자로 넘겨야 해당 레벨이 꺼져 있을 때 포맷팅 비용이 들지 않습니다.
+
+환경 변수:
+    LOG_LEVEL: 루트 로그 레벨 (기본값 INFO)
+    LOG_FORMAT: json 또는 text (기본값 json)
+    LOG_ASYNC: false이면 대기열 없이 바로 출력 (Vercel(VERCEL 환경 변수)에서는 false가 기본값.
+        응답 직후 프로세스가 멈추면 리스너가 출력하지 못한 기록을 잃을 수 있음)
+    LOG_SAMPLE: 카테고리별 기록 비율 (예: prompt=0.1,body=0.05)
+    LOG_RATE_LIMIT: 카테고리별 초당 최대 기록 수 (예: prompt=5,body=10)
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import traceback
+from logging.handlers import QueueHandler, QueueListener
+
+# 양이 많은 기록 카테고리
+PROMPT = "prompt"
+BODY = "body"
+HEADERS = "headers"
+RESPONSE = "response"
+
+# 지연 포맷팅해도 안전한 (이후에 바뀌지 않는) 인자 타입
+IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), bytes)
+
+# JSON 출력에서 제외할 LogRecord 기본 속성
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_LISTENER = None
+_FILTER = None
+_CONFIGURE_LOCK = threading.Lock()
+
+
+class JSONFormatter(logging.Formatter):
+    """로그 기록을 한 줄짜리 JSON으로 변환합니다. extra로 넘긴 필드도 함께 기록합니다."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class CategoryFilter(logging.Filter):
+    """카테고리별 표본 추출과 초당 기록 수 제한을 적용하는 필터
+
+    category가 없는 기록은 항상 통과합니다.
+    """
+
+    def __init__(self, sample_rates=None, rate_limits=None):
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limits = dict(rate_limits or {})
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._dropped = {}
+
+    def filter(self, record):
+        category = getattr(record, "category", None)
+        if category is None:
+            return True
+
+        rate = self.sample_rates.get(category)
+        if rate is not None and random.random() >= rate:
+            return self._drop(category)
+
+        limit = self.rate_limits.get(category)
+        if limit is not None:
+            now = int(time.monotonic())
+            with self._lock:
+                second, count = self._windows.get(category, (now, 0))
+                if second != now:
+                    second, count = now, 0
+                if count >= limit:
+                    self._windows[category] = (second, count)
+                    self._dropped[category] = self._dropped.get(category, 0) + 1
+                    return False
+                self._windows[category] = (second, count + 1)
+        return True
+
+    def _drop(self, category):
+        with self._lock:
+            self._dropped[category] = self._dropped.get(category, 0) + 1
+        return False
+
+    def stats(self):
+        with self._lock:
+            return dict(self._dropped)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """포맷팅을 백그라운드 리스너로 미루는 QueueHandler
+
+    기본 QueueHandler는 대기열에 넣기 전에 메시지를 포맷팅합니다. 인자가 모두
+    변경 불가능한 값이면 포맷팅을 리스너 스레드로 미루고, 딕셔너리처럼 이후에
+    바뀔 수 있는 인자가 있으면 기록 시점의 내용을 남기기 위해 바로 포맷팅합니다.
+    """
+
+    def prepare(self, record):
+        args = record.args
+        # 딕셔너리 인자 하나는 LogRecord에 그대로 args로 저장되므로 항상 바로 포맷팅
+        if args and (isinstance(args, dict) or not all(isinstance(arg, IMMUTABLE_ARG_TYPES) for arg in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # 트레이스백 프레임을 붙잡아 두지 않도록 문자열로 변환
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+
+def _parse_mapping(value, cast):
+    """"prompt=0.1,body=0.05" 형식의 설정값을 딕셔너리로 변환합니다."""
+    result = {}
+    for part in (value or "").split(","):
+        if "=" not in part:
+            continue
+        key, _, raw = part.partition("=")
+        try:
+            result[key.strip()] = cast(raw.strip())
+        except ValueError:
+            continue
+    return result
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def async_output_enabled():
+    """LOG_ASYNC 설정에 따라 대기열을 통해 출력할지 판단합니다.
+
+    서버리스(Vercel) 환경은 응답을 보낸 직후 프로세스를 멈출 수 있으므로 기본적으로 바로 출력합니다.
+    """
+    default = "false" if os.getenv("VERCEL") else "true"
+    return os.getenv("LOG_ASYNC", default).lower() not in ("0", "false", "no")
+
+
+def configure_logging(level=None, fmt=None, async_output=None, stream=None):
+    """루트 로거에 비동기 구조화 로깅을 설정합니다. 여러 번 호출해도 한 번만 설정됩니다."""
+    global _LISTENER, _FILTER
+    if _FILTER is not None:
+        return
+    with _CONFIGURE_LOCK:
+        if _FILTER is not None:
+            return
+
+        level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+        fmt = fmt or os.getenv("LOG_FORMAT", "json").lower()
+        if async_output is None:
+            async_output = async_output_enabled()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+        category_filter = CategoryFilter(
+            sample_rates=_parse_mapping(os.getenv("LOG_SAMPLE"), float),
+            rate_limits=_parse_mapping(os.getenv("LOG_RATE_LIMIT"), int)
+        )
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(level)
+
+        if async_output:
+            handler = DeferredQueueHandler(queue.SimpleQueue())
+            _LISTENER = QueueListener(handler.queue, output, respect_handler_level=True)
+            _LISTENER.start()
+            atexit.register(shutdown_logging)
+        else:
+            handler = output
+        handler.addFilter(category_filter)
+        root.addHandler(handler)
+        _FILTER = category_filter
+
+
+def shutdown_logging():
+    """대기 중인 로그를 모두 출력하고 리스너를 종료합니다."""
+    global _LISTENER
+    listener, _LISTENER = _LISTENER, None
+    if listener is not None:
+        listener.stop()
+
+
+def logging_stats():
+    """카테고리별로 버려진 기록 수를 반환합니다."""
+    return {"async": _LISTENER is not None, "dropped": _FILTER.stats() if _FILTER else {}}
@@ -0,0 +1,247 @@
+"""
+요청 처리 시간 측정 및 메트릭
+
+Flask 앱에 before/after_request 훅을 등록해 경로별 응답 시간 히스토그램을 기록하고,
+요청 처리 중 구간(JSON 파싱, 세션 조회, 프롬프트 구성, LLM 대기, 승리 조건 확인,
+직렬화)별 소요 시간을 phase()로 측정합니다. LLM 토큰 수와 응답 캐시 적중 여부도
+함께 집계하며, 모든 메트릭은 Prometheus 텍스트 형식으로 내보냅니다.
+
+구간별 시간은 Server-Timing 응답 헤더로도 전달되므로 브라우저 개발자 도구에서
+요청 하나의 구간별 시간을 바로 확인할 수 있습니다.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger("api.metrics")
+
+# 히스토그램 버킷 (초)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 요청 밖(스크립트, 백그라운드 작업)에서 측정한 구간의 경로 라벨
+NO_ROUTE = "none"
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """누적 버킷 방식의 지연 시간 히스토그램"""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class MetricsRegistry:
+    """요청/구간 히스토그램과 토큰·캐시 카운터 저장소"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._phases = {}
+        self._tokens = {}
+        self._cache = {}
+        self._gauges = []
+
+    # 기록
+    def observe_request(self, method, route, status, seconds):
+        key = (method, route, str(status))
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_phase(self, route, phase, seconds):
+        key = (route, phase)
+        with self._lock:
+            histogram = self._phases.get(key)
+            if histogram is None:
+                histogram = self._phases[key] = Histogram(PHASE_BUCKETS)
+            histogram.observe(seconds)
+
+    def add_tokens(self, model, kind, count):
+        if not count:
+            return
+        key = (model, kind)
+        with self._lock:
+            self._tokens[key] = self._tokens.get(key, 0) + count
+
+    def count_cache(self, result):
+        with self._lock:
+            self._cache[result] = self._cache.get(result, 0) + 1
+
+    def register_gauges(self, collector):
+        """내보낼 때마다 호출되어 (이름, 도움말, [(라벨, 값)]) 목록을 반환하는 함수를 등록합니다."""
+        self._gauges.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._phases.clear()
+            self._tokens.clear()
+            self._cache.clear()
+
+    # 내보내기
+    def render(self):
+        """모든 메트릭을 Prometheus 텍스트 형식으로 반환합니다."""
+        with self._lock:
+            requests = {key: _copy(histogram) for key, histogram in self._requests.items()}
+            phases = {key: _copy(histogram) for key, histogram in self._phases.items()}
+            tokens = dict(self._tokens)
+            cache = dict(self._cache)
+
+        lines = []
+        _render_histogram(
+            lines, "http_request_duration_seconds", "경로별 요청 처리 시간",
+            ("method", "route", "status"), requests
+        )
+        _render_histogram(
+            lines, "request_phase_duration_seconds", "요청 처리 구간별 소요 시간",
+            ("route", "phase"), phases
+        )
+        lines.append("# HELP llm_tokens_total LLM 요청/응답 토큰 수")
+        lines.append("# TYPE llm_tokens_total counter")
+        for (model, kind), count in sorted(tokens.items()):
+            lines.append(f"llm_tokens_total{_labels(model=model, kind=kind)} {count}")
+        lines.append("# HELP completion_cache_lookups_total 응답 캐시 조회 결과")
+        lines.append("# TYPE completion_cache_lookups_total counter")
+        for result, count in sorted(cache.items()):
+            lines.append(f"completion_cache_lookups_total{_labels(result=result)} {count}")
+
+        for collector in self._gauges:
+            try:
+                gauges = collector()
+            except Exception as e:
+                logger.warning(f"게이지 메트릭 수집 실패: {e}")
+                continue
+            for name, help_text, samples in gauges:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(**labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _copy(histogram):
+    copied = Histogram(histogram.buckets)
+    copied.counts = list(histogram.counts)
+    copied.total = histogram.total
+    copied.count = histogram.count
+    return copied
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _render_histogram(lines, name, help_text, label_names, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key))
+        for bound, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.total:.6f}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+
+METRICS = MetricsRegistry()
+
+
+# 요청 구간 측정
+def current_route():
+    """현재 요청의 경로 규칙을 반환합니다. (요청 밖이면 none)"""
+    if not has_request_context():
+        return NO_ROUTE
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+def record_phase(phase, seconds):
+    """구간 소요 시간을 기록합니다. 같은 요청에서 여러 번 측정하면 합산해 Server-Timing에 표시합니다."""
+    METRICS.observe_phase(current_route(), phase, seconds)
+    if has_request_context():
+        timings = g.setdefault("phase_timings", {})
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def phase(name):
+    """with 블록의 실행 시간을 요청 처리 구간으로 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+def record_tokens(model, prompt_tokens=0, completion_tokens=0, cached_prompt_tokens=0):
+    METRICS.add_tokens(model, "prompt", prompt_tokens)
+    METRICS.add_tokens(model, "completion", completion_tokens)
+    # 제공자 프롬프트 캐시에서 처리된 입력 토큰 (prompt에 포함된 값)
+    METRICS.add_tokens(model, "cached_prompt", cached_prompt_tokens)
+
+
+def record_cache_lookup(hit):
+    METRICS.count_cache("hit" if hit else "miss")
+
+
+def render_metrics():
+    return METRICS.render()
+
+
+# Flask 연동
+def init_app(app):
+    """요청 시작/종료 훅을 등록해 경로별 요청 처리 시간을 기록합니다.
+
+    스트리밍 응답은 헤더를 보낼 때까지의 시간이 기록되며, 스트리밍 중 측정한
+    구간 시간은 request_phase_duration_seconds에만 반영됩니다.
+    """
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_time(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        METRICS.observe_request(request.method, current_route(), response.status_code, elapsed)
+
+        timings = g.get("phase_timings")
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in (timings or {}).items()]
+        entries.append(f"total;dur={elapsed * 1000:.2f}")
+        response.headers["Server-Timing"] = ", ".join(entries)
+        return response
+
+    return app
@@ -0,0 +1,271 @@
+"""
+아이템 프롬프트 레지스트리
+
+아이템 프롬프트 파일(<item_id>.json)을 한 번만 읽어 메모리에 보관하고,
+파일의 수정 시각(mtime)이 바뀌었거나 관리자 API가 저장한 항목만 다시 읽습니다.
+공통 시스템 프롬프트 템플릿은 아이템별로 고정된 필드를 미리 채워 두고,
+턴마다 바뀌는 필드가 들어 있는 줄은 시스템 프롬프트에서 떼어 내 대화 끝에 붙이는
+턴 상태 메시지로 보냅니다. 시스템 프롬프트는 아이템마다 바이트 단위까지 고정되므로
+OpenAI의 프롬프트 접두사 캐시가 턴이 바뀌어도 적용됩니다.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from string import Formatter
+
+try:
+    from api.context_window import count_tokens
+except ImportError:
+    from context_window import count_tokens
+
+logger = logging.getLogger("api.prompt_registry")
+
+# 턴마다 값이 바뀌는 템플릿 필드
+DYNAMIC_FIELDS = ("current_turn", "remaining_turns")
+
+# OpenAI가 프롬프트 접두사 캐시를 적용하는 최소 프롬프트 토큰 수
+PROVIDER_CACHE_MIN_TOKENS = 1024
+
+
+def has_dynamic_field(text, dynamic_fields=DYNAMIC_FIELDS):
+    """텍스트(템플릿)에 턴마다 바뀌는 필드가 들어 있는지 확인합니다."""
+    return any(
+        field_name is not None and field_name.split('.')[0].split('[')[0] in dynamic_fields
+        for _, field_name, _, _ in Formatter().parse(text)
+    )
+
+
+class CompiledTemplate:
+    """고정 필드를 미리 채운 프롬프트 템플릿"""
+
+    def __init__(self, template, static_fields, dynamic_fields=DYNAMIC_FIELDS):
+        self.template = template
+        self.static_fields = static_fields
+        self.dynamic_fields = tuple(dynamic_fields)
+        self.parts = self._compile(template, static_fields)
+
+    def _compile(self, template, static_fields):
+        # 고정 필드는 지금 포맷하고, 동적 필드는 (이름, 변환, 형식) 튜플로 남김
+        formatter = Formatter()
+        parts = []
+        literal = []
+        for text, field_name, format_spec, conversion in formatter.parse(template):
+            literal.append(text)
+            if field_name is None:
+                continue
+            if field_name in self.dynamic_fields:
+                parts.append(''.join(literal))
+                literal = []
+                parts.append((field_name, conversion, format_spec))
+            else:
+                value = formatter.get_field(field_name, (), static_fields)[0]
+                value = formatter.convert_field(value, conversion)
+                literal.append(formatter.format_field(value, format_spec or ''))
+        parts.append(''.join(literal))
+        return [part for part in parts if part != '']
+
+    def render(self, **dynamic_values):
+        """동적 필드를 치환하여 최종 프롬프트를 반환합니다."""
+        if len(self.parts) == 1 and isinstance(self.parts[0], str):
+            return self.parts[0]
+        formatter = Formatter()
+        rendered = []
+        for part in self.parts:
+            if isinstance(part, str):
+                rendered.append(part)
+            else:
+                field_name, conversion, format_spec = part
+                value = formatter.convert_field(dynamic_values[field_name], conversion)
+                rendered.append(formatter.format_field(value, format_spec or ''))
+        return ''.join(rendered)
+
+
+class PromptLayout:
+    """아이템별로 고정된 시스템 프롬프트 접두사와 턴 상태 메시지 템플릿
+
+    템플릿에서 턴마다 바뀌는 필드가 들어 있는 줄과 state_template은 상태 메시지로 옮기고,
+    나머지 줄은 고정 필드를 채워 접두사(prefix)로 한 번만 만들어 둡니다.
+    raw가 참이면 템플릿을 치환하지 않고 그대로 접두사로 사용합니다
+    (아이템 프롬프트의 system_prompt).
+    """
+
+    __slots__ = ("template", "static_fields", "state_template", "raw", "prefix", "state", "_prefix_tokens")
+
+    def __init__(self, template, static_fields, state_template=None, raw=False):
+        self.template = template
+        self.static_fields = static_fields
+        self.state_template = state_template
+        self.raw = raw
+        state_lines = []
+        if raw:
+            self.prefix = template
+        else:
+            prefix_lines = []
+            for line in template.split("\n"):
+                (state_lines if has_dynamic_field(line) else prefix_lines).append(line)
+            self.prefix = CompiledTemplate("\n".join(prefix_lines), static_fields).render()
+        if state_template:
+            state_lines.append(state_template)
+        self.state = CompiledTemplate(
+            "\n".join(line.strip() for line in state_lines), static_fields
+        ) if state_lines else None
+        self._prefix_tokens = None
+
+    def render_state(self, **dynamic_values):
+        """턴 상태 메시지를 반환합니다. (상태로 옮긴 줄이 없으면 None)"""
+        return self.state.render(**dynamic_values) if self.state is not None else None
+
+    def prefix_stats(self):
+        """접두사 길이 (문자 수, UTF-8 바이트 수, 토큰 수)"""
+        if self._prefix_tokens is None:
+            self._prefix_tokens = count_tokens(self.prefix)
+        return {
+            "chars": len(self.prefix),
+            "bytes": len(self.prefix.encode("utf-8")),
+            "tokens": self._prefix_tokens,
+            "cacheable": self._prefix_tokens >= PROVIDER_CACHE_MIN_TOKENS
+        }
+
+
+class PromptRegistry:
+    """아이템 프롬프트 파일을 캐시하고 변경된 항목만 다시 읽는 레지스트리"""
+
+    def __init__(self, directory, check_interval=2.0):
+        self.directory = str(directory)
+        self.check_interval = check_interval
+        self._entries = {}
+        self._last_checked = {}
+        self._templates = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._stats = {"hits": 0, "reloads": 0, "missing": 0}
+
+    def _path(self, item_id):
+        return os.path.join(self.directory, f"{item_id}.json")
+
+    def _read(self, item_id):
+        # 파일을 읽어 (mtime, 데이터)를 반환, 파일이 없으면 None
+        path = self._path(item_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return mtime, json.load(f)
+
+    def load_all(self):
+        """디렉토리의 모든 아이템 프롬프트를 로드합니다."""
+        with self._lock:
+            self._entries.clear()
+            now = time.monotonic()
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                names = []
+            for name in names:
+                if not name.endswith('.json'):
+                    continue
+                item_id = name[:-len('.json')]
+                try:
+                    entry = self._read(item_id)
+                except Exception as e:
+                    logger.error(f"아이템 프롬프트 로드 중 오류 발생: {name}: {e}")
+                    continue
+                if entry is not None:
+                    self._entries[item_id] = entry
+                    self._last_checked[item_id] = now
+            self._loaded = True
+            logger.info(f"아이템 프롬프트 레지스트리 로드 완료: {len(self._entries)}개")
+
+    def preload(self, entries):
+        """미리 읽어 둔 {아이템 ID: [mtime, 데이터]}로 레지스트리를 채웁니다 (시작 스냅샷 사용 시).
+
+        이후에는 평소처럼 파일 mtime을 확인하여 바뀐 항목만 다시 읽습니다.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._entries = {str(item_id): tuple(entry) for item_id, entry in entries.items()}
+            self._last_checked = dict.fromkeys(self._entries, now)
+            self._templates.clear()
+            self._loaded = True
+
+    def get(self, item_id):
+        """아이템 프롬프트를 반환합니다. 반환된 dict는 공유되므로 수정하지 마세요."""
+        if item_id is None:
+            return None
+        if not self._loaded:
+            self.load_all()
+        item_id = str(item_id)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_checked.get(item_id, float('-inf')) >= self.check_interval:
+                self._last_checked[item_id] = now
+                self._refresh(item_id)
+            entry = self._entries.get(item_id)
+            if entry is None:
+                self._stats["missing"] += 1
+                return None
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def _refresh(self, item_id):
+        # 파일의 mtime이 바뀐 경우에만 해당 항목을 다시 읽음
+        try:
+            mtime = os.stat(self._path(item_id)).st_mtime_ns
+        except FileNotFoundError:
+            if self._entries.pop(item_id, None) is not None:
+                self._templates.pop(item_id, None)
+            return
+        entry = self._entries.get(item_id)
+        if entry is not None and entry[0] == mtime:
+            return
+        try:
+            entry = self._read(item_id)
+        except Exception as e:
+            logger.error(f"아이템 프롬프트 로드 중 오류 발생: {item_id}: {e}")
+            return
+        if entry is not None:
+            self._entries[item_id] = entry
+            self._templates.pop(item_id, None)
+            self._stats["reloads"] += 1
+            logger.info(f"아이템 프롬프트 갱신: {item_id}")
+
+    def invalidate(self, item_id):
+        """아이템 프롬프트를 즉시 다시 읽습니다 (관리자 API 저장 후 호출)."""
+        item_id = str(item_id)
+        with self._lock:
+            self._last_checked[item_id] = time.monotonic()
+            self._entries.pop(item_id, None)
+            self._templates.pop(item_id, None)
+            self._refresh(item_id)
+
+    def compile_layout(self, item_id, template, static_fields, state_template=None, raw=False):
+        """아이템의 고정 접두사와 턴 상태 템플릿(PromptLayout)을 반환합니다.
+
+        템플릿, 고정 필드, 상태 템플릿이 그대로이면 같은 접두사 문자열을 재사용합니다.
+        """
+        item_id = str(item_id)
+        with self._lock:
+            layout = self._templates.get(item_id)
+            if (layout is None or layout.template != template
+                    or layout.static_fields != static_fields
+                    or layout.state_template != state_template or layout.raw != raw):
+                layout = PromptLayout(template, static_fields, state_template, raw)
+                self._templates[item_id] = layout
+            return layout
+
+    def prefix_stats(self):
+        """아이템별 시스템 프롬프트 접두사 길이 (접두사 캐시 적용 여부 확인용)"""
+        with self._lock:
+            layouts = dict(self._templates)
+        return {item_id: layout.prefix_stats() for item_id, layout in sorted(layouts.items())}
+
+    def stats(self):
+        """레지스트리 상태를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["compiled_templates"] = len(self._templates)
+        return stats
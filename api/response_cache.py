@@ -0,0 +1,197 @@
+"""
+NPC 응답 캐시
+
+temperature가 낮은 요청은 같은 입력에 대해 거의 같은 응답을 돌려주므로,
+(모델, 시스템 프롬프트, 대화 창, temperature, max_tokens)의 해시를 키로
+완성 결과를 캐시합니다. 메모리 계층은 LRU + TTL로 관리하며, 선택적으로
+디스크 계층을 두어 프로세스 재시작 후에도 캐시를 재사용할 수 있습니다.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    from api.serialization import dumps_bytes, loads
+except ImportError:
+    from serialization import dumps_bytes, loads
+
+logger = logging.getLogger("api.response_cache")
+
+
+class CompletionCache:
+    """LRU + TTL 메모리 계층과 선택적 디스크 계층을 갖는 완성 결과 캐시"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, disk_dir=None,
+                 max_temperature=0.3, default_enabled=False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_temperature = max_temperature
+        self.default_enabled = default_enabled
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evicted": 0,
+            "expired": 0
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(model, system_prompt, messages, temperature, max_tokens):
+        """요청 내용으로 캐시 키를 생성합니다."""
+        payload = json.dumps(
+            [model, system_prompt, messages, temperature, max_tokens],
+            ensure_ascii=False,
+            separators=(',', ':'),
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def is_cacheable(self, temperature, ai_config=None):
+        """아이템 설정과 temperature로 캐시 사용 여부를 판단합니다.
+
+        아이템 프롬프트의 ai_config에 "cache" 값이 있으면 그 값을 따르고,
+        없으면 COMPLETION_CACHE_DEFAULT 설정을 따릅니다.
+        """
+        enabled = (ai_config or {}).get('cache', self.default_enabled)
+        return bool(enabled) and temperature is not None and temperature <= self.max_temperature
+
+    def _count(self, **changes):
+        for name, amount in changes.items():
+            self._stats[name] += amount
+
+    def get(self, key):
+        """캐시된 응답을 반환합니다. 없거나 만료된 경우 None을 반환합니다."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count(hits=1, memory_hits=1)
+                    return value
+                del self._entries[key]
+                self._count(expired=1)
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._count(misses=1)
+                return None
+            self._count(hits=1, disk_hits=1)
+        # 디스크에서 찾은 항목은 메모리 계층으로 올림
+        self._memory_set(key, value, now)
+        return value
+
+    def set(self, key, value):
+        """응답을 캐시에 저장합니다."""
+        now = time.time()
+        self._memory_set(key, value, now)
+        with self._lock:
+            self._count(sets=1)
+        self._disk_set(key, value, now)
+
+    def _memory_set(self, key, value, now):
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count(evicted=1)
+
+    # 디스크 계층
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"디스크 캐시 읽기 실패: {e}")
+            return None
+        if entry.get('expires_at', 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._count(expired=1)
+            return None
+        return entry.get('value')
+
+    def _disk_set(self, key, value, now):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 임시 파일에 기록한 뒤 교체하여 읽는 쪽이 부분 기록을 보지 않도록 함
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(dumps_bytes({"expires_at": now + self.ttl_seconds, "value": value}))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"디스크 캐시 기록 실패: {e}")
+
+    def clear(self):
+        """메모리 계층을 비웁니다."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """캐시 히트율 및 카운터를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["disk_enabled"] = bool(self.disk_dir)
+        return stats
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_completion_cache():
+    """프로세스 전체에서 공유하는 완성 결과 캐시를 반환합니다.
+
+    COMPLETION_CACHE_MAX_ENTRIES: 메모리 계층 최대 항목 수
+    COMPLETION_CACHE_TTL: 캐시 유지 시간(초)
+    COMPLETION_CACHE_DIR: 디스크 계층 디렉토리 (설정하지 않으면 사용 안 함)
+    COMPLETION_CACHE_MAX_TEMPERATURE: 캐시를 허용하는 최대 temperature
+    COMPLETION_CACHE_DEFAULT: 아이템에 cache 설정이 없을 때의 기본 사용 여부
+    """
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = CompletionCache(
+                    max_entries=int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", 1024)),
+                    ttl_seconds=int(os.getenv("COMPLETION_CACHE_TTL", 3600)),
+                    disk_dir=os.getenv("COMPLETION_CACHE_DIR") or None,
+                    max_temperature=float(os.getenv("COMPLETION_CACHE_MAX_TEMPERATURE", 0.3)),
+                    default_enabled=os.getenv("COMPLETION_CACHE_DEFAULT", "false").lower() in ("1", "true", "yes")
+                )
+    return _CACHE
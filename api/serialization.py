@@ -0,0 +1,184 @@
+"""
+JSON 직렬화
+
+설치된 라이브러리 중 orjson → ujson → 표준 json 순서로 사용하며 (JSON_BACKEND로 지정 가능),
+항상 공백 없는 UTF-8 JSON을 생성합니다. 빠른 백엔드가 처리하지 못하는 값(64비트를 넘는 정수 등)은
+표준 json으로 다시 직렬화합니다.
+
+게임 카탈로그 항목이나 환영 메시지처럼 바뀌지 않는 부분은 Fragment로 한 번만 인코딩해 두고,
+응답을 직렬화할 때 다시 인코딩하지 않고 그대로 끼워 넣습니다.
+
+    payload = dumps_bytes({"data": Fragment(cached_bytes), "turn": 3})
+
+init_app(app)은 Flask의 jsonify와 request.get_json이 이 모듈을 사용하도록 설정합니다.
+app.json.sort_keys(Flask 기본값 True)와 compact 설정을 그대로 따르며, indent처럼 빠른 백엔드가
+지원하지 않는 옵션을 지정하면 표준 json으로 직렬화합니다.
+"""
+import os
+import json
+import uuid
+import threading
+import logging
+
+logger = logging.getLogger("api.serialization")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _select_backend(name):
+    name = (name or "auto").lower()
+    if name in ("auto", "orjson") and orjson is not None:
+        return "orjson"
+    if name in ("auto", "ujson") and ujson is not None:
+        return "ujson"
+    if name not in ("auto", "json"):
+        logger.warning(f"JSON 백엔드를 사용할 수 없어 표준 json을 사용합니다: {name}")
+    return "json"
+
+
+BACKEND = _select_backend(os.getenv("JSON_BACKEND"))
+
+# Fragment 자리에 임시로 넣는 문자열 (직렬화 후 미리 인코딩된 조각으로 교체)
+_PLACEHOLDER = "__json_fragment_" + uuid.uuid4().hex + "_%d__"
+
+
+class Fragment:
+    """미리 인코딩된 JSON 조각. 직렬화할 때 다시 인코딩하지 않고 그대로 끼워 넣습니다."""
+
+    __slots__ = ("json",)
+
+    def __init__(self, data):
+        self.json = data if isinstance(data, bytes) else data.encode('utf-8')
+
+    def __repr__(self):
+        return f"Fragment({self.json[:40]!r})"
+
+
+def _stdlib_dumps(obj, default, sort_keys=False):
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(',', ':'), default=default, sort_keys=sort_keys
+    ).encode('utf-8')
+
+
+def _encode(obj, default, sort_keys=False):
+    if BACKEND == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            return _stdlib_dumps(obj, default, sort_keys)
+    if BACKEND == "ujson":
+        try:
+            return ujson.dumps(
+                obj, ensure_ascii=False, escape_forward_slashes=False, default=default, sort_keys=sort_keys
+            ).encode('utf-8')
+        except (TypeError, OverflowError):
+            return _stdlib_dumps(obj, default, sort_keys)
+    return _stdlib_dumps(obj, default, sort_keys)
+
+
+def dumps_bytes(obj, default=None, sort_keys=False):
+    """객체를 UTF-8 JSON 바이트로 직렬화합니다.
+
+    default는 기본적으로 직렬화할 수 없는 값을 변환하는 함수입니다 (json.dumps의 default와 같음).
+    sort_keys가 참이면 객체의 키를 정렬합니다. Fragment 조각은 인코딩해 둔 순서를 그대로 유지합니다.
+    """
+    fragments = []
+
+    def hook(value):
+        if isinstance(value, Fragment):
+            fragments.append(value.json)
+            return _PLACEHOLDER % (len(fragments) - 1)
+        if default is not None:
+            return default(value)
+        raise TypeError(f"JSON으로 직렬화할 수 없는 타입입니다: {type(value).__name__}")
+
+    data = _encode(obj, hook, sort_keys)
+    for index, fragment in enumerate(fragments):
+        data = data.replace(b'"' + (_PLACEHOLDER % index).encode('ascii') + b'"', fragment, 1)
+    return data
+
+
+def dumps(obj, default=None, sort_keys=False):
+    """객체를 JSON 문자열로 직렬화합니다."""
+    return dumps_bytes(obj, default, sort_keys).decode('utf-8')
+
+
+def loads(data):
+    """JSON 문자열(또는 바이트)을 파싱합니다."""
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if BACKEND == "ujson":
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+def encode_members(mapping):
+    """딕셔너리를 중괄호 없는 JSON 객체 멤버("a":1,"b":2)로 인코딩합니다."""
+    return dumps_bytes(mapping)[1:-1]
+
+
+def object_fragment(static_members, **fields):
+    """미리 인코딩한 객체 멤버(static_members)에 요청마다 바뀌는 필드를 더한 JSON 객체 조각을 만듭니다."""
+    dynamic_members = encode_members(fields) if fields else b""
+    members = b",".join(part for part in (dynamic_members, static_members) if part)
+    return Fragment(b"{" + members + b"}")
+
+
+def write_file(path, obj):
+    """객체를 공백 없는 JSON으로 파일에 씁니다. 임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 중간 상태를 보지 않습니다."""
+    path = str(path)
+    # 같은 프로세스의 여러 스레드가 동시에 써도 임시 파일이 겹치지 않도록 스레드 ID를 포함.
+    # (mkstemp는 권한을 0600으로 만들어 기존 데이터 파일의 권한이 바뀌므로 사용하지 않음)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps_bytes(obj))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def init_app(app):
+    """Flask 앱의 JSON 처리(jsonify, request.get_json)가 이 모듈을 사용하도록 설정합니다."""
+    from flask.json.provider import DefaultJSONProvider
+
+    class FastJSONProvider(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            default = kwargs.pop("default", self.default)
+            sort_keys = kwargs.pop("sort_keys", self.sort_keys)
+            if kwargs.get("separators") in ((',', ':'), [',', ':']):
+                del kwargs["separators"]
+            if kwargs:
+                # indent, ensure_ascii 등 다른 옵션은 표준 json으로 처리 (Fragment는 먼저 풀어서 전달)
+                return super().dumps(
+                    loads(dumps_bytes(obj, default)), default=default, sort_keys=sort_keys, **kwargs
+                )
+            return dumps(obj, default=default, sort_keys=sort_keys)
+
+        def loads(self, s, **kwargs):
+            return loads(s)
+
+        def response(self, *args, **kwargs):
+            # 보기 좋게 출력하는 설정(compact=False 또는 디버그 모드)은 Flask 기본 동작을 따름
+            if (self.compact is None and self._app.debug) or self.compact is False:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(
+                dumps_bytes(obj, default=self.default, sort_keys=self.sort_keys), mimetype=self.mimetype
+            )
+
+    app.json = FastJSONProvider(app)
+    logger.info(f"JSON 직렬화 백엔드: {BACKEND}")
@@ -0,0 +1,729 @@
+"""
+게임 세션 저장소
+
+- MemorySessionStore: 프로세스 내 저장소 (유휴 TTL + 최대 개수 LRU 제거)
+  일정 시간 사용하지 않은 세션은 압축해 두고(packed), 더 오래 쉬면 로컬 파일로 내보낸 뒤(spilled)
+  다음 조회 때 다시 세션 객체로 복원합니다.
+- SQLiteSessionStore: 여러 gunicorn 워커가 공유하는 SQLite(WAL) 저장소
+
+같은 게임의 턴이 동시에 처리되지 않도록 begin_turn/end_turn으로 턴을 선점하고,
+세션을 읽은 뒤 다른 요청이 먼저 저장한 경우를 막기 위해 세션마다 version을 두어
+compare_and_set으로 저장합니다. 선점에는 만료 시간(lease)이 있어 응답이 끝나지 않은
+요청이 세션을 계속 붙잡지 않습니다.
+"""
+import os
+import time
+import zlib
+import atexit
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import itertools
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+try:
+    from api.serialization import dumps, dumps_bytes, loads
+except ImportError:
+    from serialization import dumps, dumps_bytes, loads
+
+logger = logging.getLogger("api.session_store")
+
+# 기본 설정값
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TURN_LEASE_SECONDS = 60
+DEFAULT_LOCK_STRIPES = 64
+DEFAULT_PACK_AFTER_SECONDS = 0
+DEFAULT_SPILL_AFTER_SECONDS = 600
+# 백그라운드 정리가 잠금을 한 번 잡을 때 계층을 옮기는 최대 세션 수 (요청이 잠금을 기다리는 시간의 상한)
+DEMOTE_BATCH_SIZE = 8
+
+# 메모리 저장소의 세션 계층
+HOT = "hot"
+PACKED = "packed"
+SPILLED = "spilled"
+
+
+class TurnConflict(Exception):
+    """세션을 읽은 뒤 다른 요청이 먼저 세션을 변경하여 저장하지 못한 경우 발생하는 예외"""
+
+
+class TurnClaims:
+    """게임별 진행 중인 턴을 기록하는 줄무늬(striped) 잠금 테이블
+
+    게임 ID의 해시로 잠금 하나를 골라 사용하므로 서로 다른 게임의 요청은
+    대부분 다른 잠금을 사용하며, 잠금은 선점 기록을 확인하는 동안만 잡습니다.
+    선점할 때마다 새 토큰을 발급하여, 선점이 만료된 뒤 다른 요청이 다시 선점한 경우
+    이전 요청이 그 선점을 해제하지 못하게 합니다.
+    """
+
+    def __init__(self, stripes=DEFAULT_LOCK_STRIPES, lease_seconds=DEFAULT_TURN_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self._stripes = [(threading.Lock(), {}) for _ in range(max(1, stripes))]
+        self._tokens = itertools.count(1)
+
+    def _stripe(self, game_id):
+        return self._stripes[hash(game_id) % len(self._stripes)]
+
+    def acquire(self, game_id):
+        """턴을 선점하고 선점 토큰을 반환합니다. 다른 요청이 이미 선점한 경우 None을 반환합니다."""
+        lock, claims = self._stripe(game_id)
+        now = time.monotonic()
+        with lock:
+            claim = claims.get(game_id)
+            if claim is not None and now - claim[0] < self.lease_seconds:
+                return None
+            token = next(self._tokens)
+            claims[game_id] = (now, token)
+        return token
+
+    def release(self, game_id, token):
+        """토큰이 현재 선점과 같을 때만 선점을 해제합니다."""
+        lock, claims = self._stripe(game_id)
+        with lock:
+            claim = claims.get(game_id)
+            if claim is not None and claim[1] == token:
+                del claims[game_id]
+
+    def __len__(self):
+        return sum(len(claims) for _, claims in self._stripes)
+
+
+class SessionCodec:
+    """유휴 세션을 압축하는 코덱 (zlib 기본값, zstandard가 설치된 경우 zstd 선택 가능)"""
+
+    def __init__(self, name="zlib"):
+        name = (name or "zlib").lower()
+        if name == "zstd":
+            try:
+                import zstandard
+                self.name = "zstd"
+                self.compress = zstandard.ZstdCompressor(level=3).compress
+                self.decompress = zstandard.ZstdDecompressor().decompress
+                return
+            except ImportError:
+                logger.warning("zstandard 패키지가 없어 zlib으로 세션을 압축합니다")
+        elif name != "zlib":
+            logger.warning(f"알 수 없는 세션 압축 방식: {name}, zlib 사용")
+        self.name = "zlib"
+        self.compress = zlib.compress
+        self.decompress = zlib.decompress
+
+
+class SessionStore:
+    """게임 세션 저장소 인터페이스"""
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_sessions=DEFAULT_MAX_SESSIONS,
+                 turn_lease_seconds=DEFAULT_TURN_LEASE_SECONDS, lock_stripes=DEFAULT_LOCK_STRIPES,
+                 session_factory=None):
+        self.ttl_seconds = ttl_seconds
+        # 직렬화된 세션 딕셔너리를 세션 객체로 바꾸는 함수 (없으면 딕셔너리 그대로 사용)
+        self.session_factory = session_factory
+        self.max_sessions = max_sessions
+        self.turn_lease_seconds = turn_lease_seconds
+        self._claims = TurnClaims(lock_stripes, turn_lease_seconds)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "deletes": 0,
+            "expired": 0,
+            "evicted": 0,
+            "turns_rejected": 0,
+            "version_conflicts": 0
+        }
+
+    def get(self, game_id, default=None):
+        """세션을 조회합니다. 없거나 만료된 경우 default를 반환합니다."""
+        raise NotImplementedError
+
+    def set(self, game_id, session):
+        """세션을 저장합니다. 저장할 때마다 세션의 version이 1 증가합니다."""
+        raise NotImplementedError
+
+    def compare_and_set(self, game_id, session, expected_version):
+        """저장된 세션의 version이 expected_version과 같을 때만 저장하고 성공 여부를 반환합니다."""
+        raise NotImplementedError
+
+    def delete(self, game_id):
+        """세션을 삭제합니다. 삭제된 경우 True를 반환합니다."""
+        raise NotImplementedError
+
+    def keys(self):
+        """저장된 세션 ID 목록을 반환합니다."""
+        raise NotImplementedError
+
+    # 턴 선점
+    def begin_turn(self, game_id):
+        """게임의 턴 처리를 선점하고 선점 토큰을 반환합니다. 같은 게임의 턴이 이미 진행 중이면 None을 반환합니다."""
+        token = self._claims.acquire(game_id)
+        if token is None:
+            self._count("turns_rejected")
+        return token
+
+    def end_turn(self, game_id, token):
+        """begin_turn으로 선점한 턴을 해제합니다. 선점이 만료되어 다른 요청이 다시 선점한 경우에는 해제하지 않습니다."""
+        self._claims.release(game_id, token)
+
+    def __len__(self):
+        raise NotImplementedError
+
+    # dict 호환 인터페이스
+    def __getitem__(self, game_id):
+        session = self.get(game_id)
+        if session is None:
+            raise KeyError(game_id)
+        return session
+
+    def __setitem__(self, game_id, session):
+        self.set(game_id, session)
+
+    def __delitem__(self, game_id):
+        if not self.delete(game_id):
+            raise KeyError(game_id)
+
+    def __contains__(self, game_id):
+        return self.get(game_id) is not None
+
+    def _session_data(self, session):
+        # to_dict()를 제공하는 세션 객체는 기존 딕셔너리 형식으로 직렬화
+        return session.to_dict() if hasattr(session, "to_dict") else session
+
+    def _encode(self, session):
+        return dumps(self._session_data(session))
+
+    def _decode(self, data, version):
+        session = loads(data)
+        session['version'] = version
+        return self.session_factory(session) if self.session_factory else session
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        """히트/미스 및 제거 카운터를 반환합니다."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["size"] = len(self)
+        stats["max_sessions"] = self.max_sessions
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["turns_in_progress"] = len(self._claims)
+        stats["backend"] = self.backend_name
+        return stats
+
+    backend_name = "base"
+
+
+class MemorySessionStore(SessionStore):
+    """프로세스 내 세션 저장소 (유휴 TTL + LRU 제거 + 유휴 세션 압축/파일 내보내기)
+
+    세션은 세 계층 중 하나에 있습니다.
+    - hot: 세션 객체 그대로
+    - packed: pack_after_seconds 동안 사용하지 않아 직렬화 후 압축한 바이트
+    - spilled: 압축한 뒤 spill_after_seconds가 더 지나 spill_dir의 파일로 내보낸 세션
+    packed/spilled 세션은 다음 get()에서 session_factory로 복원되어 hot 계층으로 돌아갑니다.
+    계층 이동은 요청 처리 경로가 아닌 백그라운드 스레드가 demote_interval초마다 수행하므로,
+    요청이 없어도 유휴 세션이 압축됩니다.
+    """
+
+    backend_name = "memory"
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_sessions=DEFAULT_MAX_SESSIONS,
+                 pack_after_seconds=0, spill_after_seconds=0, spill_dir=None, compression="zlib",
+                 demote_interval=None, **kwargs):
+        super().__init__(ttl_seconds, max_sessions, **kwargs)
+        # 마지막 접근 순서대로 정렬된 (값, 마지막 접근 시각, 버전, 계층)
+        # 값은 hot이면 세션, packed면 압축한 바이트, spilled면 (파일 경로, 크기)
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+        # 계층을 옮길 후보를 앞에서부터 찾기 위한 계층별 세션 ID (마지막 접근 순서)
+        self._hot = OrderedDict()
+        self._packed = OrderedDict()
+        self._tier_bytes = {PACKED: 0, SPILLED: 0}
+        self.pack_after_seconds = pack_after_seconds
+        self.spill_after_seconds = spill_after_seconds
+        self._codec = SessionCodec(compression)
+        self._spill_dir = self._create_spill_dir(spill_dir) if spill_dir and pack_after_seconds else None
+        self._stats.update(packed=0, spilled=0, rehydrated=0, spill_errors=0)
+        self._demoter_stop = threading.Event()
+        if pack_after_seconds:
+            if demote_interval is None:
+                demote_interval = min(max(pack_after_seconds / 2, 1.0), 30.0)
+            self._start_demoter(demote_interval)
+
+    def _create_spill_dir(self, spill_dir):
+        # 메모리 저장소는 프로세스마다 따로 있으므로 프로세스별 디렉토리를 만들고 종료 시 삭제
+        try:
+            os.makedirs(spill_dir, exist_ok=True)
+            path = tempfile.mkdtemp(prefix=f"sessions-{os.getpid()}-", dir=spill_dir)
+        except OSError as e:
+            logger.error(f"세션 내보내기 디렉토리 생성 실패, 파일 내보내기 사용 안 함: {e}")
+            return None
+        atexit.register(shutil.rmtree, path, True)
+        logger.info(f"유휴 세션 내보내기 디렉토리: {path}")
+        return path
+
+    def _is_expired(self, last_access, now):
+        return self.ttl_seconds and now - last_access > self.ttl_seconds
+
+    def _sweep_expired(self, now):
+        # 가장 오래된 항목부터 확인하므로 만료되지 않은 항목을 만나면 중단
+        expired = 0
+        while self._sessions:
+            game_id, (_, last_access, _, _) = next(iter(self._sessions.items()))
+            if not self._is_expired(last_access, now):
+                break
+            self._remove(game_id)
+            expired += 1
+        if expired:
+            self._count("expired", expired)
+
+    def get(self, game_id, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(game_id)
+            if entry is None:
+                self._count("misses")
+                return default
+            session, last_access, version, tier = entry
+            if self._is_expired(last_access, now):
+                self._remove(game_id)
+                self._count("expired")
+                self._count("misses")
+                return default
+            if tier != HOT:
+                session = self._rehydrate(game_id, entry)
+                if session is None:
+                    self._count("misses")
+                    return default
+            self._set_hot(game_id, session, now, version)
+        self._count("hits")
+        return session
+
+    def set(self, game_id, session):
+        with self._lock:
+            entry = self._sessions.get(game_id)
+            self._store(game_id, session, (entry[2] if entry else 0) + 1)
+
+    def compare_and_set(self, game_id, session, expected_version):
+        with self._lock:
+            entry = self._sessions.get(game_id)
+            if entry is None or entry[2] != expected_version:
+                self._count("version_conflicts")
+                return False
+            self._store(game_id, session, expected_version + 1)
+        return True
+
+    def _store(self, game_id, session, version):
+        now = time.monotonic()
+        session['version'] = version
+        with self._lock:
+            entry = self._sessions.get(game_id)
+            if entry is not None and entry[3] != HOT:
+                self._release(game_id, entry)
+            self._set_hot(game_id, session, now, version)
+            self._sweep_expired(now)
+            evicted = 0
+            while self.max_sessions and len(self._sessions) > self.max_sessions:
+                self._remove(next(iter(self._sessions)))
+                evicted += 1
+        if evicted:
+            self._count("evicted", evicted)
+            logger.info(f"세션 저장소 용량 초과로 {evicted}개 세션 제거")
+        self._count("sets")
+
+    # 계층 관리
+    def _set_hot(self, game_id, session, now, version):
+        self._sessions[game_id] = (session, now, version, HOT)
+        self._sessions.move_to_end(game_id)
+        self._hot[game_id] = None
+        self._hot.move_to_end(game_id)
+
+    def _release(self, game_id, entry):
+        """packed/spilled 항목이 차지하던 계층 기록과 파일을 정리합니다."""
+        value, _, _, tier = entry
+        if tier == PACKED:
+            self._packed.pop(game_id, None)
+            self._tier_bytes[PACKED] -= len(value)
+        elif tier == SPILLED:
+            path, size = value
+            self._tier_bytes[SPILLED] -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remove(self, game_id):
+        entry = self._sessions.pop(game_id, None)
+        if entry is None:
+            return False
+        if entry[3] == HOT:
+            self._hot.pop(game_id, None)
+        else:
+            self._release(game_id, entry)
+        return True
+
+    def _start_demoter(self, interval):
+        # 스레드가 저장소를 붙잡지 않도록 약한 참조를 사용하고, 저장소가 사라지면 종료
+        store_ref = weakref.ref(self)
+        stop = self._demoter_stop
+
+        def run():
+            while not stop.wait(interval):
+                store = store_ref()
+                if store is None:
+                    return
+                try:
+                    store.demote_idle()
+                except Exception as e:
+                    logger.error(f"유휴 세션 정리 중 오류 발생: {e}")
+                del store
+
+        threading.Thread(target=run, name="session-demoter", daemon=True).start()
+
+    def close(self):
+        """백그라운드 유휴 세션 정리를 중지합니다."""
+        self._demoter_stop.set()
+
+    def demote_idle(self):
+        """유휴 세션을 모두 압축하고 파일로 내보냅니다. 옮긴 세션 수를 반환합니다.
+
+        요청이 오래 기다리지 않도록 DEMOTE_BATCH_SIZE개씩 나누어 잠금을 잡습니다.
+        """
+        total = 0
+        while True:
+            with self._lock:
+                moved = self._demote_idle(time.monotonic())
+            if not moved:
+                return total
+            total += moved
+
+    def _demote_idle(self, now):
+        """유휴 hot 세션과 오래된 압축 세션을 계층별로 DEMOTE_BATCH_SIZE개까지 옮기고 그 수를 반환합니다."""
+        if not self.pack_after_seconds:
+            return 0
+        moved = 0
+        for _ in range(DEMOTE_BATCH_SIZE):
+            if not self._hot:
+                break
+            game_id = next(iter(self._hot))
+            session, last_access, version, _ = self._sessions[game_id]
+            if now - last_access < self.pack_after_seconds:
+                break
+            try:
+                packed = self._codec.compress(dumps_bytes(self._session_data(session)))
+            except Exception as e:
+                # 압축하지 못한 세션은 hot 계층에 남겨 두고 다음 정리 때 다시 시도
+                logger.warning(f"세션 압축 실패: 게임 ID={game_id}, 오류={e}")
+                self._hot.move_to_end(game_id)
+                break
+            del self._hot[game_id]
+            self._sessions[game_id] = (packed, last_access, version, PACKED)
+            self._packed[game_id] = None
+            self._tier_bytes[PACKED] += len(packed)
+            self._count("packed")
+            moved += 1
+
+        if not self._spill_dir:
+            return moved
+        for _ in range(DEMOTE_BATCH_SIZE):
+            if not self._packed:
+                break
+            game_id = next(iter(self._packed))
+            packed, last_access, version, _ = self._sessions[game_id]
+            if now - last_access < self.pack_after_seconds + self.spill_after_seconds:
+                break
+            path = os.path.join(self._spill_dir, hashlib.sha1(str(game_id).encode('utf-8')).hexdigest())
+            try:
+                with open(path, 'wb') as f:
+                    f.write(packed)
+            except OSError as e:
+                logger.warning(f"세션 파일 내보내기 실패: 게임 ID={game_id}, 오류={e}")
+                self._count("spill_errors")
+                self._packed.move_to_end(game_id)
+                break
+            del self._packed[game_id]
+            self._sessions[game_id] = ((path, len(packed)), last_access, version, SPILLED)
+            self._tier_bytes[PACKED] -= len(packed)
+            self._tier_bytes[SPILLED] += len(packed)
+            self._count("spilled")
+            moved += 1
+        return moved
+
+    def _rehydrate(self, game_id, entry):
+        """packed/spilled 세션을 세션 객체로 복원합니다. 복원하지 못하면 항목을 지우고 None을 반환합니다."""
+        value, _, version, tier = entry
+        try:
+            if tier == SPILLED:
+                with open(value[0], 'rb') as f:
+                    value = f.read()
+            session = self._decode(self._codec.decompress(value), version)
+        except Exception as e:
+            logger.error(f"유휴 세션 복원 실패: 게임 ID={game_id}, 계층={tier}, 오류={e}")
+            self._remove(game_id)
+            self._count("spill_errors")
+            return None
+        self._release(game_id, entry)
+        self._count("rehydrated")
+        return session
+
+    def delete(self, game_id):
+        with self._lock:
+            removed = self._remove(game_id)
+        if removed:
+            self._count("deletes")
+        return removed
+
+    def keys(self):
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            hot, packed = len(self._hot), len(self._packed)
+            stats["tiers"] = {
+                HOT: hot,
+                PACKED: packed,
+                SPILLED: len(self._sessions) - hot - packed,
+                "packed_bytes": self._tier_bytes[PACKED],
+                "spilled_bytes": self._tier_bytes[SPILLED]
+            }
+        stats["pack_after_seconds"] = self.pack_after_seconds
+        stats["spill_after_seconds"] = self.spill_after_seconds if self._spill_dir else None
+        stats["compression"] = self._codec.name
+        return stats
+
+
+class SQLiteSessionStore(SessionStore):
+    """여러 워커 프로세스가 공유하는 SQLite(WAL) 세션 저장소"""
+
+    backend_name = "sqlite"
+
+    # 만료/용량 정리를 수행하는 set 호출 간격
+    PURGE_EVERY = 100
+
+    def __init__(self, db_path, ttl_seconds=DEFAULT_TTL_SECONDS, max_sessions=DEFAULT_MAX_SESSIONS, **kwargs):
+        super().__init__(ttl_seconds, max_sessions, **kwargs)
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self._sets_since_purge = 0
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS game_sessions ("
+                "game_id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "last_access REAL NOT NULL, "
+                "version INTEGER NOT NULL DEFAULT 0, "
+                "turn_lease REAL)"
+            )
+            # 이전 형식의 테이블에 버전/턴 선점 열 추가
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(game_sessions)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE game_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if "turn_lease" not in columns:
+                conn.execute("ALTER TABLE game_sessions ADD COLUMN turn_lease REAL")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_game_sessions_last_access "
+                "ON game_sessions (last_access)"
+            )
+
+    def _connection(self):
+        # sqlite3 연결은 스레드 간에 공유하지 않으므로 스레드마다 생성
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, game_id, default=None):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT data, last_access, version FROM game_sessions WHERE game_id = ?",
+            (game_id,)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return default
+        data, last_access, version = row
+        if self.ttl_seconds and now - last_access > self.ttl_seconds:
+            conn.execute("DELETE FROM game_sessions WHERE game_id = ?", (game_id,))
+            self._count("expired")
+            self._count("misses")
+            return default
+        conn.execute(
+            "UPDATE game_sessions SET last_access = ? WHERE game_id = ?",
+            (now, game_id)
+        )
+        self._count("hits")
+        return self._decode(data, version)
+
+    def set(self, game_id, session):
+        data = self._encode(session)
+        conn = self._connection()
+        # 저장한 버전을 읽기 전에 다른 워커가 같은 세션을 저장하지 않도록 한 트랜잭션에서 처리
+        # (RETURNING은 SQLite 3.35 이상에서만 사용할 수 있음)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO game_sessions (game_id, data, last_access, version) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (game_id) DO UPDATE SET data = excluded.data, "
+                "last_access = excluded.last_access, version = game_sessions.version + 1",
+                (game_id, data, time.time())
+            )
+            version = conn.execute(
+                "SELECT version FROM game_sessions WHERE game_id = ?", (game_id,)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        session['version'] = version
+        self._after_set()
+
+    def compare_and_set(self, game_id, session, expected_version):
+        cursor = self._connection().execute(
+            "UPDATE game_sessions SET data = ?, last_access = ?, version = version + 1 "
+            "WHERE game_id = ? AND version = ?",
+            (self._encode(session), time.time(), game_id, expected_version)
+        )
+        if cursor.rowcount != 1:
+            self._count("version_conflicts")
+            return False
+        session['version'] = expected_version + 1
+        self._after_set()
+        return True
+
+    def begin_turn(self, game_id):
+        # 여러 워커 프로세스에서도 한 요청만 선점하도록 데이터베이스에 선점 만료 시각 기록
+        # 선점 만료 시각을 선점 토큰으로 사용
+        now = time.time()
+        lease = now + self.turn_lease_seconds
+        cursor = self._connection().execute(
+            "UPDATE game_sessions SET turn_lease = ? "
+            "WHERE game_id = ? AND (turn_lease IS NULL OR turn_lease < ?)",
+            (lease, game_id, now)
+        )
+        if cursor.rowcount == 1:
+            return lease
+        self._count("turns_rejected")
+        return None
+
+    def end_turn(self, game_id, token):
+        self._connection().execute(
+            "UPDATE game_sessions SET turn_lease = NULL WHERE game_id = ? AND turn_lease = ?", (game_id, token)
+        )
+
+    def _after_set(self):
+        self._count("sets")
+        self._sets_since_purge += 1
+        if self._sets_since_purge >= self.PURGE_EVERY:
+            self._sets_since_purge = 0
+            self.purge()
+
+    def purge(self):
+        """만료된 세션과 최대 개수를 넘는 오래된 세션을 정리합니다."""
+        conn = self._connection()
+        if self.ttl_seconds:
+            cursor = conn.execute(
+                "DELETE FROM game_sessions WHERE last_access < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            if cursor.rowcount > 0:
+                self._count("expired", cursor.rowcount)
+        if self.max_sessions:
+            overflow = len(self) - self.max_sessions
+            if overflow > 0:
+                cursor = conn.execute(
+                    "DELETE FROM game_sessions WHERE game_id IN ("
+                    "SELECT game_id FROM game_sessions ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._count("evicted", cursor.rowcount)
+                logger.info(f"세션 저장소 용량 초과로 {cursor.rowcount}개 세션 제거")
+
+    def delete(self, game_id):
+        cursor = self._connection().execute(
+            "DELETE FROM game_sessions WHERE game_id = ?", (game_id,)
+        )
+        removed = cursor.rowcount > 0
+        if removed:
+            self._count("deletes")
+        return removed
+
+    def keys(self):
+        rows = self._connection().execute("SELECT game_id FROM game_sessions").fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM game_sessions").fetchone()[0]
+
+    def stats(self):
+        stats = super().stats()
+        stats["turns_in_progress"] = self._connection().execute(
+            "SELECT COUNT(*) FROM game_sessions WHERE turn_lease >= ?", (time.time(),)
+        ).fetchone()[0]
+        return stats
+
+
+def create_session_store(session_factory=None):
+    """환경 변수 설정에 따라 세션 저장소를 생성합니다.
+
+    session_factory는 sqlite 백엔드에서 읽은 세션 딕셔너리를 세션 객체로 바꾸는 함수입니다.
+
+    SESSION_STORE_BACKEND: memory(기본값) 또는 sqlite
+    SESSION_TTL_SECONDS: 유휴 세션 만료 시간(초), 0이면 만료 없음
+    SESSION_MAX_SESSIONS: 최대 세션 수, 0이면 제한 없음
+    SESSION_DB_PATH: sqlite 백엔드의 데이터베이스 파일 경로
+    SESSION_TURN_LEASE_SECONDS: 턴 선점 유지 시간(초), 지나면 다른 요청이 선점 가능
+    SESSION_LOCK_STRIPES: 턴 선점 잠금 테이블의 잠금 수
+    SESSION_PACK_AFTER_SECONDS: 메모리 백엔드에서 세션을 압축해 두는 유휴 시간(초), 0(기본값)이면 압축하지 않음
+    SESSION_SPILL_DIR: 압축한 유휴 세션을 내보낼 디렉토리 (지정하지 않으면 파일로 내보내지 않음)
+    SESSION_SPILL_AFTER_SECONDS: 압축한 뒤 파일로 내보내기까지의 추가 유휴 시간(초)
+    SESSION_COMPRESSION: 유휴 세션 압축 방식 (zlib 기본값 또는 zstd)
+    """
+    backend = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+    ttl_seconds = int(os.getenv("SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    max_sessions = int(os.getenv("SESSION_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+    options = {
+        "turn_lease_seconds": float(os.getenv("SESSION_TURN_LEASE_SECONDS", DEFAULT_TURN_LEASE_SECONDS)),
+        "lock_stripes": int(os.getenv("SESSION_LOCK_STRIPES", DEFAULT_LOCK_STRIPES)),
+        "session_factory": session_factory
+    }
+
+    if backend == "sqlite":
+        db_path = os.getenv("SESSION_DB_PATH", os.path.join("data", "sessions.db"))
+        try:
+            store = SQLiteSessionStore(db_path, ttl_seconds, max_sessions, **options)
+            logger.info(f"SQLite 세션 저장소 사용: {db_path}")
+            return store
+        except Exception as e:
+            logger.error(f"SQLite 세션 저장소 생성 실패, 메모리 저장소로 대체: {e}")
+    elif backend != "memory":
+        logger.warning(f"알 수 없는 세션 저장소 백엔드: {backend}, 메모리 저장소 사용")
+
+    return MemorySessionStore(
+        ttl_seconds, max_sessions,
+        pack_after_seconds=float(os.getenv("SESSION_PACK_AFTER_SECONDS", DEFAULT_PACK_AFTER_SECONDS)),
+        spill_after_seconds=float(os.getenv("SESSION_SPILL_AFTER_SECONDS", DEFAULT_SPILL_AFTER_SECONDS)),
+        spill_dir=os.getenv("SESSION_SPILL_DIR") or None,
+        compression=os.getenv("SESSION_COMPRESSION", "zlib"),
+        **options
+    )
@@ -0,0 +1,181 @@
+"""
+단일 비행(single-flight) 요청 병합
+
+같은 아이템을 여러 사용자가 동시에 시작하면 첫 턴 요청(같은 시스템 프롬프트, 같은 첫 질문)이
+한꺼번에 들어옵니다. 정규화한 요청의 해시를 키로, 같은 키의 요청이 진행 중이면 새로 LLM을
+호출하지 않고 진행 중인 요청이 끝나기를 기다려 그 결과를 함께 사용합니다.
+
+응답 캐시(response_cache)와 달리 결과를 보관하지 않으며, 시간이 겹치는 요청만 합칩니다.
+앞선 요청이 실패하면 기다리던 요청도 같은 예외를 받습니다.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from functools import partial
+
+logger = logging.getLogger("api.single_flight")
+
+
+class SingleFlightTimeout(Exception):
+    """진행 중인 같은 요청의 결과를 마감 시간 안에 받지 못한 경우 발생하는 예외"""
+
+
+class _Call:
+    """진행 중인 동기 요청"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """진행 중인 같은 요청을 하나로 합치는 요청 병합기"""
+
+    def __init__(self, enabled=True, max_temperature=0.3):
+        self.enabled = enabled
+        self.max_temperature = max_temperature
+
+        self._lock = threading.Lock()
+        self._calls = {}
+        # asyncio 태스크는 이벤트 루프에 묶이므로 (루프 ID, 키)로 관리
+        self._tasks = {}
+        self._stats = {
+            "leaders": 0,
+            "shared": 0,
+            "bypassed": 0,
+            "errors": 0,
+            "timeouts": 0
+        }
+
+    @staticmethod
+    def make_key(model, messages, temperature, max_tokens):
+        """요청 내용으로 병합 키를 생성합니다. 메시지 내용의 공백 차이는 무시합니다."""
+        normalized = [[message.get("role"), " ".join(str(message.get("content") or "").split())]
+                      for message in messages]
+        payload = json.dumps(
+            [model, normalized, temperature, max_tokens],
+            ensure_ascii=False,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def is_shareable(self, temperature, ai_config=None):
+        """아이템 설정과 temperature로 결과 공유 여부를 판단합니다.
+
+        아이템 프롬프트의 ai_config에 "single_flight" 값이 있으면 그 값을 따르고,
+        temperature가 max_temperature보다 높으면 공유하지 않습니다.
+        """
+        enabled = (ai_config or {}).get('single_flight', self.enabled)
+        return bool(enabled) and temperature is not None and temperature <= self.max_temperature
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def do(self, key, fn, timeout=None):
+        """같은 키의 요청이 진행 중이면 그 결과를, 아니면 fn()의 결과를 반환합니다.
+
+        (결과, 다른 요청의 결과를 공유했는지 여부)를 반환합니다. key가 None이면 병합하지 않습니다.
+        """
+        if key is None:
+            self._count("bypassed")
+            return fn(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._stats["leaders" if leader else "shared"] += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                self._count("timeouts")
+                raise SingleFlightTimeout("진행 중인 같은 LLM 요청의 결과를 기다리는 시간을 초과했습니다")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            self._count("errors")
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key, coro_fn, timeout=None):
+        """do의 비동기 버전. coro_fn()이 반환하는 코루틴을 태스크로 실행하여 결과를 공유합니다.
+
+        먼저 요청한 클라이언트의 연결이 끊겨도 태스크는 취소되지 않으므로
+        기다리는 다른 요청은 영향을 받지 않습니다.
+        """
+        if key is None:
+            self._count("bypassed")
+            return await coro_fn(), False
+
+        import asyncio
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = self._tasks[task_key] = loop.create_task(coro_fn())
+                task.add_done_callback(partial(self._task_done, task_key))
+            self._stats["leaders" if leader else "shared"] += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout), not leader
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise SingleFlightTimeout("진행 중인 같은 LLM 요청의 결과를 기다리는 시간을 초과했습니다")
+
+    def _task_done(self, task_key, task):
+        with self._lock:
+            self._tasks.pop(task_key, None)
+        # 기다리던 요청이 모두 취소된 경우에도 예외를 확인하여 경고 로그가 남지 않도록 함
+        if not task.cancelled() and task.exception() is not None:
+            self._count("errors")
+
+    def stats(self):
+        """병합 카운터와 병합 비율(공유한 요청 / 병합 대상 요청)을 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls) + len(self._tasks)
+        coalescable = stats["leaders"] + stats["shared"]
+        stats["coalescing_ratio"] = round(stats["shared"] / coalescable, 4) if coalescable else 0.0
+        stats["enabled"] = self.enabled
+        stats["max_temperature"] = self.max_temperature
+        return stats
+
+
+_SINGLE_FLIGHT = None
+_SINGLE_FLIGHT_LOCK = threading.Lock()
+
+
+def get_single_flight():
+    """프로세스 전체에서 공유하는 요청 병합기를 반환합니다.
+
+    SINGLE_FLIGHT: on(기본값) 또는 off, 아이템에 single_flight 설정이 없을 때의 사용 여부
+    SINGLE_FLIGHT_MAX_TEMPERATURE: 결과 공유를 허용하는 최대 temperature (응답 캐시와 같은 0.3이 기본값.
+        더 높은 temperature에서 공유하면 같은 질문을 보낸 사용자가 같은 무작위 응답을 받음)
+    """
+    global _SINGLE_FLIGHT
+    if _SINGLE_FLIGHT is None:
+        with _SINGLE_FLIGHT_LOCK:
+            if _SINGLE_FLIGHT is None:
+                _SINGLE_FLIGHT = SingleFlight(
+                    enabled=os.getenv("SINGLE_FLIGHT", "on").lower() in ("1", "on", "true", "yes"),
+                    max_temperature=float(os.getenv("SINGLE_FLIGHT_MAX_TEMPERATURE", 0.3))
+                )
+    return _SINGLE_FLIGHT
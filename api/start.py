@@ -4,6 +4,7 @@ import random
 from datetime import datetime
 from http.server import BaseHTTPRequestHandler
 from .utils import create_response, load_game_items, create_openai_client
+from .serialization import dumps
 
 # 간단한 메모리 기반 게임 세션 저장소 (서버리스 환경에서는 매 요청마다 초기화됨)
 games = {}
@@ -29,7 +30,7 @@ def handler(request):
         )
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -90,7 +91,7 @@ def handler(request):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -108,7 +109,7 @@ def handler(request):
         
         return {
             "statusCode": status_code,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json",
                 "Access-Control-Allow-Origin": "*",
@@ -0,0 +1,114 @@
+"""
+시작 스냅샷
+
+게임 프롬프트, 게임 아이템, 아이템 프롬프트를 JSON 파일 하나로 미리 묶어 두고,
+콜드 스타트 시 파일 여러 개를 열고 파싱하는 대신 스냅샷 하나만 읽습니다.
+스냅샷에는 원본 파일의 크기와 mtime이 함께 기록되며, 원본이 바뀌었으면
+스냅샷을 사용하지 않고 원본 파일을 읽습니다.
+
+git checkout은 파일 mtime을 새로 설정하므로, 스냅샷은 배포할 체크아웃에서
+빌드 단계로 생성하세요:
+    python -m api.startup_snapshot build [출력 경로]
+"""
+import os
+import sys
+import json
+import logging
+
+try:
+    from api.serialization import loads, write_file
+except ImportError:
+    from serialization import loads, write_file
+
+logger = logging.getLogger("api.startup_snapshot")
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_PATH = os.path.join("data", "startup_snapshot.json")
+
+
+def _source_signature(path):
+    # 파일(또는 디렉토리)의 [크기, mtime], 없으면 None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def build_snapshot(prompts_file, items_file, item_prompts_dir, output_path=DEFAULT_SNAPSHOT_PATH):
+    """원본 파일을 읽어 시작 스냅샷을 생성하고 (아이템 수, 아이템 프롬프트 수)를 반환합니다."""
+    prompts_file, items_file, item_prompts_dir = str(prompts_file), str(items_file), str(item_prompts_dir)
+    with open(prompts_file, 'r', encoding='utf-8') as f:
+        prompts = json.load(f)
+    with open(items_file, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    item_prompts = {}
+    for name in sorted(os.listdir(item_prompts_dir)):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(item_prompts_dir, name)
+        with open(path, 'r', encoding='utf-8') as f:
+            item_prompts[name[:-len('.json')]] = [os.stat(path).st_mtime_ns, json.load(f)]
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "sources": {
+            "prompts": _source_signature(prompts_file),
+            "items": _source_signature(items_file),
+            "item_prompts": _source_signature(item_prompts_dir)
+        },
+        "prompts": prompts,
+        "items": items,
+        "item_prompts": item_prompts
+    }
+    write_file(output_path, snapshot)
+    logger.info(f"시작 스냅샷 생성: 아이템 {len(items)}개, 아이템 프롬프트 {len(item_prompts)}개 -> {output_path}")
+    return len(items), len(item_prompts)
+
+
+def load_snapshot(path, prompts_file, items_file, item_prompts_dir):
+    """시작 스냅샷을 읽습니다. 스냅샷이 없거나 원본과 맞지 않으면 None을 반환합니다."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = loads(f.read())
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning(f"시작 스냅샷을 읽을 수 없습니다: {path}: {e}")
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"시작 스냅샷 버전 불일치: {snapshot.get('version')}")
+        return None
+
+    current = {
+        "prompts": _source_signature(str(prompts_file)),
+        "items": _source_signature(str(items_file)),
+        "item_prompts": _source_signature(str(item_prompts_dir))
+    }
+    for name, signature in current.items():
+        if snapshot.get("sources", {}).get(name) != signature:
+            logger.warning(f"원본 파일이 바뀌어 시작 스냅샷을 사용하지 않습니다: {name}")
+            return None
+    return snapshot
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "build":
+        print("사용법: python -m api.startup_snapshot build [출력 경로]")
+        return 1
+    output_path = argv[2] if len(argv) > 2 else DEFAULT_SNAPSHOT_PATH
+    items, item_prompts = build_snapshot(
+        os.path.join("data", "game_prompts.json"),
+        os.path.join("data", "game_items.json"),
+        "item_prompts",
+        output_path
+    )
+    print(f"스냅샷 생성 완료: 아이템 {items}개, 아이템 프롬프트 {item_prompts}개 -> {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv))
@@ -0,0 +1,209 @@
+"""
+검증된 토큰 캐시
+
+관리자 API는 대시보드가 자주 호출하므로, 한 번 서명을 검증한 JWT는 토큰 다이제스트를
+키로 캐시해 두고 만료 시각(exp)까지 서명 검증 없이 사용자 이름을 반환합니다.
+폐기(로그아웃)된 토큰은 원래 만료 시각까지 폐기 목록에 남아 다시 검증되지 않습니다.
+
+관리자 API(admin_login, admin_items, admin_prompt)는 서로 다른 프로세스에서 실행될 수 있으므로
+폐기 목록은 SQLite 파일(RevocationStore)에 함께 기록하고, 캐시된 토큰도 사용할 때마다 확인합니다.
+서버리스 인스턴스처럼 파일 시스템을 공유하지 않는 환경에서는 같은 파일을 보는 프로세스끼리만 공유됩니다.
+"""
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("api.token_cache")
+
+
+def token_digest(token):
+    """캐시 키로 사용할 토큰 다이제스트 (토큰 원문은 메모리에 보관하지 않음)"""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class RevocationStore:
+    """여러 프로세스가 공유하는 SQLite 토큰 폐기 목록 (토큰의 만료 시각까지 유지)"""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS revoked_tokens (digest BLOB PRIMARY KEY, expires_at REAL)"
+        )
+
+    def _connection(self):
+        # sqlite3 연결은 스레드 간에 공유하지 않으므로 스레드마다 생성
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def revoke(self, digest, exp=None, now=None):
+        """토큰을 폐기 목록에 기록하고 만료된 기록을 정리합니다. exp가 없으면 계속 유지합니다."""
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO revoked_tokens (digest, expires_at) VALUES (?, ?)",
+            (digest, float(exp) if exp is not None else None)
+        )
+        conn.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (now,))
+
+    def is_revoked(self, digest, now=None):
+        now = time.time() if now is None else now
+        row = self._connection().execute(
+            "SELECT 1 FROM revoked_tokens WHERE digest = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (digest, now)
+        ).fetchone()
+        return row is not None
+
+
+class VerifiedTokenCache:
+    """만료 시각까지 유지되는 크기 제한 LRU 토큰 캐시"""
+
+    def __init__(self, max_entries=1024, max_ttl=300.0, revocations=None):
+        self.max_entries = max_entries
+        # exp가 없는 토큰은 max_ttl초 동안만 캐시
+        self.max_ttl = max_ttl
+        # 다른 프로세스와 공유하는 폐기 목록 (없으면 이 프로세스 안에서만 폐기)
+        self.revocations = revocations
+        self._entries = OrderedDict()
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "revoked": 0}
+
+    def get(self, digest, now=None):
+        """캐시된 사용자 이름을 반환합니다. 없거나 만료되었으면 None을 반환합니다."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            username, expires_at = entry
+            if now >= expires_at:
+                del self._entries[digest]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(digest)
+            if self.revocations is None:
+                self._stats["hits"] += 1
+                return username
+        # 다른 프로세스에서 폐기한 토큰은 캐시에서도 제거
+        if self._shared_is_revoked(digest, now):
+            with self._lock:
+                self._entries.pop(digest, None)
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return username
+
+    def set(self, digest, username, exp=None, now=None):
+        """검증된 토큰을 exp(유닉스 시각)까지 캐시합니다."""
+        now = time.time() if now is None else now
+        expires_at = now + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+        with self._lock:
+            if digest in self._revoked:
+                return
+            self._entries[digest] = (username, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def revoke(self, digest, exp=None, now=None):
+        """토큰을 폐기합니다. 폐기 기록은 토큰의 만료 시각까지 유지됩니다."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._prune_revoked(now)
+            self._revoked[digest] = float(exp) if exp is not None else float('inf')
+            self._stats["revoked"] += 1
+        if self.revocations is not None:
+            try:
+                self.revocations.revoke(digest, exp, now)
+            except sqlite3.Error as e:
+                logger.error(f"공유 토큰 폐기 목록 기록 실패 (이 프로세스에서만 폐기됨): {e}")
+
+    def is_revoked(self, digest, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            expires_at = self._revoked.get(digest)
+            if expires_at is not None:
+                if now < expires_at:
+                    return True
+                # 이미 만료된 토큰은 서명 검증 단계에서 거부되므로 기록 삭제
+                del self._revoked[digest]
+        return self._shared_is_revoked(digest, now)
+
+    def _shared_is_revoked(self, digest, now):
+        if self.revocations is None:
+            return False
+        try:
+            return self.revocations.is_revoked(digest, now)
+        except sqlite3.Error as e:
+            logger.error(f"공유 토큰 폐기 목록 확인 실패: {e}")
+            return False
+
+    def _prune_revoked(self, now):
+        for digest in [digest for digest, expires_at in self._revoked.items() if now >= expires_at]:
+            del self._revoked[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["revoked_entries"] = len(self._revoked)
+        return stats
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_token_cache():
+    """프로세스 전체에서 공유하는 검증된 토큰 캐시를 반환합니다.
+
+    TOKEN_CACHE_MAX_ENTRIES: 최대 캐시 항목 수
+    TOKEN_CACHE_MAX_TTL: exp가 없는 토큰의 캐시 유지 시간(초)
+    TOKEN_REVOCATION_DB: 프로세스 간에 공유하는 폐기 목록 파일 경로 (기본값 data/revoked_tokens.db, off이면 사용 안 함)
+    """
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = VerifiedTokenCache(
+                    max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 1024)),
+                    max_ttl=float(os.getenv("TOKEN_CACHE_MAX_TTL", 300)),
+                    revocations=_create_revocation_store()
+                )
+    return _CACHE
+
+
+def _create_revocation_store():
+    db_path = os.getenv("TOKEN_REVOCATION_DB", os.path.join("data", "revoked_tokens.db"))
+    if not db_path or db_path.lower() == "off":
+        return None
+    try:
+        return RevocationStore(db_path)
+    except (OSError, sqlite3.Error) as e:
+        # 읽기 전용 파일 시스템 등: 폐기는 이 프로세스 안에서만 적용
+        logger.warning(f"공유 토큰 폐기 목록을 열 수 없어 프로세스 메모리만 사용: {e}")
+        return None
@@ -1,16 +1,22 @@
 import json
 import os
 import jwt
-from datetime import datetime
+from jwt.algorithms import HMACAlgorithm
 from http.server import BaseHTTPRequestHandler
-from openai import OpenAI
 from dotenv import load_dotenv
+from .llm_gateway import get_gateway, resolve_api_key
+from .game_catalog import publish_items
+from .token_cache import get_token_cache, token_digest
+from .serialization import dumps, write_file
 
 # 환경 변수 로드 (로컬 개발 환경용)
 load_dotenv()
 
 # JWT 서명용 비밀 키
 JWT_SECRET = os.environ.get("JWT_SECRET", "your-secret-key-for-jwt-signing")
+# HS256 검증 키 (요청마다 변환하지 않도록 시작 시 한 번 준비)
+JWT_KEY = HMACAlgorithm(HMACAlgorithm.SHA256).prepare_key(JWT_SECRET)
+JWT_ALGORITHMS = ['HS256']
 
 # 데이터 파일 경로
 DATA_PATH = os.path.join(os.path.dirname(__file__), '../data')
@@ -33,40 +39,74 @@ def create_response(success=True, data=None, message=None, error=None, status_co
     
     return response, status_code
 
+# Bearer 토큰 추출
+def extract_token(auth_header):
+    """인증 헤더에서 토큰 문자열을 추출합니다."""
+    if auth_header.startswith('Bearer '):
+        return auth_header[7:]
+    return auth_header
+
 # JWT 토큰 검증 함수
 def verify_token(auth_header):
     """
     인증 헤더에서 JWT 토큰을 추출하고 검증합니다.
     성공 시 True와 사용자 이름을 반환하고, 실패 시 False와 오류 메시지를 반환합니다.
+    한 번 검증한 토큰은 만료 시각까지 캐시하여 서명을 다시 검증하지 않습니다.
     """
     if not auth_header:
         return False, "인증 헤더가 없습니다"
     
     try:
-        # Bearer 토큰 형식에서 토큰 추출
-        if auth_header.startswith('Bearer '):
-            token = auth_header[7:]
-        else:
-            token = auth_header
+        token = extract_token(auth_header)
+        digest = token_digest(token)
+        cache = get_token_cache()
+        
+        # 캐시된 토큰 확인 (폐기된 토큰은 캐시에서 제거됨)
+        username = cache.get(digest)
+        if username is not None:
+            return True, username
         
-        # 토큰 디코딩 및 검증
-        payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+        # 토큰 디코딩 및 검증 (만료 시간도 함께 확인)
+        payload = jwt.decode(token, JWT_KEY, algorithms=JWT_ALGORITHMS)
         
-        # 만료 시간 확인
-        if 'exp' in payload and datetime.utcnow().timestamp() > payload['exp']:
-            return False, "토큰이 만료되었습니다"
+        if cache.is_revoked(digest):
+            return False, "폐기된 토큰입니다"
         
         # 사용자 이름 반환
         username = payload.get('sub')
         if not username:
             return False, "토큰에 사용자 정보가 없습니다"
         
+        cache.set(digest, username, payload.get('exp'))
         return True, username
+    except jwt.ExpiredSignatureError:
+        return False, "토큰이 만료되었습니다"
     except jwt.InvalidTokenError:
         return False, "유효하지 않은 토큰입니다"
     except Exception as e:
         return False, f"토큰 검증 중 오류 발생: {str(e)}"
 
+# JWT 토큰 폐기 함수
+def revoke_token(auth_header):
+    """
+    토큰을 폐기하여 만료 전이라도 더 이상 인증에 사용할 수 없게 합니다.
+    서명이 유효한 토큰만 폐기할 수 있으며, 성공 여부와 메시지를 반환합니다.
+    """
+    if not auth_header:
+        return False, "인증 헤더가 없습니다"
+    
+    token = extract_token(auth_header)
+    try:
+        payload = jwt.decode(token, JWT_KEY, algorithms=JWT_ALGORITHMS)
+    except jwt.ExpiredSignatureError:
+        # 이미 만료된 토큰은 폐기할 필요 없음
+        return True, "토큰이 이미 만료되었습니다"
+    except jwt.InvalidTokenError:
+        return False, "유효하지 않은 토큰입니다"
+    
+    get_token_cache().revoke(token_digest(token), payload.get('exp'))
+    return True, "토큰이 폐기되었습니다"
+
 # 관리자 인증 필요 데코레이터
 def admin_required(func):
     """
@@ -89,7 +129,7 @@ def admin_required(func):
             )
             return {
                 "statusCode": status_code,
-                "body": json.dumps(response_data),
+                "body": dumps(response_data),
                 "headers": {
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*"
@@ -103,20 +143,15 @@ def admin_required(func):
 
 # OpenAI 클라이언트 생성
 def create_openai_client():
-    # 여러 가능한 환경 변수 이름을 시도합니다
-    possible_key_names = ['OPENAI_API_KEY', 'OPENAI_KEY', 'OPEN_AI_KEY', 'OPENAI']
-    
-    api_key = None
-    for key_name in possible_key_names:
-        api_key = os.environ.get(key_name)
-        if api_key:
-            break
+    """프로세스 전체에서 공유하는 OpenAI 클라이언트를 반환합니다."""
+    # 여러 가능한 환경 변수 이름에서 API 키를 찾습니다
+    api_key = resolve_api_key()
     
     # 키가 없는 경우 예외 발생
     if not api_key:
         raise ValueError("OpenAI API 키가 설정되지 않았습니다. 환경 변수를 확인하세요.")
     
-    return OpenAI(api_key=api_key)
+    return get_gateway().client
 
 # 게임 항목 로드
 def load_game_items():
@@ -156,8 +191,10 @@ def load_game_items():
 def save_game_items(items):
     try:
         os.makedirs(DATA_PATH, exist_ok=True)
-        with open(os.path.join(DATA_PATH, 'game_items.json'), 'w', encoding='utf-8') as f:
-            json.dump(items, f, ensure_ascii=False, indent=2)
+        items_file = os.path.join(DATA_PATH, 'game_items.json')
+        write_file(items_file, items)
+        # 같은 파일을 사용하는 게임 카탈로그 갱신
+        publish_items(items_file, items)
         return True
     except Exception as e:
         print(f"게임 항목 저장 중 오류: {str(e)}")
@@ -2,19 +2,24 @@
 Vercel 서버리스 함수 핸들러
 """
 import json
+import base64
 import traceback
 import logging
 import time
 import os
 import sys
-from io import BytesIO
+from io import RawIOBase
+from functools import lru_cache
+from urllib.parse import urlencode
 from flask import Flask
 
+try:
+    from api.log_pipeline import configure_logging
+except ImportError:
+    from log_pipeline import configure_logging
+
 # 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # 플래스크 앱 임포트
@@ -38,95 +43,174 @@ except ImportError:
                 "timestamp": int(time.time())
             })
 
+# 호출마다 바뀌지 않는 WSGI environ 값 (호출 시 복사 후 요청별 값만 채움)
+ENVIRON_TEMPLATE = {
+    'SCRIPT_NAME': '',
+    'wsgi.errors': sys.stderr,
+    'wsgi.version': (1, 0),
+    'wsgi.multithread': False,
+    'wsgi.multiprocess': False,
+    'wsgi.run_once': False,
+    'wsgi.url_scheme': 'https',
+    'SERVER_NAME': 'vercel',
+    'SERVER_PORT': '443',
+    'SERVER_PROTOCOL': 'HTTP/1.1',
+    'VERCEL_DEPLOYMENT_ID': os.environ.get('VERCEL_DEPLOYMENT_ID', 'local'),
+    'VERCEL_ENV': os.environ.get('VERCEL_ENV', 'development')
+}
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS'
+}
+
+# 본문을 문자열 그대로 반환할 Content-Type (그 밖의 응답은 base64로 인코딩)
+TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml')
+
+
+@lru_cache(maxsize=256)
+def environ_key(header):
+    """HTTP 헤더 이름을 WSGI environ 키로 변환합니다 (헤더 이름별로 캐시)."""
+    name = header.upper().replace('-', '_')
+    if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+        return name
+    return 'HTTP_' + name
+
+
+class BodyReader(RawIOBase):
+    """요청 본문 bytes를 memoryview로 감싸 복사 없이 읽는 wsgi.input 스트림
+
+    본문 전체를 한 번에 읽으면 원본 bytes 객체를 그대로 반환합니다.
+    """
+
+    def __init__(self, body):
+        self._body = body
+        self._view = memoryview(body)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        start = self._pos
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), start + size)
+        self._pos = end
+        if start == 0 and end == len(self._view):
+            return self._body
+        return self._view[start:end].tobytes()
+
+    def readinto(self, buffer):
+        data = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def readline(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        newline = self._body.find(b'\n', self._pos, end)
+        return self.read((newline + 1 if newline != -1 else end) - self._pos)
+
+
+def decode_body(event):
+    """Vercel 이벤트의 본문을 bytes로 변환합니다 (base64 인코딩된 바이너리 본문 포함)."""
+    body = event.get('body')
+    if not body:
+        return b''
+    if event.get('isBase64Encoded'):
+        return base64.b64decode(body)
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    return bytes(body)
+
+
+def build_environ(event, body):
+    """Vercel 이벤트로 WSGI environ을 구성합니다."""
+    headers = event.get('headers') or {}
+    query = event.get('rawQueryString')
+    if query is None:
+        query_params = event.get('multiValueQueryStringParameters') or event.get('queryStringParameters')
+        query = urlencode(query_params, doseq=True) if query_params else ''
+
+    environ = ENVIRON_TEMPLATE.copy()
+    environ['REQUEST_METHOD'] = event.get('httpMethod', 'GET')
+    environ['PATH_INFO'] = event.get('path', '/')
+    environ['QUERY_STRING'] = query
+    environ['CONTENT_TYPE'] = ''
+    environ['REMOTE_ADDR'] = headers.get('x-real-ip', headers.get('x-forwarded-for', '127.0.0.1'))
+    for header, value in headers.items():
+        environ[environ_key(header)] = value
+    environ['CONTENT_LENGTH'] = str(len(body))
+    environ['wsgi.input'] = BodyReader(body)
+    return environ
+
+
+def is_text_response(headers):
+    content_type = headers.get('Content-Type', '')
+    return not content_type or content_type.startswith(TEXT_CONTENT_TYPES)
+
+
 def handler(event, context):
     """
     Vercel 서버리스 함수 핸들러
     이것이 Vercel 서버리스 함수의 진입점입니다.
     """
     start_time = time.time()
-    logger.info(f"요청 시작: {event.get('path', '/')} [{event.get('httpMethod', 'GET')}]")
+    path = event.get('path', '/')
+    http_method = event.get('httpMethod', 'GET')
+    logger.debug("요청 시작: %s [%s]", path, http_method)
     
     try:
-        # Vercel 이벤트 데이터에서 필요한 정보 추출
-        path = event.get('path', '/')
-        http_method = event.get('httpMethod', 'GET')
-        headers = event.get('headers', {})
-        query_params = event.get('queryStringParameters', {})
-        body = event.get('body', '')
-        
-        # 요청 정보 로깅
-        logger.info(f"요청 경로: {path}, 메소드: {http_method}")
-        if query_params:
-            logger.info(f"쿼리 파라미터: {query_params}")
-        
         # OPTIONS 요청 빠른 처리 (CORS preflight)
         if http_method == 'OPTIONS':
-            logger.info("OPTIONS 요청 처리")
+            logger.debug("OPTIONS 요청 처리")
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With'
-                },
+                'headers': dict(CORS_HEADERS),
                 'body': ''
             }
         
-        # 환경 변수 설정
-        environ = {
-            'REQUEST_METHOD': http_method,
-            'PATH_INFO': path,
-            'QUERY_STRING': '&'.join([f"{k}={v}" for k, v in query_params.items()]) if query_params else '',
-            'CONTENT_TYPE': headers.get('content-type', ''),
-            'CONTENT_LENGTH': str(len(body) if body else 0),
-            'wsgi.input': BytesIO(body.encode() if body else b''),
-            'wsgi.errors': BytesIO(),
-            'wsgi.version': (1, 0),
-            'wsgi.multithread': False,
-            'wsgi.multiprocess': False,
-            'wsgi.run_once': False,
-            'wsgi.url_scheme': 'https',
-            'SERVER_NAME': 'vercel',
-            'SERVER_PORT': '443',
-            'REMOTE_ADDR': headers.get('x-real-ip', headers.get('x-forwarded-for', '127.0.0.1')),
-            'VERCEL_DEPLOYMENT_ID': os.environ.get('VERCEL_DEPLOYMENT_ID', 'local'),
-            'VERCEL_ENV': os.environ.get('VERCEL_ENV', 'development')
-        }
+        environ = build_environ(event, decode_body(event))
         
-        # 요청 헤더 추가
-        for header, value in headers.items():
-            key = 'HTTP_' + header.upper().replace('-', '_')
-            environ[key] = value
-            
-        # WSGI 응답을 수집하기 위한 변수들
-        response_data = []
+        # WSGI 응답을 bytes 조각으로 수집
+        chunks = []
         status_code = [200]
         response_headers = [{}]
         
         def start_response(status, response_headers_list, exc_info=None):
-            status_code[0] = int(status.split(' ')[0])
+            status_code[0] = int(status.split(' ', 1)[0])
             response_headers[0] = dict(response_headers_list)
-            return lambda x: response_data.append(x)
+            return chunks.append
         
         # Flask 앱 호출
-        logger.info("Flask 앱 실행")
         result = app(environ, start_response)
-        response_data.extend([chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk for chunk in result])
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        body = chunks[0] if len(chunks) == 1 else b''.join(chunks)
         
         # CORS 헤더 추가
-        response_headers[0]['Access-Control-Allow-Origin'] = '*'
-        response_headers[0]['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
-        response_headers[0]['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+        headers = response_headers[0]
+        headers.update(CORS_HEADERS)
         
         # 응답 시간 계산
         elapsed_time = round((time.time() - start_time) * 1000, 2)
-        logger.info(f"응답 생성 완료: {status_code[0]}, 소요 시간: {elapsed_time}ms")
+        logger.info("응답 생성 완료: %s %s, 소요 시간: %sms", path, status_code[0], elapsed_time)
         
-        # Vercel 형식으로 응답 반환
+        # Vercel 형식으로 응답 반환 (텍스트가 아닌 응답은 base64로 인코딩)
+        if is_text_response(headers):
+            return {
+                'statusCode': status_code[0],
+                'headers': headers,
+                'body': body.decode('utf-8')
+            }
         return {
             'statusCode': status_code[0],
-            'headers': response_headers[0],
-            'body': ''.join(response_data)
+            'headers': headers,
+            'body': base64.b64encode(body).decode('ascii'),
+            'isBase64Encoded': True
         }
         
     except Exception as e:
@@ -155,4 +239,4 @@ def handler(event, context):
                 # 프로덕션 환경에서는 보안을 위해 스택 트레이스를 노출하지 않는 것이 좋습니다
                 # 'traceback': error_detail if os.environ.get('ENV') == 'development' else None
             })
-        } 
\ No newline at end of file
+        }
@@ -0,0 +1,302 @@
+"""
+승리/패배 조건 엔진
+
+아이템별·카테고리별 승리(win)/패배(lose) 규칙을 data/victory_rules.json에 선언하고,
+게임 아이템마다 하나의 결합 정규식으로 한 번만 컴파일하여 응답 텍스트를 한 번에
+검사합니다. 스트리밍 응답은 StreamMatcher로 새로 들어온 부분만 이어서 검사합니다.
+
+규칙 파일 형식:
+    {
+      "version": 1,
+      "common": {"win": [...], "lose": [...]},
+      "categories": {"플러팅": {"win": [...], "lose": [...], "triggers": [...]}},
+      "conditions": {"전화번호": {"win": [...]}},
+      "items": {"1": {"win": [...]}}
+    }
+
+각 규칙은 다음 중 하나입니다.
+    {"name": "...", "keywords": ["010-", "전화번호"]}      # 부분 문자열
+    {"name": "...", "regex": "01\\d-\\d{4}", "max_length": 13}  # 정규식 (스트리밍 검사 창 길이)
+    {"name": "...", "prompt": "correct_answer_message"}    # 공통 프롬프트 문구 (게임 정보로 치환)
+
+triggers는 사용자 메시지에서 찾는 키워드로, 기본 응답 선택과 디버그 정보에 사용됩니다.
+conditions는 승리 조건 문구에 키가 포함된 게임에 적용되며, 카테고리 정보가 없는 세션용입니다.
+아이템 > 카테고리 > conditions 순으로 하나만 사용하며, common 규칙은 항상 함께 적용됩니다.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger("api.victory")
+
+# 규칙 파일이 없을 때 사용하는 기본 규칙 (data/victory_rules.json과 같은 내용)
+DEFAULT_RULES = {
+    "version": 1,
+    "common": {
+        "win": [{"name": "correct_answer_message", "prompt": "correct_answer_message"}]
+    },
+    "categories": {
+        "플러팅": {
+            "win": [
+                {"name": "phone_number", "regex": r"01[016789][-\s]?\d{3,4}[-\s]?\d{4}", "max_length": 13},
+                {"name": "phone_keyword", "keywords": ["010-", "010", "XXX-XXXX", "전화번호"]}
+            ],
+            "triggers": ["전화", "번호", "연락처", "만날래"]
+        }
+    },
+    "conditions": {
+        "전화번호": {
+            "win": [{"name": "phone_number", "regex": r"01[016789][-\s]?\d{3,4}[-\s]?\d{4}", "max_length": 13}]
+        }
+    },
+    "items": {}
+}
+
+# 정규식 규칙에 max_length가 없을 때 스트리밍 검사에 사용할 최대 일치 길이
+DEFAULT_REGEX_MAX_LENGTH = 64
+
+Verdict = namedtuple("Verdict", ["victory", "defeat", "rule"])
+NO_VERDICT = Verdict(False, False, None)
+
+
+class _SafeFields(dict):
+    # 게임 정보에 없는 필드는 {필드} 그대로 남김
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+class CompiledRules:
+    """아이템 하나의 승리/패배 규칙을 결합한 정규식"""
+
+    __slots__ = ("pattern", "outcomes", "trigger_pattern", "max_match_length", "rule_count")
+
+    def __init__(self, win_rules, lose_rules, triggers, fields, prompts):
+        alternatives = []
+        self.outcomes = {}
+        self.max_match_length = 1
+        for outcome, rules in (("win", win_rules), ("lose", lose_rules)):
+            for rule in rules:
+                source, max_length = self._rule_source(rule, fields, prompts)
+                if not source:
+                    continue
+                group = f"r{len(alternatives)}"
+                alternatives.append(f"(?P<{group}>{source})")
+                self.outcomes[group] = (outcome, rule.get("name", group))
+                self.max_match_length = max(self.max_match_length, max_length)
+        self.rule_count = len(alternatives)
+        self.pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        self.trigger_pattern = _keyword_pattern(triggers) if triggers else None
+
+    @staticmethod
+    def _rule_source(rule, fields, prompts):
+        if "regex" in rule:
+            return rule["regex"], int(rule.get("max_length", DEFAULT_REGEX_MAX_LENGTH))
+        if "keywords" in rule:
+            keywords = [keyword for keyword in rule["keywords"] if keyword]
+        elif "prompt" in rule:
+            template = (prompts or {}).get(rule["prompt"])
+            keywords = [template.format_map(_SafeFields(fields))] if template else []
+        else:
+            return None, 0
+        if not keywords:
+            return None, 0
+        return _keyword_source(keywords), max(len(keyword) for keyword in keywords)
+
+    def evaluate(self, text, start=0):
+        """텍스트를 한 번 훑어 승리 규칙이 하나라도 맞으면 승리, 패배 규칙만 맞으면 패배를 반환합니다."""
+        if self.pattern is None:
+            return NO_VERDICT
+        defeat = None
+        for match in self.pattern.finditer(text, start):
+            outcome, name = self.outcomes[match.lastgroup]
+            if outcome == "win":
+                return Verdict(True, False, name)
+            if defeat is None:
+                defeat = name
+        if defeat is not None:
+            return Verdict(False, True, defeat)
+        return NO_VERDICT
+
+    def triggers(self, message):
+        """사용자 메시지에 포함된 트리거 키워드 목록을 반환합니다."""
+        if self.trigger_pattern is None or not message:
+            return []
+        found = []
+        for match in self.trigger_pattern.finditer(message):
+            keyword = match.group(0).lower()
+            if keyword not in found:
+                found.append(keyword)
+        return found
+
+
+def _keyword_source(keywords):
+    # 긴 키워드를 먼저 두어 겹치는 키워드 중 가장 긴 것과 일치하도록 함
+    return "|".join(re.escape(keyword) for keyword in sorted(set(keywords), key=len, reverse=True))
+
+
+def _keyword_pattern(keywords):
+    return re.compile(_keyword_source(keywords), re.IGNORECASE)
+
+
+class StreamMatcher:
+    """스트리밍으로 늘어나는 응답에서 새로 들어온 부분만 이어서 검사합니다.
+
+    이전에 검사한 부분은 가장 긴 규칙 길이만큼만 다시 검사합니다.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._parts = []
+        self._tail = ""
+        self.verdict = NO_VERDICT
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    @property
+    def victory(self):
+        return self.verdict.victory
+
+    @property
+    def defeat(self):
+        return self.verdict.defeat
+
+    def feed(self, delta):
+        """텍스트 조각을 추가하고 승리 조건 달성 여부를 반환합니다."""
+        self._parts.append(delta)
+        if self.verdict.victory:
+            return True
+        # 경계에 걸친 일치도 찾도록 이전 텍스트의 꼬리(가장 긴 규칙 길이 - 1)부터 검사
+        window = self._tail + delta
+        verdict = self.rules.evaluate(window)
+        if verdict.victory or (verdict.defeat and not self.verdict.defeat):
+            self.verdict = verdict
+        keep = self.rules.max_match_length - 1
+        self._tail = window[-keep:] if keep else ""
+        return self.verdict.victory
+
+
+class VictoryEngine:
+    """규칙 파일을 읽어 아이템별로 컴파일한 규칙을 캐시하는 승리 조건 엔진"""
+
+    def __init__(self, rules_path=None, check_interval=2.0):
+        self.rules_path = str(rules_path) if rules_path else None
+        self.check_interval = check_interval
+        self._spec = DEFAULT_RULES
+        self._mtime = None
+        self._last_checked = float('-inf')
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self._stats = {"compiled": 0, "cache_hits": 0, "reloads": 0}
+
+    # 규칙 파일 관리
+    def load_spec(self, spec):
+        """규칙 명세를 교체하고 컴파일 캐시를 비웁니다."""
+        with self._lock:
+            self._spec = spec
+            self._compiled = {}
+
+    def reload_if_changed(self):
+        """규칙 파일이 바뀌었으면 다시 읽습니다 (check_interval마다 확인)."""
+        if not self.rules_path:
+            return
+        now = time.monotonic()
+        if now - self._last_checked < self.check_interval:
+            return
+        self._last_checked = now
+        try:
+            mtime = os.stat(self.rules_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        if mtime is None:
+            self.load_spec(DEFAULT_RULES)
+            return
+        try:
+            with open(self.rules_path, 'r', encoding='utf-8') as f:
+                self.load_spec(json.load(f))
+            self._stats["reloads"] += 1
+            logger.info(f"승리 조건 규칙 로드: {self.rules_path}")
+        except Exception as e:
+            logger.error(f"승리 조건 규칙 로드 중 오류 발생: {e}")
+
+    # 규칙 컴파일
+    def rules_for(self, game_session, prompts=None):
+        """게임 세션의 아이템/카테고리에 해당하는 컴파일된 규칙을 반환합니다."""
+        self.reload_if_changed()
+        item_id = str(game_session.get('id'))
+        category = game_session.get('category') or ''
+        win_condition = game_session.get('win_condition') or ''
+        prompt_templates = tuple(
+            (prompts or {}).get(rule["prompt"]) for rule in self._spec.get("common", {}).get("win", [])
+            if "prompt" in rule
+        )
+        key = (item_id, category, win_condition, prompt_templates)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._stats["cache_hits"] += 1
+            return compiled
+
+        spec = self._spec
+        common = spec.get("common", {})
+        specific = (
+            spec.get("items", {}).get(item_id)
+            or spec.get("categories", {}).get(category)
+            or next((rules for keyword, rules in spec.get("conditions", {}).items() if keyword in win_condition), None)
+            or {}
+        )
+        compiled = CompiledRules(
+            common.get("win", []) + specific.get("win", []),
+            common.get("lose", []) + specific.get("lose", []),
+            common.get("triggers", []) + specific.get("triggers", []),
+            game_session,
+            prompts
+        )
+        with self._lock:
+            if self._spec is spec:
+                self._compiled[key] = compiled
+            self._stats["compiled"] += 1
+        return compiled
+
+    # 검사
+    def evaluate(self, text, game_session, prompts=None):
+        """응답 텍스트 전체를 검사하여 Verdict(victory, defeat, rule)를 반환합니다."""
+        return self.rules_for(game_session, prompts).evaluate(text or "")
+
+    def matcher(self, game_session, prompts=None):
+        """스트리밍 응답용 StreamMatcher를 반환합니다."""
+        return StreamMatcher(self.rules_for(game_session, prompts))
+
+    def triggers(self, message, game_session, prompts=None):
+        """사용자 메시지에 포함된 트리거 키워드 목록을 반환합니다."""
+        return self.rules_for(game_session, prompts).triggers(message)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_rule_sets"] = len(self._compiled)
+        return stats
+
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_victory_engine():
+    """프로세스 전체에서 공유하는 승리 조건 엔진을 반환합니다.
+
+    VICTORY_RULES_FILE: 규칙 파일 경로 (기본값 data/victory_rules.json)
+    """
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = VictoryEngine(os.getenv("VICTORY_RULES_FILE", os.path.join("data", "victory_rules.json")))
+    return _ENGINE
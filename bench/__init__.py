@@ -0,0 +1,3 @@
+"""
+부하 테스트 및 지연 시간 벤치마크 도구
+"""
@@ -0,0 +1,164 @@
+"""
+벤치마크용 가짜 OpenAI 서버
+
+/v1/chat/completions 요청에 대해 설정한 지연 시간, 스트리밍 속도,
+오류 비율로 응답합니다. 실제 API를 호출하지 않고 서버 성능만 측정할 때 사용합니다.
+
+단독 실행:
+    python -m bench.fake_openai --port 8765 --latency 0.3 --error-rate 0.05
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_REPLY = "안녕하세요! 오늘 날씨가 정말 좋네요. 어떤 이야기를 나눠볼까요?"
+
+
+class FakeOpenAIServer:
+    """지연 시간과 오류 비율을 조절할 수 있는 가짜 OpenAI 채팅 완성 서버"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, jitter=0.05,
+                 token_delay=0.01, error_rate=0.0, reply=DEFAULT_REPLY, chunk_chars=3):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.reply = reply
+        self.chunk_chars = chunk_chars
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """백그라운드 스레드에서 서버를 시작합니다."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _sleep_latency(self):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests += 1
+
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                server._sleep_latency()
+                if random.random() < server.error_rate:
+                    self._send_json(500, {"error": {"message": "fake server error", "type": "server_error"}})
+                    return
+
+                model = body.get("model", "gpt-3.5-turbo")
+                if body.get("stream"):
+                    self._stream(model)
+                else:
+                    self._send_json(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": server.reply},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": {
+                            "prompt_tokens": sum(len(m.get("content") or "") for m in body.get("messages", [])),
+                            "completion_tokens": len(server.reply),
+                            "total_tokens": 0
+                        }
+                    })
+
+            def _stream(self, model):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                reply = server.reply
+                pieces = [reply[i:i + server.chunk_chars] for i in range(0, len(reply), server.chunk_chars)]
+                try:
+                    for piece in pieces:
+                        chunk = {
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                        }
+                        self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                        if server.token_delay:
+                            time.sleep(server.token_delay)
+                    self._write_chunk(b"data: [DONE]\n\n")
+                    self._write_chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 스트림을 먼저 닫은 경우 (예: 승리 조건 조기 감지)
+                    pass
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 가짜 OpenAI 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="응답 지연 시간(초)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="지연 시간 변동 폭(초)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="스트리밍 청크 간격(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 오류 응답 비율 (0~1)")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        token_delay=args.token_delay, error_rate=args.error_rate
+    )
+    print(f"가짜 OpenAI 서버 실행 중: {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
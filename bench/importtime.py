@@ -0,0 +1,149 @@
+"""
+콜드 스타트 import 시간 프로파일
+
+새 파이썬 프로세스에서 `-X importtime`으로 앱 모듈을 import하고, 모듈별 import 시간과
+최상위 패키지별 합계, 앱 초기화(initialize_app) 시간을 보고합니다.
+결과를 JSON으로 저장해 두면 배포마다 콜드 스타트 시간 변화를 비교할 수 있습니다.
+
+사용 예:
+    python -m bench.importtime
+    python -m bench.importtime --mode eager --top 30
+    python -m bench.importtime --runs 5 --save-baseline importtime-baseline.json
+    python -m bench.importtime --compare importtime-baseline.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import 후 앱이 기록한 시작 정보를 출력하는 스크립트
+PROBE = (
+    "import json, time\n"
+    "started = time.perf_counter()\n"
+    "import {module} as app_module\n"
+    "elapsed = (time.perf_counter() - started) * 1000\n"
+    "print('STARTUP ' + json.dumps(dict(getattr(app_module, 'STARTUP_INFO', {{}}), wall_ms=round(elapsed, 2))))\n"
+)
+
+
+def parse_importtime(stderr):
+    """-X importtime 출력을 [(모듈, 자체 시간 us, 누적 시간 us, 깊이)] 목록으로 변환합니다."""
+    entries = []
+    for line in stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package" 형식
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), self_us, cumulative_us, depth))
+    return entries
+
+
+def profile_once(module, mode, env_overrides):
+    """새 프로세스에서 모듈을 한 번 import하고 import 시간 목록과 시작 정보를 반환합니다."""
+    env = dict(os.environ)
+    env.update(env_overrides)
+    env["STARTUP_MODE"] = mode
+    env.setdefault("LOG_LEVEL", "WARNING")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import 실패:\n{result.stderr[-2000:]}")
+    startup = {}
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            startup = json.loads(line[len("STARTUP "):])
+    return parse_importtime(result.stderr), startup
+
+
+def summarize(entries, top):
+    """모듈별/패키지별 import 시간을 요약합니다."""
+    packages = {}
+    for name, self_us, _, _ in entries:
+        package = name.split(".", 1)[0]
+        packages[package] = packages.get(package, 0) + self_us
+    total_us = sum(self_us for _, self_us, _, _ in entries)
+    top_cumulative = sorted(
+        (entry for entry in entries if entry[3] == 0), key=lambda entry: entry[2], reverse=True
+    )[:top]
+    top_self = sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]
+    return {
+        "total_ms": round(total_us / 1000, 2),
+        "modules": len(entries),
+        "packages_ms": {
+            package: round(us / 1000, 2)
+            for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "top_level_cumulative_ms": {name: round(cumulative / 1000, 2) for name, _, cumulative, _ in top_cumulative},
+        "top_self_ms": {name: round(self_us / 1000, 2) for name, self_us, _, _ in top_self}
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="콜드 스타트 import 시간 프로파일")
+    parser.add_argument("--module", default="api.index", help="import할 앱 모듈")
+    parser.add_argument("--mode", choices=("lazy", "eager"), default="lazy", help="STARTUP_MODE 값")
+    parser.add_argument("--runs", type=int, default=3, help="반복 횟수 (중앙값 사용)")
+    parser.add_argument("--top", type=int, default=15, help="출력할 상위 항목 수")
+    parser.add_argument("--save-baseline", help="결과를 기준선 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 기준선 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 판단할 증가 비율")
+    args = parser.parse_args(argv)
+
+    # 실제 API 키 없이도 같은 import 경로를 타도록 더미 키 사용
+    env_overrides = {"OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY") or "sk-importtime"}
+
+    runs = [profile_once(args.module, args.mode, env_overrides) for _ in range(args.runs)]
+    walls = [startup.get("wall_ms", 0.0) for _, startup in runs]
+    median_index = walls.index(statistics.median_low(walls))
+    entries, startup = runs[median_index]
+    summary = summarize(entries, args.top)
+    report = {
+        "module": args.module,
+        "mode": args.mode,
+        "runs": args.runs,
+        "wall_ms": statistics.median_low(walls),
+        "startup": startup,
+        **summary
+    }
+
+    print(f"{args.module} import ({args.mode}): 벽시계 {report['wall_ms']}ms, "
+          f"import 합계 {summary['total_ms']}ms, 모듈 {summary['modules']}개")
+    if startup:
+        print(f"initialize_app {startup.get('initialize_ms')}ms, 스냅샷 사용={startup.get('snapshot')}")
+    print("\n패키지별 자체 import 시간:")
+    for package, ms in summary["packages_ms"].items():
+        print(f"  {package:<30}{ms:>10.2f}ms")
+    print("\n모듈별 자체 import 시간 (상위):")
+    for name, ms in summary["top_self_ms"].items():
+        print(f"  {name:<30}{ms:>10.2f}ms")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        previous = baseline.get("wall_ms") or 0
+        change = (report["wall_ms"] - previous) / previous if previous else 0.0
+        print(f"\n기준선 대비: {previous}ms -> {report['wall_ms']}ms ({change * 100:+.1f}%)")
+        if change > args.threshold:
+            print("콜드 스타트 회귀 감지")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,438 @@
+"""
+API 부하 테스트 및 지연 시간 벤치마크
+
+가짜 OpenAI 서버를 띄운 뒤 /api/start → N × /api/ask → /api/end 게임 흐름을
+동시 사용자 수만큼 실행하고, 엔드포인트별 p50/p95/p99 지연 시간, 처리량,
+RSS 증가량을 보고합니다. 결과를 기준선 JSON으로 저장해 두면 다음 실행에서
+회귀 여부를 비교할 수 있습니다.
+
+사용 예:
+    # Flask 앱을 프로세스 안에서 직접 호출
+    python -m bench.run --users 20 --turns 4
+
+    # gunicorn으로 띄운 서버를 HTTP로 호출
+    python -m bench.run --mode gunicorn --workers 2 --threads 8
+
+    # 스트리밍(SSE) 모드, 기준선 저장 및 비교
+    python -m bench.run --stream --save-baseline bench/baseline.json
+    python -m bench.run --stream --compare bench/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import platform
+import threading
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_openai import FakeOpenAIServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("/api/start", "/api/ask", "/api/end")
+
+
+# 통계 계산
+def percentile(values, p):
+    """정렬된 값 목록에서 백분위수를 선형 보간으로 계산합니다."""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    rank = (len(values) - 1) * p / 100.0
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class EndpointStats:
+    """엔드포인트별 지연 시간과 오류 수 집계"""
+
+    def __init__(self):
+        self.latencies = []
+        self.first_byte = []
+        self.errors = 0
+        self.elapsed = 0.0
+        self.rss_growth_kb = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok, first_byte=None):
+        with self._lock:
+            self.latencies.append(latency)
+            if first_byte is not None:
+                self.first_byte.append(first_byte)
+            if not ok:
+                self.errors += 1
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        result = {
+            "count": len(latencies),
+            "errors": self.errors,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "throughput_rps": round(len(latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            "rss_growth_kb": self.rss_growth_kb
+        }
+        if self.first_byte:
+            first_byte = sorted(self.first_byte)
+            result["ttfb_p50_ms"] = round(percentile(first_byte, 50) * 1000, 2)
+            result["ttfb_p95_ms"] = round(percentile(first_byte, 95) * 1000, 2)
+        return result
+
+
+# 메모리 사용량 측정
+def read_rss_kb(pid=None):
+    """프로세스의 현재 RSS(KB)를 반환합니다. /proc이 없으면 최대 RSS를 사용합니다."""
+    path = f"/proc/{pid or 'self'}/status"
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if pid is None:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if platform.system() == "Darwin" else rss
+    return 0
+
+
+def process_tree_rss_kb(pid):
+    """gunicorn 마스터와 워커 프로세스의 RSS 합계(KB)를 반환합니다."""
+    total = read_rss_kb(pid)
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        children = []
+    return total + sum(read_rss_kb(child) for child in children)
+
+
+# 요청 클라이언트
+class InProcessClient:
+    """Flask 테스트 클라이언트로 앱을 직접 호출하는 클라이언트"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def post(self, path, payload, stream=False):
+        started = time.perf_counter()
+        response = self._client().post(path, json=payload, buffered=False)
+        first_byte = None
+        chunks = []
+        for chunk in response.response:
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            chunks.append(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+        response.close()
+        return response.status_code, b"".join(chunks), first_byte if stream else None
+
+    def rss_kb(self):
+        return read_rss_kb()
+
+
+class HTTPClient:
+    """실행 중인 서버에 keep-alive 연결로 요청하는 HTTP 클라이언트"""
+
+    def __init__(self, host, port, server_pid=None):
+        self.host = host
+        self.port = port
+        self.server_pid = server_pid
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return conn
+
+    def post(self, path, payload, stream=False):
+        body = json.dumps(payload).encode('utf-8')
+        started = time.perf_counter()
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # 서버가 keep-alive 연결을 닫은 경우 한 번 다시 연결
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        first_byte = None
+        chunks = []
+        while True:
+            chunk = response.read1(65536) if stream else response.read()
+            if not chunk:
+                break
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            chunks.append(chunk)
+            if not stream:
+                break
+        if response.will_close:
+            conn.close()
+            self._local.conn = None
+        return response.status, b"".join(chunks), first_byte if stream else None
+
+    def rss_kb(self):
+        return process_tree_rss_kb(self.server_pid) if self.server_pid else 0
+
+
+# 게임 흐름 실행
+def parse_body(body, stream):
+    """응답 본문을 JSON으로 해석합니다. 스트리밍 응답은 마지막 done 이벤트를 사용합니다."""
+    text = body.decode('utf-8', errors='replace')
+    if stream and text.startswith("event:"):
+        data = None
+        for block in text.split("\n\n"):
+            if block.startswith("event: done") or block.startswith("event: error"):
+                data = block.split("data: ", 1)[1]
+        return json.loads(data) if data else {}
+    try:
+        return json.loads(text)
+    except ValueError:
+        return {}
+
+
+def run_phase(name, stats, client, jobs, concurrency):
+    """작업 목록을 동시에 실행하며 지연 시간과 RSS 변화를 기록합니다."""
+    rss_before = client.rss_kb()
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda job: job(), jobs))
+    stats.elapsed += time.perf_counter() - started
+    stats.rss_growth_kb += client.rss_kb() - rss_before
+    return results
+
+
+def run_benchmark(client, users, turns, stream, concurrency):
+    """사용자 수만큼 게임 흐름을 실행하고 엔드포인트별 통계를 반환합니다."""
+    stats = {endpoint: EndpointStats() for endpoint in ENDPOINTS}
+
+    def timed(endpoint, payload, use_stream=False):
+        started = time.perf_counter()
+        try:
+            status, body, first_byte = client.post(endpoint, payload, stream=use_stream)
+            ok = status < 400
+        except Exception:
+            status, body, first_byte, ok = 0, b"", None, False
+        stats[endpoint].record(time.perf_counter() - started, ok, first_byte)
+        return parse_body(body, use_stream) if ok else {}
+
+    # 1단계: 게임 시작
+    started_games = run_phase("/api/start", stats["/api/start"], client, [
+        (lambda: timed("/api/start", {})) for _ in range(users)
+    ], concurrency)
+    game_ids = [game.get("data", {}).get("game_id") for game in started_games]
+    game_ids = [game_id for game_id in game_ids if game_id]
+
+    # 2단계: 턴마다 모든 게임에 질문
+    for turn in range(turns):
+        run_phase("/api/ask", stats["/api/ask"], client, [
+            (lambda game_id=game_id: timed(
+                "/api/ask",
+                {"game_id": game_id, "message": f"{turn + 1}번째 질문입니다. 요즘 뭐하고 지내요?", "stream": stream},
+                use_stream=stream
+            )) for game_id in game_ids
+        ], concurrency)
+
+    # 3단계: 게임 종료
+    run_phase("/api/end", stats["/api/end"], client, [
+        (lambda game_id=game_id: timed("/api/end", {"game_id": game_id})) for game_id in game_ids
+    ], concurrency)
+
+    return {endpoint: endpoint_stats.summary() for endpoint, endpoint_stats in stats.items()}
+
+
+# 서버 준비
+def configure_app_env(base_url):
+    """앱이 가짜 OpenAI 서버를 사용하도록 환경 변수를 설정합니다."""
+    os.environ["OPENAI_API_KEY"] = "sk-bench"
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, port):
+    """gunicorn으로 WSGI 앱을 띄우고 요청을 받을 수 있을 때까지 기다립니다."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-k", "gthread",
+         "--threads", str(threads), "-b", f"127.0.0.1:{port}", "--log-level", "warning",
+         "api.wsgi:application"],
+        cwd=REPO_ROOT,
+        env=dict(os.environ)
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn 실행에 실패했습니다.")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn이 제시간에 시작되지 않았습니다.")
+
+
+# 기준선 비교
+def compare_with_baseline(report, baseline, threshold):
+    """기준선 대비 p95 지연 시간 증가나 처리량 감소가 threshold 비율을 넘으면 회귀로 보고합니다."""
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{endpoint} p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{endpoint} 처리량 {previous['throughput_rps']}rps -> {current['throughput_rps']}rps"
+            )
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def print_report(report):
+    header = f"{'endpoint':<12}{'count':>7}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'rssΔKB':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, summary in report["endpoints"].items():
+        print(f"{endpoint:<12}{summary['count']:>7}{summary['errors']:>5}"
+              f"{summary['p50_ms']:>9.1f}{summary['p95_ms']:>9.1f}{summary['p99_ms']:>9.1f}"
+              f"{summary['throughput_rps']:>9.1f}{summary['rss_growth_kb']:>9}")
+        if "ttfb_p50_ms" in summary:
+            print(f"{'':<12}TTFB p50={summary['ttfb_p50_ms']}ms p95={summary['ttfb_p95_ms']}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 추측 게임 API 부하 테스트")
+    parser.add_argument("--mode", choices=("inprocess", "gunicorn"), default="inprocess")
+    parser.add_argument("--users", type=int, default=20, help="동시에 진행할 게임 수")
+    parser.add_argument("--turns", type=int, default=4, help="게임당 /api/ask 횟수")
+    parser.add_argument("--concurrency", type=int, default=20, help="동시 요청 수")
+    parser.add_argument("--stream", action="store_true", help="/api/ask를 SSE 스트리밍 모드로 호출")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn 워커 수")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn 워커당 스레드 수")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="가짜 LLM 응답 지연(초)")
+    parser.add_argument("--llm-jitter", type=float, default=0.05, help="가짜 LLM 지연 변동 폭(초)")
+    parser.add_argument("--llm-token-delay", type=float, default=0.01, help="가짜 LLM 스트리밍 청크 간격(초)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="가짜 LLM 오류 비율 (0~1)")
+    parser.add_argument("--save-baseline", help="결과를 기준선 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 기준선 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 판단할 변화 비율")
+    parser.add_argument("--output", help="결과 JSON을 저장할 경로")
+    parser.add_argument("--verbose", action="store_true", help="앱의 INFO 로그도 출력")
+    args = parser.parse_args(argv)
+
+    fake = FakeOpenAIServer(
+        latency=args.llm_latency, jitter=args.llm_jitter,
+        token_delay=args.llm_token_delay, error_rate=args.llm_error_rate
+    ).start()
+    configure_app_env(fake.base_url)
+    if not args.verbose:
+        # 요청마다 남는 INFO 로그가 측정과 결과 출력을 방해하지 않도록 억제
+        logging.disable(logging.INFO)
+
+    server = None
+    try:
+        if args.mode == "gunicorn":
+            port = free_port()
+            server = start_gunicorn(args.workers, args.threads, port)
+            client = HTTPClient("127.0.0.1", port, server_pid=server.pid)
+        else:
+            os.chdir(REPO_ROOT)
+            sys.path.insert(0, REPO_ROOT)
+            from api.index import app
+            client = InProcessClient(app)
+
+        started = time.perf_counter()
+        endpoints = run_benchmark(client, args.users, args.turns, args.stream, args.concurrency)
+        elapsed = time.perf_counter() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        fake.stop()
+
+    total_requests = sum(summary["count"] for summary in endpoints.values())
+    report = {
+        "meta": {
+            "mode": args.mode,
+            "users": args.users,
+            "turns": args.turns,
+            "concurrency": args.concurrency,
+            "stream": args.stream,
+            "llm_latency": args.llm_latency,
+            "llm_error_rate": args.llm_error_rate,
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": int(time.time())
+        },
+        "endpoints": endpoints,
+        "total": {
+            "requests": total_requests,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+            "llm_requests": fake.requests
+        }
+    }
+
+    print_report(report)
+    print(f"전체: {total_requests}개 요청, {report['total']['elapsed_s']}s, "
+          f"{report['total']['throughput_rps']}rps, LLM 요청 {fake.requests}개")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"결과 저장: {path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.threshold)
+        if regressions:
+            print("성능 회귀 감지:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"기준선 대비 회귀 없음 (기준 커밋: {baseline.get('meta', {}).get('git_revision')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 저장소 루트에서 api 패키지를 import할 수 있도록 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 테스트에서 실제 OpenAI API를 호출하지 않도록 가짜 키 사용
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
@@ -0,0 +1,48 @@
+import pytest
+
+from api import index
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(index, "validate_api_key", lambda: (True, "ok"))
+    return index.app.test_client()
+
+
+def test_invalid_items_get_per_item_errors(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(index, "run_turn", lambda game_id, message: calls.append(game_id) or ({"success": True}, 200))
+
+    response = client.post("/api/ask/batch", json={"turns": [
+        {"game_id": ["x"], "message": "hi"},
+        {"game_id": "g1"},
+        {"message": "hi"},
+        {"game_id": "g1", "message": 3},
+        "not an object",
+        {"game_id": "g1", "message": "hi"}
+    ]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [result["status"] for result in data["results"]] == [400, 400, 400, 400, 400, 200]
+    assert data["succeeded"] == 1 and data["failed"] == 5
+    assert calls == ["g1"]
+
+
+def test_turns_for_same_game_run_in_order(client, monkeypatch):
+    order = []
+    monkeypatch.setattr(index, "run_turn", lambda game_id, message: order.append((game_id, message)) or ({"success": True}, 200))
+
+    response = client.post("/api/ask/batch", json={"turns": [
+        {"game_id": "g1", "message": "1"},
+        {"game_id": "g2", "message": "a"},
+        {"game_id": "g1", "message": "2"}
+    ]})
+
+    assert response.get_json()["succeeded"] == 3
+    assert [message for game_id, message in order if game_id == "g1"] == ["1", "2"]
+
+
+def test_requires_turns_array(client):
+    assert client.post("/api/ask/batch", json={"turns": []}).status_code == 400
+    assert client.post("/api/ask/batch", json={}).status_code == 400
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from api.circuit_breaker import CircuitBreaker, CircuitOpen, DeadlineExceeded, is_upstream_error
+from api.llm_gateway import LLMQueueTimeout
+
+
+def server_error(status=500):
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    return openai.APIStatusError("error", response=httpx.Response(status, request=request), body=None)
+
+
+def make_breaker(**options):
+    defaults = dict(window_seconds=10, min_requests=4, error_rate=0.5, open_seconds=0.1,
+                    half_open_probes=1, hedge_ratio=0)
+    defaults.update(options)
+    return CircuitBreaker("test", **defaults)
+
+
+def failing(error):
+    def fn(deadline):
+        raise error
+    return fn
+
+
+def test_upstream_error_classification():
+    assert is_upstream_error(server_error(500))
+    assert is_upstream_error(server_error(429))
+    assert not is_upstream_error(server_error(400))
+    assert is_upstream_error(openai.APIConnectionError(request=httpx.Request("POST", "http://test")))
+    assert not is_upstream_error(LLMQueueTimeout())
+    assert not is_upstream_error(DeadlineExceeded())
+    assert not is_upstream_error(KeyError("bug"))
+
+
+def test_opens_on_upstream_errors_and_recovers():
+    breaker = make_breaker()
+    for _ in range(4):
+        with pytest.raises(openai.APIStatusError):
+            breaker.call(failing(server_error()), time.monotonic() + 1)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda deadline: "ok", time.monotonic() + 1)
+
+    time.sleep(0.15)
+    assert breaker.state == "half_open"
+    assert breaker.call(lambda deadline: "ok", time.monotonic() + 1) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_local_errors_do_not_open_circuit():
+    breaker = make_breaker()
+    for error in [LLMQueueTimeout(), LLMQueueTimeout(), ValueError("bug"), KeyError("bug"), LLMQueueTimeout()]:
+        with pytest.raises(type(error)):
+            breaker.call(failing(error), time.monotonic() + 1)
+    stats = breaker.stats()
+    assert stats["state"] == "closed"
+    assert stats["failures"] == 0 and stats["window_requests"] == 0
+
+
+def test_local_error_releases_half_open_probe():
+    breaker = make_breaker()
+    for _ in range(4):
+        with pytest.raises(openai.APIStatusError):
+            breaker.call(failing(server_error()), time.monotonic() + 1)
+    time.sleep(0.15)
+    with pytest.raises(LLMQueueTimeout):
+        breaker.call(failing(LLMQueueTimeout()), time.monotonic() + 1)
+    # 시험 요청 자리가 반환되어 다음 호출이 시험 요청으로 실행됨
+    assert breaker.call(lambda deadline: "ok", time.monotonic() + 1) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_deadline_timeouts_count_as_slow_requests():
+    breaker = make_breaker(slow_seconds=10, slow_rate=0.5)
+    timeout = openai.APITimeoutError(request=httpx.Request("POST", "http://test"))
+    for _ in range(4):
+        with pytest.raises(DeadlineExceeded):
+            breaker.call(failing(timeout), time.monotonic())
+    stats = breaker.stats()
+    assert stats["deadline_exceeded"] == 4 and stats["failures"] == 0
+    assert stats["state"] == "open"
+    # 마감 시간을 넘긴 호출은 헤지 요청 기준(p95) 표본에 넣지 않음
+    assert not breaker._latencies
+
+
+def test_unhedged_call_runs_on_calling_thread():
+    breaker = make_breaker()
+    assert breaker.call(lambda deadline: threading.get_ident(), time.monotonic() + 1) == threading.get_ident()
+
+
+def warm_up(breaker, latency=0.01, count=25):
+    for _ in range(count):
+        breaker.record(latency)
+
+
+def test_slow_primary_is_hedged():
+    breaker = make_breaker(min_requests=100, hedge_ratio=1.0, hedge_min_delay=0.05)
+    warm_up(breaker)
+    calls = []
+
+    def fn(deadline):
+        calls.append(threading.get_ident())
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return "primary"
+        return "hedge"
+
+    assert breaker.call(fn, time.monotonic() + 2) == "hedge"
+    stats = breaker.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_no_hedge_without_gateway_capacity():
+    breaker = make_breaker(min_requests=100, hedge_ratio=1.0, hedge_min_delay=0.05,
+                           hedge_capacity=lambda: False)
+    warm_up(breaker)
+    calls = []
+
+    def fn(deadline):
+        calls.append(1)
+        time.sleep(0.2)
+        return "primary"
+
+    assert breaker.call(fn, time.monotonic() + 2) == "primary"
+    assert len(calls) == 1 and breaker.stats()["hedged"] == 0
+
+
+def test_async_hedge_cancels_loser():
+    breaker = make_breaker(min_requests=100, hedge_ratio=1.0, hedge_min_delay=0.05)
+    warm_up(breaker)
+    cancelled = []
+
+    async def fn(deadline):
+        first = not cancelled and not getattr(fn, "started", False)
+        fn.started = True
+        try:
+            await asyncio.sleep(0.5 if first else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(first)
+            raise
+        return "primary" if first else "hedge"
+
+    assert asyncio.run(breaker.acall(fn, time.monotonic() + 2)) == "hedge"
+    assert cancelled == [True]
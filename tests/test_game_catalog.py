@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from api.game_catalog import GameCatalog, publish_items
+
+ITEMS = [
+    {"id": 1, "title": "면접", "category": "직장", "difficulty": "쉬움", "max_turns": 5, "secret": "x"},
+    {"id": 2, "title": "데이트", "category": "플러팅", "difficulty": "어려움", "max_turns": 8}
+]
+
+
+def test_snapshot_indexes_items_and_hides_private_fields():
+    catalog = GameCatalog()
+    catalog.replace(ITEMS)
+
+    assert catalog.get("1") is catalog.get(1) is ITEMS[0]
+    assert catalog.by_category("플러팅") == [ITEMS[1]]
+    assert catalog.random_item(difficulty="쉬움") is ITEMS[0]
+    games = json.loads(catalog.snapshot.payload)["data"]
+    assert [game["title"] for game in games] == ["면접", "데이트"]
+    assert "secret" not in games[0]
+
+
+def test_etag_changes_only_with_public_fields():
+    catalog = GameCatalog()
+    catalog.replace(ITEMS)
+    etag = catalog.snapshot.etag
+
+    catalog.replace([dict(ITEMS[0], secret="y"), ITEMS[1]])
+    assert catalog.snapshot.etag == etag
+    assert catalog.snapshot.version == 2
+
+    catalog.replace([dict(ITEMS[0], title="최종 면접"), ITEMS[1]])
+    assert catalog.snapshot.etag != etag
+
+
+def test_publish_items_updates_catalogs_sharing_the_file(tmp_path):
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(ITEMS), encoding="utf-8")
+    catalog = GameCatalog(path)
+    assert catalog.load() and len(catalog) == 2
+
+    publish_items(path, ITEMS[:1])
+    assert len(catalog) == 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from api import index
+
+    catalog = GameCatalog()
+    catalog.replace(ITEMS)
+    monkeypatch.setattr(index, "CATALOG", catalog)
+    return index.app.test_client(), catalog
+
+
+def test_games_endpoint_returns_304_for_matching_etag(client):
+    client, catalog = client
+    response = client.get("/api/games")
+    assert response.status_code == 200
+    assert response.get_data() == catalog.snapshot.payload
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/games", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.get_data() == b""
+
+    catalog.replace(ITEMS[:1])
+    response = client.get("/api/games", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.get_json()["data"]) == 1
@@ -0,0 +1,55 @@
+import os
+
+from api.game_log import GameLogWriter, compact, iter_records, list_segments
+
+
+def write_segment(directory, sequence, pid, records):
+    path = os.path.join(directory, f"segment-{sequence:06d}-{pid}.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for game_id, turn in records:
+            f.write(f'{{"game_id": "{game_id}", "turn": {turn}}}\n')
+    return path
+
+
+def test_writer_rotates_segments(tmp_path):
+    writer = GameLogWriter(tmp_path, segment_max_bytes=64)
+    for turn in range(10):
+        writer.append({"game_id": "g1", "turn": turn})
+        writer.flush()
+    writer.close()
+
+    assert len(list_segments(tmp_path)) > 1
+    assert [record["turn"] for record in iter_records(tmp_path)] == list(range(10))
+
+
+def test_iter_records_skips_truncated_line(tmp_path):
+    path = write_segment(tmp_path, 1, 1, [("g1", 1)])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"game_id": "g1", "tu')
+    assert [record["turn"] for record in iter_records(tmp_path)] == [1]
+
+
+def test_compact_keeps_latest_record_per_game(tmp_path):
+    write_segment(tmp_path, 1, 7, [("g1", 1), ("g2", 1)])
+    write_segment(tmp_path, 2, 7, [("g1", 2)])
+
+    assert compact(tmp_path) == 2
+    assert [os.path.basename(path) for path in list_segments(tmp_path)] == ["segment-000001-0.jsonl"]
+    records = {record["game_id"]: record["turn"] for record in iter_records(tmp_path)}
+    assert records == {"g1": 2, "g2": 1}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_writer_compact_leaves_other_processes_segments(tmp_path):
+    other = write_segment(tmp_path, 1, os.getpid() + 1, [("g9", 1)])
+
+    writer = GameLogWriter(tmp_path)
+    writer.append({"game_id": "g1", "turn": 1})
+    writer.append({"game_id": "g1", "turn": 2})
+    assert writer.compact() == 1
+    writer.append({"game_id": "g1", "turn": 3})
+    writer.close()
+
+    assert os.path.exists(other)
+    records = [(record["game_id"], record["turn"]) for record in iter_records(tmp_path)]
+    assert records == [("g9", 1), ("g1", 2), ("g1", 3)]
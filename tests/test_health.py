@@ -0,0 +1,54 @@
+import pytest
+
+from api import index
+
+
+class CountingStore:
+    def __init__(self):
+        self.stats_calls = 0
+
+    def stats(self):
+        self.stats_calls += 1
+        return {"backend": "memory"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = CountingStore()
+    monkeypatch.setattr(index, "GAME_SESSIONS", store)
+    monkeypatch.setattr(index, "validate_api_key", lambda: (True, "ok"))
+    return index.app.test_client(), store
+
+
+def test_health_hides_internal_state_by_default(client, monkeypatch):
+    client, store = client
+    monkeypatch.setattr(index, "DEBUG_INFO_MODE", "admin")
+
+    data = client.get("/api/health").get_json()
+    assert data["status"] == "online" and data["api_key_valid"]
+    assert "debug_info" not in data
+    assert store.stats_calls == 0
+
+    # 관리자 토큰 없이 헤더만 보낸 요청도 포함하지 않음
+    data = client.get("/api/health", headers={"X-Debug-Info": "1"}).get_json()
+    assert "debug_info" not in data
+
+
+def test_health_includes_stats_when_debug_info_enabled(client, monkeypatch):
+    client, store = client
+    monkeypatch.setattr(index, "DEBUG_INFO_MODE", "on")
+
+    data = client.get("/api/health").get_json()
+    assert data["debug_info"]["session_store"] == {"backend": "memory"}
+    assert "startup" in data["debug_info"]
+
+
+def test_health_error_without_debug_info(client, monkeypatch):
+    client, _ = client
+    monkeypatch.setattr(index, "DEBUG_INFO_MODE", "off")
+    monkeypatch.setattr(index, "validate_api_key", lambda: (False, "API 키가 없습니다"))
+
+    response = client.get("/api/health")
+    assert response.status_code == 500
+    data = response.get_json()
+    assert data["api_key_valid"] is False and "debug_info" not in data
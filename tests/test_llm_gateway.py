@@ -0,0 +1,63 @@
+import threading
+import time
+
+import openai
+import pytest
+
+from bench.fake_openai import FakeOpenAIServer
+from api.llm_gateway import LLMGateway, LLMQueueTimeout
+
+MESSAGES = [{"role": "user", "content": "안녕하세요"}]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeOpenAIServer(latency=0.0, jitter=0.0)
+    server.start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    yield server
+    server.stop()
+
+
+def test_chat_uses_shared_client(server):
+    gateway = LLMGateway(api_key="sk-test")
+    response = gateway.chat("gpt-test", MESSAGES, deadline=time.monotonic() + 5)
+    assert response.choices[0].message.content
+    gateway.chat("gpt-test", MESSAGES)
+    stats = gateway.stats()["gpt-test"]
+    assert stats["completed"] == 2 and stats["in_flight"] == 0
+    assert gateway.deadline_client is gateway.deadline_client
+
+
+def test_retries_stay_within_deadline(server):
+    server.error_rate = 1.0
+    gateway = LLMGateway(api_key="sk-test", max_retries=10)
+    started = time.monotonic()
+    with pytest.raises(openai.InternalServerError):
+        gateway.chat("gpt-test", MESSAGES, deadline=started + 0.6)
+    assert time.monotonic() - started < 1.0
+    assert 1 < server.requests < 10
+
+
+def test_queue_timeout_and_capacity():
+    gateway = LLMGateway(api_key="sk-test", max_concurrency=1)
+    assert gateway.has_capacity("m")
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with gateway.slot("m"):
+            entered.set()
+            release.wait(2)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    entered.wait(1)
+    assert not gateway.has_capacity("m")
+    with pytest.raises(LLMQueueTimeout):
+        with gateway.slot("m", deadline=time.monotonic() + 0.05):
+            pass
+    release.set()
+    thread.join()
+    assert gateway.has_capacity("m")
+    assert gateway.stats()["m"]["queue_timeouts"] == 1
@@ -0,0 +1,52 @@
+import io
+import json
+import logging
+
+from api import log_pipeline
+from api.log_pipeline import CategoryFilter, JSONFormatter, async_output_enabled
+
+
+def test_async_output_defaults(monkeypatch):
+    monkeypatch.delenv("LOG_ASYNC", raising=False)
+    monkeypatch.delenv("VERCEL", raising=False)
+    assert async_output_enabled()
+
+    # 서버리스 환경에서는 기본적으로 바로 출력
+    monkeypatch.setenv("VERCEL", "1")
+    assert not async_output_enabled()
+    monkeypatch.setenv("LOG_ASYNC", "true")
+    assert async_output_enabled()
+
+    monkeypatch.delenv("VERCEL")
+    monkeypatch.setenv("LOG_ASYNC", "false")
+    assert not async_output_enabled()
+
+
+def make_record(message, category=None):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, (), None)
+    if category:
+        record.category = category
+    return record
+
+
+def test_category_rate_limit_drops_excess_records():
+    category_filter = CategoryFilter(rate_limits={"prompt": 2})
+    results = [category_filter.filter(make_record("x", "prompt")) for _ in range(5)]
+    assert results.count(True) == 2
+    assert category_filter.stats() == {"prompt": 3}
+    # 카테고리가 없는 기록은 제한하지 않음
+    assert all(category_filter.filter(make_record("y")) for _ in range(5))
+
+
+def test_category_sampling_zero_drops_everything():
+    category_filter = CategoryFilter(sample_rates={"body": 0.0})
+    assert not any(category_filter.filter(make_record("x", "body")) for _ in range(10))
+
+
+def test_json_formatter_output():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONFormatter())
+    handler.emit(make_record("안녕하세요"))
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "안녕하세요" and entry["level"] == "INFO"
@@ -0,0 +1,59 @@
+import os
+import threading
+
+from api.serialization import Fragment, dumps_bytes, loads, write_file
+
+
+def test_fragment_is_embedded_without_reencoding():
+    fragment = Fragment(dumps_bytes({"title": "게임"}))
+    assert loads(dumps_bytes({"data": fragment, "turn": 3})) == {"data": {"title": "게임"}, "turn": 3}
+
+
+def test_write_file_from_many_threads(tmp_path):
+    path = tmp_path / "state.json"
+    errors = []
+
+    def writer(index):
+        try:
+            for turn in range(20):
+                write_file(path, {"writer": index, "turn": turn})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with open(path, 'rb') as f:
+        assert loads(f.read())["turn"] == 19
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def make_app():
+    from flask import Flask
+
+    from api.serialization import init_app
+
+    app = Flask(__name__)
+    init_app(app)
+    return app
+
+
+def test_flask_provider_sorts_keys_like_default_provider():
+    app = make_app()
+    with app.app_context():
+        assert app.json.response({"b": 1, "a": {"d": 2, "c": 3}}).get_data() == b'{"a":{"c":3,"d":2},"b":1}'
+        app.json.sort_keys = False
+        assert app.json.dumps({"b": 1, "a": 2}) == '{"b":1,"a":2}'
+
+
+def test_flask_provider_honours_indent_and_compact():
+    app = make_app()
+    fragment = Fragment(b'{"x":1}')
+    with app.app_context():
+        assert app.json.dumps({"f": fragment, "a": 1}, indent=2) == '{\n  "a": 1,\n  "f": {\n    "x": 1\n  }\n}'
+        app.json.compact = False
+        assert b'\n  "a": 1' in app.json.response({"a": 1}).get_data()
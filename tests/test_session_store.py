@@ -0,0 +1,188 @@
+import os
+
+import pytest
+
+from api import session_store
+from api.game_session import GameSession
+from api.session_store import DEMOTE_BATCH_SIZE, HOT, PACKED, SPILLED, MemorySessionStore, SQLiteSessionStore
+
+ITEM = {"id": 1, "title": "테스트", "max_turns": 5, "win_condition": "이기기"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(session_store, "time", clock)
+    return clock
+
+
+def make_store(**kwargs):
+    return MemorySessionStore(session_factory=lambda data: GameSession.from_dict(data, ITEM), **kwargs)
+
+
+def make_session(game_id):
+    return GameSession(game_id, ITEM)
+
+
+def test_idle_sessions_expire(clock):
+    store = make_store(ttl_seconds=60)
+    store.set("old", make_session("old"))
+    clock.now += 30
+    store.set("new", make_session("new"))
+    clock.now += 40
+
+    assert store.get("old") is None
+    assert store.get("new") is not None
+    assert store.stats()["expired"] == 1
+
+
+def test_least_recently_used_session_is_evicted(clock):
+    store = make_store(max_sessions=2)
+    store.set("a", make_session("a"))
+    store.set("b", make_session("b"))
+    clock.now += 1
+    store.get("a")
+    store.set("c", make_session("c"))
+
+    assert sorted(store.keys()) == ["a", "c"]
+    assert store.stats()["evicted"] == 1
+
+
+def make_sqlite_store(path, **kwargs):
+    return SQLiteSessionStore(path, session_factory=lambda data: GameSession.from_dict(data, ITEM), **kwargs)
+
+
+def test_sqlite_sessions_are_shared_between_stores(tmp_path):
+    # 워커 프로세스마다 따로 연 저장소가 같은 데이터베이스 파일을 공유
+    first = make_sqlite_store(tmp_path / "sessions.db")
+    second = make_sqlite_store(tmp_path / "sessions.db")
+    session = make_session("a")
+    session.add_message("user", "안녕하세요")
+    first.set("a", session)
+
+    restored = second.get("a")
+    assert restored["messages"] == session["messages"] and restored["version"] == 1
+    assert second.delete("a") and first.get("a") is None
+
+
+def test_sqlite_expires_idle_sessions_and_purges_overflow(clock, tmp_path):
+    store = make_sqlite_store(tmp_path / "sessions.db", ttl_seconds=60, max_sessions=2)
+    store.set("old", make_session("old"))
+    clock.now += 90
+    assert store.get("old") is None
+
+    for name in ("a", "b", "c"):
+        clock.now += 1
+        store.set(name, make_session(name))
+    clock.now += 1
+    store.get("a")
+    store.purge()
+    assert sorted(store.keys()) == ["a", "c"]
+    assert store.stats()["evicted"] == 1
+
+
+def test_packing_is_off_by_default(clock, monkeypatch):
+    for name in ("SESSION_STORE_BACKEND", "SESSION_PACK_AFTER_SECONDS", "SESSION_SPILL_DIR"):
+        monkeypatch.delenv(name, raising=False)
+    store = session_store.create_session_store()
+    assert store.pack_after_seconds == 0
+
+    store.set("a", make_session("a"))
+    clock.now += 600
+    store.set("b", make_session("b"))
+    assert store.stats()["tiers"][HOT] == 2
+
+
+def test_idle_sessions_are_packed_spilled_and_rehydrated(clock, tmp_path):
+    store = make_store(pack_after_seconds=10, spill_after_seconds=20, spill_dir=str(tmp_path))
+    store.close()
+    session = make_session("a")
+    session.add_message("user", "안녕하세요")
+    store.set("a", session)
+
+    # 저장 요청 처리 중에는 계층을 옮기지 않음
+    clock.now += 15
+    store.set("b", make_session("b"))
+    assert store.stats()["tiers"][PACKED] == 0
+    assert store.demote_idle() == 1
+    assert store.stats()["tiers"][PACKED] == 1
+
+    clock.now += 20
+    assert store.demote_idle() == 2
+    tiers = store.stats()["tiers"]
+    assert tiers[SPILLED] == 1 and tiers[PACKED] == 1 and tiers["spilled_bytes"] > 0
+
+    restored = store.get("a")
+    assert restored["messages"] == session["messages"]
+    assert restored["version"] == 1
+    tiers = store.stats()["tiers"]
+    assert tiers[SPILLED] == 0 and tiers["spilled_bytes"] == 0
+    # 복원한 세션의 내보낸 파일은 삭제됨
+    assert not any(files for _, _, files in os.walk(tmp_path))
+
+
+def test_demote_idle_moves_every_idle_session_in_batches(clock):
+    store = make_store(pack_after_seconds=10)
+    store.close()
+    for index in range(DEMOTE_BATCH_SIZE * 2 + 1):
+        store.set(f"g{index}", make_session(f"g{index}"))
+    clock.now += 15
+    store.get("g0")
+
+    assert store.demote_idle() == DEMOTE_BATCH_SIZE * 2
+    assert store.stats()["tiers"] == dict(store.stats()["tiers"], hot=1, packed=DEMOTE_BATCH_SIZE * 2)
+
+
+def test_background_demoter_packs_sessions_without_new_requests():
+    import time
+
+    store = make_store(pack_after_seconds=0.05, demote_interval=0.02)
+    try:
+        store.set("a", make_session("a"))
+        deadline = time.monotonic() + 5
+        while store.stats()["tiers"][PACKED] != 1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert store.stats()["tiers"][PACKED] == 1
+        assert store.get("a")["game_id"] == "a"
+    finally:
+        store.close()
+
+
+def test_sqlite_set_versions_are_consistent_across_writers(tmp_path):
+    import threading
+
+    path = tmp_path / "sessions.db"
+    make_sqlite_store(path).set("a", make_session("a"))
+    seen = []
+    lock = threading.Lock()
+
+    def writer():
+        # 워커 프로세스처럼 저장소(연결)를 따로 사용
+        store = make_sqlite_store(path)
+        for _ in range(25):
+            session = make_session("a")
+            store.set("a", session)
+            with lock:
+                seen.append(session["version"])
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 각 저장은 서로 다른 버전을 받고, 마지막 버전으로 compare_and_set할 수 있음
+    assert sorted(seen) == list(range(2, 102))
+    store = make_sqlite_store(path)
+    assert store.compare_and_set("a", make_session("a"), 101)
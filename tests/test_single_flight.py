@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.single_flight import SingleFlight, SingleFlightTimeout
+
+MESSAGES = [{"role": "system", "content": "프롬프트"}, {"role": "user", "content": "안녕하세요"}]
+
+
+def test_default_policy_shares_only_low_temperature():
+    flight = SingleFlight()
+    assert flight.is_shareable(0.2)
+    assert flight.is_shareable(0.3)
+    assert not flight.is_shareable(0.7)
+    assert not flight.is_shareable(None)
+    assert not flight.is_shareable(0.2, {"single_flight": False})
+    assert not SingleFlight(enabled=False).is_shareable(0.2)
+    assert SingleFlight(enabled=False).is_shareable(0.2, {"single_flight": True})
+
+
+def test_key_ignores_whitespace_but_not_content():
+    key = SingleFlight.make_key("m", MESSAGES, 0.2, 100)
+    spaced = [{"role": "system", "content": " 프롬프트 "}, {"role": "user", "content": "안녕하세요\n"}]
+    assert SingleFlight.make_key("m", spaced, 0.2, 100) == key
+    assert SingleFlight.make_key("m", MESSAGES, 0.2, 200) != key
+    assert SingleFlight.make_key("m", MESSAGES[:1] + [{"role": "user", "content": "안녕"}], 0.2, 100) != key
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "응답"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow, 5)))
+    leader.start()
+    started.wait(1)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow, 5))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("응답", False)] + [("응답", True)] * 4
+    stats = flight.stats()
+    assert stats["leaders"] == 1 and stats["shared"] == 4 and stats["coalescing_ratio"] == 0.8
+    assert stats["in_flight"] == 0
+
+
+def test_sequential_calls_are_not_merged():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == (1, False)
+    assert flight.do("k", lambda: 2) == (2, False)
+    assert flight.do(None, lambda: 3) == (3, False)
+    assert flight.stats()["bypassed"] == 1
+
+
+def test_leader_error_reaches_waiters():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("실패")
+
+    errors = []
+
+    def run():
+        try:
+            flight.do("k", failing, 5)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=run)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+    assert flight.stats()["errors"] == 1
+
+
+def test_waiter_times_out():
+    flight = SingleFlight()
+    started = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("k", lambda: started.set() or time.sleep(0.3), 5))
+    leader.start()
+    started.wait(1)
+    with pytest.raises(SingleFlightTimeout):
+        flight.do("k", lambda: None, 0.05)
+    leader.join()
+    assert flight.stats()["timeouts"] == 1
+
+
+def test_async_calls_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "응답"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("k", slow, 5) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(results) == [("응답", False)] + [("응답", True)] * 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_leader_cancellation_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "응답"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("k", slow, 5))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado("k", slow, 5))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == ("응답", True)
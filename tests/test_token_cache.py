@@ -0,0 +1,96 @@
+import time
+
+import jwt
+import pytest
+
+from api import token_cache, utils
+from api.token_cache import VerifiedTokenCache, token_digest
+
+
+def test_entries_expire_at_token_exp():
+    cache = VerifiedTokenCache(max_ttl=300)
+    digest = token_digest("a")
+    cache.set(digest, "admin", exp=1010, now=1000)
+    assert cache.get(digest, now=1005) == "admin"
+    assert cache.get(digest, now=1010) is None
+    # 이미 만료된 토큰은 캐시하지 않음
+    cache.set(digest, "admin", exp=900, now=1000)
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(max_entries=2)
+    for name in ("a", "b"):
+        cache.set(token_digest(name), name, now=1000)
+    cache.get(token_digest("a"), now=1001)
+    cache.set(token_digest("c"), "c", now=1002)
+    assert cache.get(token_digest("b"), now=1003) is None
+    assert cache.get(token_digest("a"), now=1003) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_revoked_token_is_dropped_and_not_recached():
+    cache = VerifiedTokenCache()
+    digest = token_digest("a")
+    cache.set(digest, "admin", exp=2000, now=1000)
+    cache.revoke(digest, exp=2000, now=1001)
+
+    assert cache.get(digest, now=1002) is None
+    assert cache.is_revoked(digest, now=1002)
+    cache.set(digest, "admin", exp=2000, now=1003)
+    assert cache.get(digest, now=1004) is None
+    # 폐기 기록은 토큰의 만료 시각까지만 유지
+    assert not cache.is_revoked(digest, now=2000)
+    assert cache.stats()["revoked_entries"] == 0
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = VerifiedTokenCache()
+    monkeypatch.setattr(token_cache, "_CACHE", cache)
+    return cache
+
+
+def test_logout_revokes_cached_token(fresh_cache):
+    token = jwt.encode({"sub": "admin", "exp": int(time.time()) + 600}, utils.JWT_SECRET, algorithm="HS256")
+    header = f"Bearer {token}"
+
+    assert utils.verify_token(header) == (True, "admin")
+    assert utils.verify_token(header) == (True, "admin")
+    assert fresh_cache.stats()["hits"] == 1
+
+    assert utils.revoke_token(header)[0]
+    assert utils.verify_token(header) == (False, "폐기된 토큰입니다")
+
+
+def test_tampered_token_is_not_served_from_cache(fresh_cache):
+    token = jwt.encode({"sub": "admin", "exp": int(time.time()) + 600}, utils.JWT_SECRET, algorithm="HS256")
+    assert utils.verify_token(token)[0]
+    assert utils.verify_token(token[:-2] + "xx") == (False, "유효하지 않은 토큰입니다")
+
+
+def test_revocation_is_shared_between_processes(tmp_path):
+    from api.token_cache import RevocationStore
+
+    # 프로세스마다 따로 있는 캐시가 같은 폐기 목록 파일을 사용
+    path = tmp_path / "revoked.db"
+    login = VerifiedTokenCache(revocations=RevocationStore(path))
+    items = VerifiedTokenCache(revocations=RevocationStore(path))
+    digest = token_digest("a")
+    items.set(digest, "admin", exp=2000, now=1000)
+
+    login.revoke(digest, exp=2000, now=1001)
+    assert items.get(digest, now=1002) is None
+    assert items.is_revoked(digest, now=1002)
+    # 재시작한 프로세스도 폐기 기록을 유지
+    assert VerifiedTokenCache(revocations=RevocationStore(path)).is_revoked(digest, now=1003)
+    assert not items.is_revoked(digest, now=2000)
+
+
+def test_revocation_without_shared_store_is_per_process():
+    # 공유 폐기 목록이 없으면 다른 프로세스의 캐시는 폐기를 알지 못함
+    login, items = VerifiedTokenCache(), VerifiedTokenCache()
+    digest = token_digest("a")
+    items.set(digest, "admin", exp=2000, now=1000)
+    login.revoke(digest, exp=2000, now=1001)
+    assert items.get(digest, now=1002) == "admin"
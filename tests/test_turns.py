@@ -0,0 +1,208 @@
+import time
+
+import pytest
+
+from api.game_session import GameSession
+from api.session_store import MemorySessionStore, SQLiteSessionStore, TurnClaims, TurnConflict
+
+ITEM = {"id": 1, "title": "테스트", "max_turns": 5, "win_condition": "이기기"}
+
+
+def make_session(game_id="g1"):
+    return GameSession(game_id, ITEM)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteSessionStore(tmp_path / "sessions.db", session_factory=lambda data: GameSession.from_dict(data, ITEM))
+    return MemorySessionStore()
+
+
+def test_compare_and_set_rejects_stale_version(store):
+    store.set("g1", make_session())
+    session = store.get("g1")
+    version = session["version"]
+
+    assert store.compare_and_set("g1", store.get("g1"), version)
+    assert not store.compare_and_set("g1", session, version)
+    assert store.stats()["version_conflicts"] == 1
+
+
+def test_begin_turn_rejects_second_claim(store):
+    store.set("g1", make_session())
+    claim = store.begin_turn("g1")
+    assert claim is not None
+    assert store.begin_turn("g1") is None
+    store.end_turn("g1", claim)
+    assert store.begin_turn("g1") is not None
+
+
+def test_end_turn_with_expired_claim_keeps_new_claim(store):
+    store.set("g1", make_session())
+    store.turn_lease_seconds = store._claims.lease_seconds = 0.05
+    first = store.begin_turn("g1")
+    time.sleep(0.1)
+    second = store.begin_turn("g1")
+    assert second is not None and second != first
+
+    # 선점이 만료된 이전 요청의 해제는 새 선점에 영향을 주지 않음
+    store.end_turn("g1", first)
+    assert store.begin_turn("g1") is None
+    store.end_turn("g1", second)
+    assert store.begin_turn("g1") is not None
+
+
+def test_turn_claims_are_per_game():
+    claims = TurnClaims(stripes=1)
+    assert claims.acquire("a") is not None
+    assert claims.acquire("b") is not None
+    assert claims.acquire("a") is None
+    assert len(claims) == 2
+
+
+def test_complete_turn_conflict_leaves_stored_session_unchanged(monkeypatch):
+    from api import index
+
+    store = MemorySessionStore()
+    monkeypatch.setattr(index, "GAME_SESSIONS", store)
+    store.set("g1", make_session())
+    session = store.get("g1")
+    expected_version = session["version"]
+
+    # 응답을 기다리는 동안 다른 요청(게임 종료 등)이 세션을 저장
+    other = store.get("g1").copy()
+    other["completed"] = True
+    assert store.compare_and_set("g1", other, expected_version)
+
+    result = {"response": "안녕하세요", "victory": False, "defeat": False}
+    with pytest.raises(TurnConflict):
+        index.complete_turn("g1", session, "질문", result, expected_version)
+
+    stored = store.get("g1")
+    assert stored["current_turn"] == 1
+    assert len(stored.conversation) == 0
+    assert session["current_turn"] == 1 and len(session.conversation) == 0
+
+
+def test_complete_turn_applies_turn(monkeypatch):
+    from api import index
+
+    store = MemorySessionStore()
+    monkeypatch.setattr(index, "GAME_SESSIONS", store)
+    store.set("g1", make_session())
+    session = store.get("g1")
+
+    result = {"response": "안녕하세요", "victory": False, "defeat": False}
+    data = index.complete_turn("g1", session, "질문", result, session["version"])
+
+    stored = store.get("g1")
+    assert data["current_turn"] == stored["current_turn"] == 2
+    assert [message["role"] for message in stored["messages"]] == ["user", "assistant"]
+
+
+def test_arun_turn_keeps_blocking_work_off_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    from api import index
+
+    store = MemorySessionStore()
+    monkeypatch.setattr(index, "GAME_SESSIONS", store)
+    store.set("g1", make_session())
+    threads = {}
+
+    def prepare_turn(game_id, message):
+        threads["prepare"] = threading.get_ident()
+        return None, store.get(game_id), "시스템", store.begin_turn(game_id)
+
+    async def agenerate_ai_response(system_prompt, message, game_session):
+        threads["generate"] = threading.get_ident()
+        return {"response": "안녕하세요", "victory": False, "defeat": False}
+
+    complete_turn = index.complete_turn
+
+    def record_complete_turn(*args):
+        threads["complete"] = threading.get_ident()
+        return complete_turn(*args)
+
+    monkeypatch.setattr(index, "prepare_turn", prepare_turn)
+    monkeypatch.setattr(index, "agenerate_ai_response", agenerate_ai_response)
+    monkeypatch.setattr(index, "complete_turn", record_complete_turn)
+
+    async def run():
+        threads["loop"] = threading.get_ident()
+        return await index.arun_turn("g1", "질문")
+
+    data, status = asyncio.run(run())
+    assert status == 200 and data["current_turn"] == 2
+    assert threads["generate"] == threads["loop"]
+    assert threads["prepare"] != threads["loop"] and threads["complete"] != threads["loop"]
+    # 턴 선점이 해제되어 다음 턴을 시작할 수 있음
+    assert store.begin_turn("g1") is not None
+
+
+def test_agenerate_ai_response_keeps_prompt_and_cache_work_off_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    from api import index
+
+    threads = {}
+
+    def prepare_completion(system_prompt, user_message, game_session):
+        threads["prepare"] = threading.get_ident()
+        # 응답 캐시에 있는 경우 (LLM을 호출하지 않음)
+        return {}, "key", "안녕하세요"
+
+    def completion_result(ai_response, game_session):
+        threads["result"] = threading.get_ident()
+        return {"response": ai_response, "victory": False, "defeat": False}
+
+    monkeypatch.setattr(index, "OPENAI_AVAILABLE", True)
+    monkeypatch.setattr(index, "prepare_completion", prepare_completion)
+    monkeypatch.setattr(index, "completion_result", completion_result)
+
+    async def run():
+        threads["loop"] = threading.get_ident()
+        return await index.agenerate_ai_response("시스템", "질문", make_session())
+
+    assert asyncio.run(run())["response"] == "안녕하세요"
+    assert threads["loop"] not in (threads["prepare"], threads["result"])
+
+
+def test_cheat_finishes_game_on_a_copy(monkeypatch):
+    from api import index
+
+    store = MemorySessionStore()
+    monkeypatch.setattr(index, "GAME_SESSIONS", store)
+    store.set("g1", make_session())
+    live = store.get("g1")
+
+    (data, status), *_ = index.prepare_turn("g1", "승승리")
+    assert status == 200 and data["victory"]
+    stored = store.get("g1")
+    assert stored["completed"] and stored["victory"] and stored["version"] == 2
+    assert not live["completed"]
+    assert store.begin_turn("g1") is not None
+
+
+def test_cheat_does_not_overwrite_turn_saved_after_read(monkeypatch):
+    from api import index
+
+    store = MemorySessionStore()
+    monkeypatch.setattr(index, "GAME_SESSIONS", store)
+    store.set("g1", make_session())
+    stale = store.get("g1")
+
+    # 세션을 읽은 뒤 선점하기 전에 다른 요청이 턴을 저장
+    other = stale.copy()
+    other["current_turn"] = 2
+    assert store.compare_and_set("g1", other, stale["version"])
+
+    claim = store.begin_turn("g1")
+    (data, status), *_ = index._prepare_claimed_turn("g1", "패패배", stale, claim)
+    assert status == 409 and data["code"] == "TURN_CONFLICT"
+    stored = store.get("g1")
+    assert stored["current_turn"] == 2 and not stored["completed"]
+    assert store.begin_turn("g1") is not None
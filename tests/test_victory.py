@@ -0,0 +1,71 @@
+import pytest
+
+from api.victory import DEFAULT_RULES, VictoryEngine
+
+SPEC = {
+    "version": 1,
+    "common": {"win": [{"name": "answer", "prompt": "correct_answer_message"}]},
+    "categories": {
+        "플러팅": {
+            "win": [{"name": "phone_number", "regex": r"01[016789]-\d{3,4}-\d{4}", "max_length": 13}],
+            "lose": [{"name": "rejected", "keywords": ["차단"]}],
+            "triggers": ["전화", "번호"]
+        }
+    },
+    "conditions": {},
+    "items": {}
+}
+PROMPTS = {"correct_answer_message": "정답은 {title}입니다"}
+SESSION = {"id": 1, "title": "데이트", "category": "플러팅", "win_condition": "전화번호 받기"}
+
+
+@pytest.fixture
+def engine():
+    engine = VictoryEngine()
+    engine.load_spec(SPEC)
+    return engine
+
+
+def test_evaluate_prefers_win_over_lose(engine):
+    verdict = engine.evaluate("차단할 거야... 아니 010-1234-5678로 연락해", SESSION, PROMPTS)
+    assert verdict.victory and verdict.rule == "phone_number"
+    assert engine.evaluate("차단합니다", SESSION, PROMPTS).defeat
+    assert engine.evaluate("정답은 데이트입니다", SESSION, PROMPTS).rule == "answer"
+
+
+@pytest.mark.parametrize("chunks", [
+    ["제 번호는 010-12", "34-56", "78이에요"],
+    ["제 번호는 0", "1", "0", "-", "1234-567", "8"],
+])
+def test_stream_matcher_finds_match_split_across_chunks(engine, chunks):
+    matcher = engine.matcher(SESSION, PROMPTS)
+    results = [matcher.feed(chunk) for chunk in chunks]
+    assert results[-1] and not any(results[:-1])
+    assert matcher.text == "".join(chunks)
+    assert matcher.verdict.rule == "phone_number"
+
+
+def test_stream_matcher_keeps_win_after_later_defeat(engine):
+    matcher = engine.matcher(SESSION, PROMPTS)
+    matcher.feed("차단 안 해요. 010-1234-5678")
+    matcher.feed(" 그래도 차단")
+    assert matcher.victory and not matcher.defeat
+
+
+def test_stream_matcher_agrees_with_full_evaluation(engine):
+    text = "음... 정답은 데이" + "트입니다 라고 할 줄 알았죠?"
+    matcher = engine.matcher(SESSION, PROMPTS)
+    for index in range(0, len(text), 3):
+        matcher.feed(text[index:index + 3])
+    assert matcher.verdict == engine.evaluate(text, SESSION, PROMPTS)
+
+
+def test_compiled_rules_are_cached_per_item(engine):
+    engine.evaluate("안녕", SESSION, PROMPTS)
+    engine.evaluate("안녕", SESSION, PROMPTS)
+    assert engine.stats()["compiled"] == 1 and engine.stats()["cache_hits"] == 1
+    assert engine.triggers("전화 번호 알려줘", SESSION, PROMPTS) == ["전화", "번호"]
+
+    # 규칙을 바꾸면 캐시를 비움
+    engine.load_spec(DEFAULT_RULES)
+    assert engine.stats()["cached_rule_sets"] == 0